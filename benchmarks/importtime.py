@@ -0,0 +1,107 @@
+""" Import time regression benchmark of HttpRunner command line entries.
+
+Each command is run in a fresh interpreter with `python -X importtime`, the cumulative
+import time of top level modules is summed up and checked against the budget.
+Modules imported by interpreter startup (e.g. site) are excluded.
+
+Usage:
+    $ python benchmarks/importtime.py
+    $ python benchmarks/importtime.py --repeat 10 --scale 2
+
+"""
+import argparse
+import subprocess
+import sys
+from typing import Dict, List, Text, Tuple
+
+# command name => (sys.argv, cli entry, import time budget in milliseconds)
+COMMANDS: Dict[Text, Tuple[List[Text], Text, float]] = {
+    "hrun -V": (["hrun", "-V"], "main_hrun_alias", 30),
+    "har2case -h": (["har2case", "-h"], "main_har2case_alias", 150),
+    "hmake -h": (["hmake", "-h"], "main_make_alias", 400),
+}
+
+# modules should not be imported when printing version
+HEAVY_MODULES = ["pytest", "requests", "pydantic", "sentry_sdk", "jinja2", "loguru"]
+
+SCRIPT = """
+import sys
+sys.argv = {argv!r}
+from httprunner import cli
+try:
+    cli.{entry}()
+except SystemExit:
+    pass
+"""
+
+
+def measure_script(
+    script: Text, excluded: List[Text] = None
+) -> Tuple[float, List[Text]]:
+    """ run script in a new interpreter
+
+    Returns:
+        tuple: (import time in milliseconds, top level modules imported)
+
+    """
+    excluded = excluded or []
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+
+    total_us = 0
+    modules = []
+    for line in proc.stderr.splitlines():
+        # import time:       self [us] |  cumulative | imported package
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if name.startswith("  ") or name.strip() in excluded:
+            # nested import, already counted in cumulative time of its parent
+            continue
+
+        total_us += int(cumulative)
+        modules.append(name.strip())
+
+    return total_us / 1000, modules
+
+
+def main(argv: List[Text] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="best of N runs")
+    parser.add_argument(
+        "--scale", type=float, default=1.0, help="scale budget for slow machines"
+    )
+    args = parser.parse_args(argv)
+
+    _, startup_modules = measure_script("pass")
+
+    exit_code = 0
+    for name, (command_argv, entry, budget) in COMMANDS.items():
+        script = SCRIPT.format(argv=command_argv, entry=entry)
+        results = [
+            measure_script(script, startup_modules) for _ in range(args.repeat)
+        ]
+        elapsed, modules = min(results, key=lambda result: result[0])
+        budget *= args.scale
+
+        status = "OK" if elapsed <= budget else "FAIL"
+        if elapsed > budget:
+            exit_code = 1
+        print(f"{status:4} {name:12} {elapsed:8.1f} ms  (budget {budget:.0f} ms)")
+
+        if command_argv[1] in ["-V", "--version"]:
+            heavy_modules = [m for m in HEAVY_MODULES if m in modules]
+            if heavy_modules:
+                exit_code = 1
+                print(f"FAIL {name:12} imported heavy modules: {heavy_modules}")
+
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
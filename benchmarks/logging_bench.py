@@ -0,0 +1,114 @@
+""" Requests per second of HttpRunner with different log levels.
+
+A local HTTP server responds JSON content, testcase with validators and extractors is
+run repeatedly, log records are sent to a null sink, thus the difference shows the cost
+of formatting log messages in request hot path.
+
+Usage:
+    $ python -m benchmarks.logging_bench
+    $ python -m benchmarks.logging_bench --requests 2000 --levels DEBUG INFO WARNING
+
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from typing import List, Text
+
+from loguru import logger
+
+from httprunner import HttpRunner
+from httprunner.backports import ThreadingHTTPServer
+from httprunner.models import TConfig, TStep, TRequest, TestCase
+
+RESPONSE_BODY = json.dumps(
+    {
+        "code": 0,
+        "message": "success",
+        "data": [{"id": i, "name": f"item {i}"} for i in range(20)],
+    }
+).encode("utf-8")
+
+
+class JsonHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(RESPONSE_BODY)))
+        self.end_headers()
+        self.wfile.write(RESPONSE_BODY)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), JsonHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def make_testcase(base_url: Text, steps_count: int) -> TestCase:
+    teststeps = [
+        TStep(
+            name=f"step {index}",
+            request=TRequest(method="GET", url=f"/items/{index}"),
+            extract={"code": "body.code", "first_name": "body.data[0].name"},
+            validators=[
+                {"eq": ["status_code", 200]},
+                {"eq": ["body.code", 0]},
+                {"eq": ["body.message", "success"]},
+            ],
+        )
+        for index in range(steps_count)
+    ]
+    return TestCase(
+        config=TConfig(name="logging benchmark", base_url=base_url), teststeps=teststeps
+    )
+
+
+def run(testcase: TestCase, requests_count: int) -> float:
+    """ run testcase repeatedly, return requests per second
+    """
+    steps_count = len(testcase.teststeps)
+    runs = max(1, requests_count // steps_count)
+    start_at = time.perf_counter()
+    for _ in range(runs):
+        HttpRunner().with_variables({}).run_testcase(testcase)
+    return runs * steps_count / (time.perf_counter() - start_at)
+
+
+def main(argv: List[Text] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--steps", type=int, default=10)
+    parser.add_argument("--levels", nargs="+", default=["DEBUG", "INFO", "WARNING"])
+    args = parser.parse_args(argv)
+
+    server = start_server()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    testcase = make_testcase(base_url, args.steps)
+
+    results = {}
+    for level in args.levels:
+        logger.remove()
+        logger.add(lambda message: None, level=level)
+        run(testcase, args.steps)  # warm up
+        results[level] = run(testcase, args.requests)
+
+    logger.remove()
+    logger.add(sys.stderr, level="INFO")
+    for level, rps in results.items():
+        print(f"{level:8} {rps:10.1f} requests/s")
+
+    server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+""" Memory and time of recording requests with pydantic models and slotted records.
+
+A response of JSON content is recorded repeatedly as HttpSession does for each request,
+the recorded data is kept in a list, then traced memory per 100k requests is compared
+between validated pydantic models (SessionData) and runtime records (SessionRecord).
+
+Usage:
+    $ python -m benchmarks.records_bench
+    $ python -m benchmarks.records_bench --requests 20000
+
+"""
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from typing import Callable, List, Text, Tuple
+
+import requests
+
+from httprunner.models import (
+    AddressData,
+    ReqRespData,
+    RequestData,
+    RequestStat,
+    ResponseData,
+    SessionData,
+)
+from httprunner.records import (
+    ReqRespRecord,
+    RequestRecord,
+    ResponseRecord,
+    SessionRecord,
+)
+
+RESPONSE_BODY = {"code": 0, "message": "success", "data": {"id": 1}}
+
+
+def make_response() -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = 200
+    resp.encoding = "utf-8"
+    resp._content = json.dumps(RESPONSE_BODY).encode("utf-8")
+    resp.headers["Content-Type"] = "application/json"
+    resp.request = requests.Request(
+        "POST", "http://127.0.0.1/api/items", json={"name": "item"}
+    ).prepare()
+    return resp
+
+
+def record_with_models(resp: requests.Response) -> SessionData:
+    session_data = SessionData()
+    session_data.req_resps = [
+        ReqRespData(
+            request=RequestData(
+                method=resp.request.method,
+                url=resp.request.url,
+                headers=dict(resp.request.headers),
+                cookies={},
+                body=json.loads(resp.request.body),
+            ),
+            response=ResponseData(
+                status_code=resp.status_code,
+                cookies=resp.cookies or {},
+                encoding=resp.encoding,
+                headers=dict(resp.headers),
+                content_type="application/json",
+                body=resp.json(),
+            ),
+        )
+    ]
+    session_data.stat = RequestStat(content_size=100, response_time_ms=1.5)
+    session_data.address = AddressData(server_ip="127.0.0.1", server_port=80)
+    return session_data
+
+
+def record_with_records(resp: requests.Response) -> SessionRecord:
+    session_record = SessionRecord()
+    session_record.req_resps = [
+        ReqRespRecord(
+            request=RequestRecord(
+                method=resp.request.method,
+                url=resp.request.url,
+                headers=dict(resp.request.headers),
+                cookies={},
+                body=json.loads(resp.request.body),
+            ),
+            response=ResponseRecord(
+                status_code=resp.status_code,
+                cookies=resp.cookies.get_dict(),
+                encoding=resp.encoding,
+                headers=dict(resp.headers),
+                content_type="application/json",
+                body=resp.json(),
+            ),
+        )
+    ]
+    session_record.stat.content_size = 100
+    session_record.stat.response_time_ms = 1.5
+    session_record.address.server_ip = "127.0.0.1"
+    session_record.address.server_port = 80
+    return session_record
+
+
+def measure(recorder: Callable, requests_count: int) -> Tuple[float, float]:
+    """ record requests and keep them in memory, return (seconds, traced bytes)
+    """
+    resp = make_response()
+    gc.collect()
+    tracemalloc.start()
+    start_at = time.perf_counter()
+    records = [recorder(resp) for _ in range(requests_count)]
+    elapsed = time.perf_counter() - start_at
+    traced_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    return elapsed, traced_bytes
+
+
+def main(argv: List[Text] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=100000)
+    args = parser.parse_args(argv)
+
+    scale = 100000 / args.requests
+    for name, recorder in [
+        ("pydantic models", record_with_models),
+        ("slotted records", record_with_records),
+    ]:
+        elapsed, traced_bytes = measure(recorder, args.requests)
+        print(
+            f"{name:16} {traced_bytes * scale / 1024 / 1024:8.1f} MB / 100k requests, "
+            f"{args.requests / elapsed:10.1f} records/s"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
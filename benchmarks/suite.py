@@ -0,0 +1,340 @@
+""" Benchmark suite of HttpRunner hot paths, with JSON results and regression comparison.
+
+Micro benchmarks cover parsing, variables resolution, request template, jmespath
+extraction, validation and recording of request & response, the end-to-end benchmark
+runs testcase against an in-process local HTTP stub server and reports steps per second.
+
+Each benchmark is calibrated to run at least --min-time seconds per round, the median
+of rounds in operations per second (higher is better) is compared between result files.
+
+Usage:
+    $ python -m benchmarks.suite run -o baseline.json
+    $ python -m benchmarks.suite run --filter parser --rounds 3
+    $ python -m benchmarks.suite compare baseline.json current.json --threshold 0.1
+
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple, Text
+
+from loguru import logger
+
+from httprunner import HttpRunner, __version__
+from httprunner.client import get_req_resp_record
+from httprunner.models import TRequest
+from httprunner.parser import parse_data, parse_request, parse_variables_mapping
+from httprunner.response import ResponseObject
+from httprunner.utils import VariablesScope
+
+from benchmarks.logging_bench import make_testcase, start_server
+from benchmarks.records_bench import make_response
+
+# bump if fields of results are changed incompatibly
+RESULTS_FORMAT_VERSION = 1
+
+
+class Benchmark(NamedTuple):
+    name: Text
+    # operation to measure, returns number of operations done, e.g. teststeps run
+    func: Callable[[], int]
+    unit: Text = "ops"
+
+
+def make_micro_benchmarks() -> List[Benchmark]:
+    functions = {"sum_two": lambda a, b: a + b}
+    variables = {
+        "host": "127.0.0.1",
+        "user": "alice",
+        "token": "abc",
+        "page": 2,
+        "size": 20,
+    }
+    raw_data = {
+        "url": "http://$host/api/users/${user}/items",
+        "params": {"page": "$page", "size": "$size", "total": "${sum_two($page, 1)}"},
+        "headers": {"Authorization": "Bearer $token", "Accept": "application/json"},
+        "json": {"name": "$user", "tags": ["a", "b", "c"], "static": {"x": 1}},
+    }
+    request = TRequest(
+        method="POST",
+        url=raw_data["url"],
+        params=raw_data["params"],
+        headers=raw_data["headers"],
+        json=raw_data["json"],
+    )
+
+    config_variables = {
+        f"config_{index}": {"values": list(range(20))} for index in range(200)
+    }
+    config_variables.update(variables)
+    step_variables = {
+        "item_url": "/items/$user",
+        "auth": "Bearer $token",
+        "next_page": "${sum_two($page, 1)}",
+    }
+
+    resp = make_response()
+    resp.json()
+    extractors = {
+        "code": "body.code",
+        "item_id": "body.data.id",
+        "status": "status_code",
+    }
+    validators = [
+        {"eq": ["status_code", 200]},
+        {"eq": ["body.code", 0]},
+        {"eq": ["body.message", "success"]},
+        {"contains": ["body.message", "succ"]},
+        {"eq": ["body.data.id", "$item_id"]},
+    ]
+
+    def run_parse_data() -> int:
+        parse_data(raw_data, variables, functions)
+        return 1
+
+    def run_parse_request() -> int:
+        parse_request(request, variables, functions)
+        return 1
+
+    def run_parse_variables_mapping() -> int:
+        base_variables = VariablesScope({}, config_variables)
+        parse_variables_mapping(step_variables, functions, base_variables)
+        return 1
+
+    def run_extract() -> int:
+        ResponseObject(resp).extract(extractors)
+        return 1
+
+    def run_validate() -> int:
+        ResponseObject(resp).validate(validators, {"item_id": 1}, functions)
+        return 1
+
+    def run_record() -> int:
+        get_req_resp_record(resp)
+        return 1
+
+    return [
+        Benchmark("parser.parse_data", run_parse_data),
+        Benchmark("parser.parse_request", run_parse_request),
+        Benchmark("parser.parse_variables_mapping", run_parse_variables_mapping),
+        Benchmark("response.extract", run_extract),
+        Benchmark("response.validate", run_validate),
+        Benchmark("client.get_req_resp_record", run_record),
+    ]
+
+
+def make_e2e_benchmarks(base_url: Text, steps_count: int = 10) -> List[Benchmark]:
+    testcase = make_testcase(base_url, steps_count)
+
+    def run_testcase() -> int:
+        HttpRunner().with_variables({}).run_testcase(testcase)
+        return steps_count
+
+    return [Benchmark("runner.run_testcase", run_testcase, unit="steps")]
+
+
+def measure(benchmark: Benchmark, rounds: int, min_time: float) -> Dict:
+    """ calibrate calls per round to run at least min_time seconds,
+        then measure operations per second of each round.
+    """
+    calls = 1
+    while True:
+        start_at = time.perf_counter()
+        for _ in range(calls):
+            benchmark.func()
+        elapsed = time.perf_counter() - start_at
+        if elapsed >= min_time:
+            break
+        calls *= 2 if elapsed <= 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+    ops_per_sec = []
+    for _ in range(rounds):
+        ops = 0
+        start_at = time.perf_counter()
+        for _ in range(calls):
+            ops += benchmark.func()
+        ops_per_sec.append(ops / (time.perf_counter() - start_at))
+
+    return {
+        "unit": f"{benchmark.unit}/s",
+        "median": statistics.median(ops_per_sec),
+        "mean": statistics.mean(ops_per_sec),
+        "min": min(ops_per_sec),
+        "max": max(ops_per_sec),
+        "stdev": statistics.stdev(ops_per_sec) if rounds > 1 else 0,
+        "rounds": rounds,
+        "calls_per_round": calls,
+    }
+
+
+def run_benchmarks(args) -> int:
+    # benchmark hot paths without formatting log messages
+    logger.remove()
+    logger.add(lambda message: None, level="WARNING")
+
+    server = start_server()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    benchmarks = make_micro_benchmarks() + make_e2e_benchmarks(base_url, args.steps)
+    if args.filter:
+        benchmarks = [
+            benchmark
+            for benchmark in benchmarks
+            if any(keyword in benchmark.name for keyword in args.filter)
+        ]
+
+    results = {}
+    for benchmark in benchmarks:
+        results[benchmark.name] = measure(benchmark, args.rounds, args.min_time)
+        print(
+            f"{benchmark.name:32} {results[benchmark.name]['median']:12.1f} "
+            f"{results[benchmark.name]['unit']}",
+            file=sys.stderr,
+        )
+
+    server.shutdown()
+    server.server_close()
+
+    output = {
+        "format_version": RESULTS_FORMAT_VERSION,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "machine": {
+            "httprunner": __version__,
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+        },
+        "options": {"rounds": args.rounds, "min_time": args.min_time},
+        "benchmarks": results,
+    }
+    content = json.dumps(output, indent=4, sort_keys=True)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(content)
+        print(f"results saved to {args.output}", file=sys.stderr)
+    else:
+        print(content)
+
+    return 0
+
+
+def load_results(path: Text) -> Dict:
+    with open(path, encoding="utf-8") as f:
+        results = json.load(f)
+
+    format_version = results.get("format_version")
+    if format_version != RESULTS_FORMAT_VERSION:
+        raise ValueError(
+            f"unsupported results format version {format_version} of {path}, "
+            f"expected {RESULTS_FORMAT_VERSION}"
+        )
+    return results["benchmarks"]
+
+
+def compare_results(baseline: Dict, current: Dict, threshold: float) -> List[Dict]:
+    """ compare median of benchmarks, change is relative to baseline,
+        regression if operations per second decrease more than threshold.
+    """
+    rows = []
+    for name in sorted(set(baseline) | set(current)):
+        if name not in current:
+            rows.append({"name": name, "status": "removed"})
+            continue
+        if name not in baseline:
+            rows.append({"name": name, "status": "added"})
+            continue
+
+        change = current[name]["median"] / baseline[name]["median"] - 1
+        if change < -threshold:
+            status = "regression"
+        elif change > threshold:
+            status = "improvement"
+        else:
+            status = "ok"
+        rows.append(
+            {
+                "name": name,
+                "status": status,
+                "baseline": baseline[name]["median"],
+                "current": current[name]["median"],
+                "change": change,
+            }
+        )
+
+    return rows
+
+
+def compare_benchmarks(args) -> int:
+    try:
+        baseline = load_results(args.baseline)
+        current = load_results(args.current)
+    except (OSError, ValueError, KeyError) as ex:
+        print(f"failed to load results: {ex}", file=sys.stderr)
+        return 2
+
+    rows = compare_results(baseline, current, args.threshold)
+    for row in rows:
+        if "change" in row:
+            print(
+                f"{row['name']:32} {row['baseline']:12.1f} -> {row['current']:12.1f} "
+                f"{row['change']:+8.1%}  {row['status']}"
+            )
+        else:
+            print(f"{row['name']:32} {row['status']}")
+
+    regressions = [row["name"] for row in rows if row["status"] == "regression"]
+    if regressions:
+        print(
+            f"{len(regressions)} regression(s) beyond {args.threshold:.0%}: "
+            f"{', '.join(regressions)}"
+        )
+        return 1
+
+    return 0
+
+
+def main(argv: List[Text] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command")
+
+    parser_run = subparsers.add_parser("run", help="run benchmarks")
+    parser_run.add_argument("-o", "--output", help="save JSON results to file")
+    parser_run.add_argument(
+        "--filter", nargs="+", help="run benchmarks with name containing keywords"
+    )
+    parser_run.add_argument("--rounds", type=int, default=5)
+    parser_run.add_argument(
+        "--min-time", type=float, default=0.2, help="min seconds of each round"
+    )
+    parser_run.add_argument(
+        "--steps", type=int, default=10, help="teststeps of end-to-end testcase"
+    )
+
+    parser_compare = subparsers.add_parser(
+        "compare", help="compare two results, exit 1 if regression found"
+    )
+    parser_compare.add_argument("baseline", help="baseline results file")
+    parser_compare.add_argument("current", help="current results file")
+    parser_compare.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="max relative decrease of operations per second, default to 0.1",
+    )
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        return run_benchmarks(args)
+    elif args.command == "compare":
+        return compare_benchmarks(args)
+
+    parser.print_help()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
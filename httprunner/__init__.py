@@ -1,11 +1,12 @@
 __version__ = "3.1.6"
 __description__ = "One-stop solution for HTTP(S) testing."
 
+import importlib
+import sys
+
 # import firstly for monkey patch if needed
-from httprunner.ext.locust import main_locusts
-from httprunner.parser import parse_parameters as Parameters
-from httprunner.runner import HttpRunner
-from httprunner.testcase import Config, Step, RunRequest, RunTestCase
+if "locust" in sys.argv[0]:
+    from httprunner.ext.locust import main_locusts
 
 """
 若定义了__all__属性，则只有__all__内指定的属性、方法、类可被导入.
@@ -21,3 +22,46 @@ __all__ = [
     "RunTestCase",
     "Parameters",
 ]
+
+""" 延迟导入: 属性被首次访问时才导入对应模块, 避免 hrun -V 等命令加载 requests/pydantic 等依赖
+    attribute name => (module name, attribute name in module)
+"""
+_LAZY_ATTRIBUTES = {
+    "HttpRunner": ("httprunner.runner", "HttpRunner"),
+    "Config": ("httprunner.testcase", "Config"),
+    "Step": ("httprunner.testcase", "Step"),
+    "RunRequest": ("httprunner.testcase", "RunRequest"),
+    "RunTestCase": ("httprunner.testcase", "RunTestCase"),
+    "Parameters": ("httprunner.parser", "parse_parameters"),
+    "main_locusts": ("httprunner.ext.locust", "main_locusts"),
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    module_name, attr_name = _LAZY_ATTRIBUTES[name]
+    value = getattr(importlib.import_module(module_name), attr_name)
+    # cache in module globals, __getattr__ will not be called again
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals().keys()) | set(_LAZY_ATTRIBUTES.keys()))
+
+
+if sys.version_info < (3, 7):
+    # module __getattr__ (PEP 562) is not supported, resolve lazy attributes
+    # with __getattr__ of module class instead
+    import types
+
+    class _LazyModule(types.ModuleType):
+        def __getattr__(self, name):
+            return __getattr__(name)
+
+        def __dir__(self):
+            return __dir__()
+
+    sys.modules[__name__].__class__ = _LazyModule
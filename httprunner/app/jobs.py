@@ -0,0 +1,533 @@
+# debug 服务的后台任务: 在有界线程池中执行 testcase, 避免同步请求阻塞 uvicorn 事件循环
+import hashlib
+import os
+import threading
+import time
+import types
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+from datetime import datetime
+from enum import Enum
+from typing import Dict, List, Set, Text, Callable
+
+from loguru import logger
+from requests.adapters import HTTPAdapter
+
+from httprunner.client import HttpSession
+from httprunner.exceptions import MyBaseFailure
+from httprunner.models import (
+    ProjectMeta,
+    TestCase,
+    StepData,
+    TestCaseSummary,
+    TestCaseTime,
+    TestSuiteSummary,
+    Stat,
+    PlatformInfo,
+)
+from httprunner.runner import HttpRunner
+from httprunner.utils import get_platform
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+class JobStatus(Text, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCESS = "success"
+    FAIL = "fail"
+    ERROR = "error"
+    CANCELLED = "cancelled"
+
+
+class DebugJobCancelled(Exception):
+    pass
+
+
+class DebugJobQueueFull(Exception):
+    pass
+
+
+class DebugtalkCache(object):
+    """ LRU cache of compiled debugtalk.py functions, keyed by sha256 of source content.
+        the same source is only exec-ed once, so module level side effects run once as well.
+
+    Args:
+        max_entries: max count of cached debugtalk.py
+        max_bytes: max total size of cached debugtalk.py source
+        memory_threshold: evict half of entries when system memory usage percent exceeds it,
+            only works when psutil is installed
+
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 128,
+        max_bytes: int = 16 * 1024 * 1024,
+        memory_threshold: float = 90.0,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.memory_threshold = memory_threshold
+        self.__entries: Dict[Text, Dict] = OrderedDict()
+        self.__sizes: Dict[Text, int] = {}
+        self.__bytes = 0
+        self.__lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.compile_count = 0
+        self.compile_time = 0.0
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def get_functions(self, debugtalk_py: Text) -> Dict[Text, Callable]:
+        key = hashlib.sha256(debugtalk_py.encode("utf-8")).hexdigest()
+        with self.__lock:
+            if key in self.__entries:
+                self.hits += 1
+                self.__entries.move_to_end(key)
+                return self.__entries[key]
+
+            self.misses += 1
+
+        # compile outside the lock, concurrent misses of the same source are harmless
+        start_at = time.perf_counter()
+        namespace = {}
+        exec(compile(debugtalk_py, "debugtalk.py", "exec"), namespace)
+        functions = {
+            name: item
+            for name, item in namespace.items()
+            if isinstance(item, types.FunctionType)
+        }
+        compile_time = time.perf_counter() - start_at
+
+        with self.__lock:
+            self.compile_count += 1
+            self.compile_time += compile_time
+            if key not in self.__entries:
+                self.__entries[key] = functions
+                self.__sizes[key] = len(debugtalk_py)
+                self.__bytes += len(debugtalk_py)
+            self.__evict()
+            return self.__entries.get(key, functions)
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+            self.__sizes.clear()
+            self.__bytes = 0
+
+    def __memory_tight(self) -> bool:
+        if psutil is None:
+            return False
+
+        try:
+            return psutil.virtual_memory().percent > self.memory_threshold
+        except Exception:
+            return False
+
+    def __evict(self):
+        max_entries = self.max_entries
+        if self.__memory_tight():
+            max_entries = min(max_entries, len(self.__entries) // 2)
+
+        while self.__entries and (
+            len(self.__entries) > max_entries or self.__bytes > self.max_bytes
+        ):
+            key, _ = self.__entries.popitem(last=False)
+            self.__bytes -= self.__sizes.pop(key)
+            self.evictions += 1
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.__entries),
+            "bytes": self.__bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "compile_count": self.compile_count,
+            "compile_time_total": self.compile_time,
+            "compile_time_avg": (
+                self.compile_time / self.compile_count if self.compile_count else 0.0
+            ),
+        }
+
+
+debugtalk_cache = DebugtalkCache(
+    max_entries=int(os.getenv("HRUN_DEBUGTALK_CACHE_SIZE", 128))
+)
+
+
+def load_debugtalk_py(project_meta: ProjectMeta) -> ProjectMeta:
+    """ load functions of debugtalk.py content uploaded with project meta,
+        compiled functions are shared among requests with the same debugtalk.py content
+    """
+    if not project_meta.debugtalk_py:
+        return project_meta
+
+    project_meta.functions.update(
+        debugtalk_cache.get_functions(project_meta.debugtalk_py)
+    )
+    return project_meta
+
+
+def run_debug_testcase(
+    project_meta: ProjectMeta,
+    testcase: TestCase,
+    step_callback: Callable[[StepData], None] = None,
+    session: HttpSession = None,
+) -> TestCaseSummary:
+    """ run testcase with a new HttpRunner, each debug run owns its runner and session
+    """
+    runner = (
+        HttpRunner()
+        .with_project_meta(project_meta)
+        .with_session(session or HttpSession())
+        .with_variables({})
+        .with_step_callback(step_callback)
+    )
+    try:
+        runner.run_testcase(testcase)
+    except MyBaseFailure as ex:
+        # validation failure is reported with summary
+        logger.error(f"debug testcase failed: {ex}")
+
+    return runner.get_summary()
+
+
+class DebugBatch(object):
+    """ run testcases of batch request on the bounded thread pool shared with debug jobs,
+        at most parallelism testcases of the batch run at the same time. next testcase is
+        submitted when a former one finished, thus no worker thread waits for others.
+        debugtalk.py is loaded only once, and connection pool is shared among sessions.
+    """
+
+    def __init__(
+        self,
+        executor: ThreadPoolExecutor,
+        project_meta: ProjectMeta,
+        testcases: List[TestCase],
+        parallelism: int = 4,
+        testcase_callback: Callable[[TestCaseSummary], None] = None,
+    ):
+        self.executor = executor
+        self.project_meta = project_meta
+        self.testcases = testcases
+        self.parallelism = max(1, parallelism)
+        self.testcase_callback = testcase_callback
+        self.summaries: List[TestCaseSummary] = [None] * len(testcases)
+        self.future: Future = Future()
+        self.start_at = 0.0
+        self.__next_index = 0
+        self.__running_count = 0
+        self.__finished_count = 0
+        self.__debugtalk_loaded = False
+        self.__lock = threading.Lock()
+        self.__adapter = HTTPAdapter(
+            pool_connections=self.parallelism, pool_maxsize=self.parallelism
+        )
+
+    @property
+    def running_count(self) -> int:
+        return self.__running_count
+
+    @property
+    def unfinished_count(self) -> int:
+        """ count of testcases queued or running, 0 once the batch is done
+        """
+        if self.future.done():
+            return 0
+        return len(self.testcases) - self.__finished_count
+
+    def start(self) -> Future:
+        self.start_at = time.time()
+        if not self.testcases:
+            self.__finish()
+            return self.future
+
+        for _ in range(min(self.parallelism, len(self.testcases))):
+            self.__submit_next()
+
+        return self.future
+
+    def __submit_next(self):
+        with self.__lock:
+            if self.future.done() or self.__next_index >= len(self.testcases):
+                return
+            index = self.__next_index
+            self.__next_index += 1
+
+        try:
+            self.executor.submit(self.__run_testcase, index)
+        except RuntimeError as ex:
+            # executor has been shut down
+            self.__fail(ex)
+
+    def __load_debugtalk_py(self):
+        with self.__lock:
+            if self.__debugtalk_loaded:
+                return
+            load_debugtalk_py(self.project_meta)
+            self.__debugtalk_loaded = True
+
+    def __run_testcase(self, index: int):
+        testcase = self.testcases[index]
+        with self.__lock:
+            self.__running_count += 1
+
+        try:
+            self.__load_debugtalk_py()
+            session = HttpSession()
+            session.mount("http://", self.__adapter)
+            session.mount("https://", self.__adapter)
+            summary = run_debug_testcase(self.project_meta, testcase, session=session)
+        except Exception as ex:
+            logger.error(
+                f"debug testcase {testcase.config.name} error: {type(ex).__name__}: {ex}"
+            )
+            summary = TestCaseSummary(
+                name=testcase.config.name,
+                success=False,
+                case_id="",
+                time=TestCaseTime(),
+            )
+
+        self.summaries[index] = summary
+        try:
+            if self.testcase_callback:
+                self.testcase_callback(summary)
+        except Exception as ex:
+            with self.__lock:
+                self.__running_count -= 1
+            self.__fail(ex)
+            return
+
+        with self.__lock:
+            self.__running_count -= 1
+            self.__finished_count += 1
+            all_finished = self.__finished_count == len(self.testcases)
+
+        if all_finished:
+            self.__finish()
+        else:
+            self.__submit_next()
+
+    def __fail(self, ex: Exception):
+        with self.__lock:
+            if self.future.done():
+                return
+            self.future.set_exception(ex)
+        self.__adapter.close()
+
+    def __finish(self):
+        self.__adapter.close()
+        success_count = len([summary for summary in self.summaries if summary.success])
+        self.future.set_result(
+            TestSuiteSummary(
+                success=success_count == len(self.summaries),
+                stat=Stat(
+                    total=len(self.summaries),
+                    success=success_count,
+                    fail=len(self.summaries) - success_count,
+                ),
+                time=TestCaseTime(
+                    start_at=self.start_at,
+                    start_at_iso_format=datetime.utcfromtimestamp(
+                        self.start_at
+                    ).isoformat(),
+                    duration=time.time() - self.start_at,
+                ),
+                platform=PlatformInfo(**get_platform()),
+                testcases=self.summaries,
+            )
+        )
+
+
+class DebugJob(object):
+    def __init__(self, project_meta: ProjectMeta, testcase: TestCase):
+        self.job_id = uuid.uuid4().hex
+        self.project_meta = project_meta
+        self.testcase = testcase
+        self.status = JobStatus.PENDING
+        self.step_datas: List[Dict] = []
+        self.summary: TestCaseSummary = None
+        self.error: Text = ""
+        self.created_at = time.time()
+        self.started_at: float = 0
+        self.finished_at: float = 0
+        self.future: Future = None
+        self.cancel_event = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        return self.status not in [JobStatus.PENDING, JobStatus.RUNNING]
+
+    def on_step_finished(self, step_data: StepData):
+        self.step_datas.append(step_data.dict())
+        if self.cancel_event.is_set():
+            raise DebugJobCancelled(f"job cancelled: {self.job_id}")
+
+    def run(self) -> TestCaseSummary:
+        if self.cancel_event.is_set():
+            self.status = JobStatus.CANCELLED
+            return None
+
+        self.status = JobStatus.RUNNING
+        self.started_at = time.time()
+        try:
+            load_debugtalk_py(self.project_meta)
+            self.summary = run_debug_testcase(
+                self.project_meta, self.testcase, self.on_step_finished
+            )
+            self.status = JobStatus.SUCCESS if self.summary.success else JobStatus.FAIL
+        except DebugJobCancelled:
+            self.status = JobStatus.CANCELLED
+        except Exception as ex:
+            self.status = JobStatus.ERROR
+            self.error = f"{type(ex).__name__}: {ex}"
+            logger.error(f"debug job {self.job_id} error: {self.error}")
+        finally:
+            self.finished_at = time.time()
+
+        return self.summary
+
+    def info(self, with_details: bool = True) -> Dict:
+        info = {
+            "job_id": self.job_id,
+            "status": self.status.value,
+            "name": self.testcase.config.name,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "steps_finished": len(self.step_datas),
+            "error": self.error,
+        }
+        if with_details:
+            info["step_datas"] = self.step_datas
+            info["summary"] = self.summary.dict() if self.summary else None
+
+        return info
+
+
+class DebugJobManager(object):
+    """ dispatch debug jobs to a bounded thread pool
+
+    Args:
+        max_workers: max testcases running at the same time
+        max_pending: max jobs waiting in queue, new job will be rejected if exceeded,
+            queued and running testcases of batches are counted as well
+        max_finished: max finished jobs kept for querying, oldest ones are dropped first
+
+    """
+
+    def __init__(
+        self, max_workers: int = 8, max_pending: int = 1000, max_finished: int = 1000
+    ):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.max_finished = max_finished
+        self.__executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="hrun-debug"
+        )
+        self.__jobs: Dict[Text, DebugJob] = OrderedDict()
+        self.__batches: Set[DebugBatch] = set()
+        self.__lock = threading.Lock()
+
+    def __pending_count(self) -> int:
+        return self.count(JobStatus.PENDING) + sum(
+            batch.unfinished_count for batch in list(self.__batches)
+        )
+
+    def submit(self, project_meta: ProjectMeta, testcase: TestCase) -> DebugJob:
+        job = DebugJob(project_meta, testcase)
+        with self.__lock:
+            if self.__pending_count() >= self.max_pending:
+                raise DebugJobQueueFull(
+                    f"too many pending debug jobs, max_pending: {self.max_pending}"
+                )
+
+            self.__jobs[job.job_id] = job
+            self.__drop_finished_jobs()
+
+        job.future = self.__executor.submit(job.run)
+        return job
+
+    def submit_batch(
+        self,
+        project_meta: ProjectMeta,
+        testcases: List[TestCase],
+        parallelism: int = 4,
+        testcase_callback: Callable[[TestCaseSummary], None] = None,
+    ) -> Future:
+        """ run testcases of batch request on the bounded thread pool,
+            the returned future is resolved with testsuite summary
+        """
+        batch = DebugBatch(
+            self.__executor, project_meta, testcases, parallelism, testcase_callback
+        )
+        with self.__lock:
+            if self.__pending_count() + len(testcases) > self.max_pending:
+                raise DebugJobQueueFull(
+                    f"too many pending debug testcases, max_pending: {self.max_pending}"
+                )
+
+            self.__batches.add(batch)
+
+        future = batch.start()
+        future.add_done_callback(lambda _: self.__drop_batch(batch))
+        return future
+
+    def __drop_batch(self, batch: DebugBatch):
+        with self.__lock:
+            self.__batches.discard(batch)
+
+    def get(self, job_id: Text) -> DebugJob:
+        return self.__jobs.get(job_id)
+
+    def cancel(self, job_id: Text) -> bool:
+        job = self.get(job_id)
+        if not job or job.done:
+            return False
+
+        job.cancel_event.set()
+        if job.future and job.future.cancel():
+            # job has not been started yet
+            job.status = JobStatus.CANCELLED
+            job.finished_at = time.time()
+
+        return True
+
+    def count(self, status: JobStatus) -> int:
+        return len([job for job in list(self.__jobs.values()) if job.status == status])
+
+    def stats(self) -> Dict:
+        batches = list(self.__batches)
+        batch_running = sum(batch.running_count for batch in batches)
+        batch_unfinished = sum(batch.unfinished_count for batch in batches)
+        return {
+            "max_workers": self.max_workers,
+            "queue_depth": self.count(JobStatus.PENDING)
+            + max(0, batch_unfinished - batch_running),
+            "running": self.count(JobStatus.RUNNING) + batch_running,
+            "total": len(self.__jobs),
+            "batches": len(batches),
+        }
+
+    def __drop_finished_jobs(self):
+        finished_jobs = [job_id for job_id, job in self.__jobs.items() if job.done]
+        for job_id in finished_jobs[: max(0, len(finished_jobs) - self.max_finished)]:
+            self.__jobs.pop(job_id)
+
+
+job_manager = DebugJobManager(max_workers=int(os.getenv("HRUN_DEBUG_WORKERS", 8)))
@@ -1,27 +1,52 @@
+import asyncio
+import concurrent.futures
+import json
+
 from fastapi import APIRouter
+from starlette.responses import StreamingResponse
 
-from httprunner.runner import HttpRunner
-from httprunner.models import ProjectMeta, TestCase
+from httprunner.app.jobs import (
+    job_manager,
+    debugtalk_cache,
+    DebugJobQueueFull,
+)
+from httprunner.models import ProjectMeta, TestCase, TestsMapping
+from httprunner.utils import ExtendJSONEncoder
 
 router = APIRouter()
-runner = HttpRunner()
+
+# upper limit of testcases running concurrently in one batch request
+MAX_BATCH_PARALLELISM = 64
 
 
 @router.post("/hrun/debug/testcase", tags=["debug"])
 async def debug_single_testcase(project_meta: ProjectMeta, testcase: TestCase):
     resp = {"code": 0, "message": "success", "result": {}}
 
-    if project_meta.debugtalk_py:
-        origin_local_keys = list(locals().keys()).copy()
-        exec(project_meta.debugtalk_py, {}, locals())
-        new_local_keys = list(locals().keys()).copy()
-        new_added_keys = set(new_local_keys) - set(origin_local_keys)
-        new_added_keys.remove("origin_local_keys")
-        for func_name in new_added_keys:
-            project_meta.functions[func_name] = locals()[func_name]
+    try:
+        job = job_manager.submit(project_meta, testcase)
+    except DebugJobQueueFull as ex:
+        resp["code"] = 1
+        resp["message"] = str(ex)
+        return resp
+
+    # run in worker thread, do not block event loop
+    try:
+        summary = await asyncio.wrap_future(job.future)
+    except (asyncio.CancelledError, concurrent.futures.CancelledError):
+        if not job.future.cancelled():
+            # request itself is cancelled
+            raise
 
-    runner.with_project_meta(project_meta).run_testcase(testcase)
-    summary = runner.get_summary()
+        # job cancelled before started
+        resp["code"] = 1
+        resp["message"] = "cancelled"
+        return resp
+
+    if not summary:
+        resp["code"] = 1
+        resp["message"] = job.error or job.status.value
+        return resp
 
     if not summary.success:
         resp["code"] = 1
@@ -31,6 +56,163 @@ async def debug_single_testcase(project_meta: ProjectMeta, testcase: TestCase):
     return resp
 
 
+@router.post("/hrun/debug/jobs", tags=["debug"])
+async def submit_debug_job(project_meta: ProjectMeta, testcase: TestCase):
+    resp = {"code": 0, "message": "success", "result": {}}
+
+    try:
+        job = job_manager.submit(project_meta, testcase)
+    except DebugJobQueueFull as ex:
+        resp["code"] = 1
+        resp["message"] = str(ex)
+        return resp
+
+    resp["result"] = job.info(with_details=False)
+    return resp
+
+
+@router.get("/hrun/debug/jobs", tags=["debug"])
+async def get_debug_jobs_stats():
+    return {"code": 0, "message": "success", "result": job_manager.stats()}
+
+
+@router.get("/hrun/debug/metrics", tags=["debug"])
+async def get_debug_metrics():
+    return {
+        "code": 0,
+        "message": "success",
+        "result": {
+            "jobs": job_manager.stats(),
+            "debugtalk_cache": debugtalk_cache.stats(),
+        },
+    }
+
+
+@router.get("/hrun/debug/jobs/{job_id}", tags=["debug"])
+async def get_debug_job(job_id: str):
+    job = job_manager.get(job_id)
+    if not job:
+        return {"code": 1, "message": f"job not found: {job_id}", "result": {}}
+
+    return {"code": 0, "message": "success", "result": job.info()}
+
+
+@router.delete("/hrun/debug/jobs/{job_id}", tags=["debug"])
+async def cancel_debug_job(job_id: str):
+    if not job_manager.cancel(job_id):
+        return {"code": 1, "message": f"job not found or finished: {job_id}"}
+
+    return {"code": 0, "message": "success"}
+
+
+@router.get("/hrun/debug/jobs/{job_id}/events", tags=["debug"])
+async def stream_debug_job_events(job_id: str):
+    """ stream step results with server-sent events as soon as each step finished
+    """
+    job = job_manager.get(job_id)
+    if not job:
+        return {"code": 1, "message": f"job not found: {job_id}", "result": {}}
+
+    def dump_event(event: str, data) -> str:
+        data = json.dumps(data, ensure_ascii=False, cls=ExtendJSONEncoder)
+        return f"event: {event}\ndata: {data}\n\n"
+
+    async def iter_events():
+        sent_count = 0
+        while True:
+            done = job.done
+            step_datas = job.step_datas[sent_count:]
+            for step_data in step_datas:
+                yield dump_event("step", step_data)
+            sent_count += len(step_datas)
+
+            if done:
+                break
+
+            await asyncio.sleep(0.1)
+
+        yield dump_event("done", job.info(with_details=False))
+
+    return StreamingResponse(iter_events(), media_type="text/event-stream")
+
+
+@router.post("/hrun/debug/testcases", tags=["debug"])
+async def debug_multiple_testcases(
+    tests_mapping: TestsMapping, parallelism: int = 4, stream: bool = False
+):
+    """ run many testcases of one project in one request
+
+    Args:
+        tests_mapping: project meta and testcases list
+        parallelism: count of testcases running concurrently
+        stream: if True, response each testcase summary as one line of JSON once it finished,
+            and the testsuite summary without testcases details as the last line
+
+    """
+    parallelism = min(max(1, parallelism), MAX_BATCH_PARALLELISM)
+
+    if not stream:
+        resp = {"code": 0, "message": "success", "result": {}}
+        try:
+            # run in bounded worker pool, do not block event loop
+            summary = await asyncio.wrap_future(
+                job_manager.submit_batch(
+                    tests_mapping.project_meta, tests_mapping.testcases, parallelism
+                )
+            )
+        except Exception as ex:
+            resp["code"] = 1
+            resp["message"] = f"{type(ex).__name__}: {ex}"
+            return resp
+
+        if not summary.success:
+            resp["code"] = 1
+            resp["message"] = "fail"
+
+        resp["result"] = summary.dict()
+        return resp
+
+    finished_summaries = []
+    try:
+        future = job_manager.submit_batch(
+            tests_mapping.project_meta,
+            tests_mapping.testcases,
+            parallelism,
+            finished_summaries.append,
+        )
+    except DebugJobQueueFull as ex:
+        return {"code": 1, "message": str(ex), "result": {}}
+
+    def dump_line(line: dict) -> str:
+        return json.dumps(line, ensure_ascii=False, cls=ExtendJSONEncoder) + "\n"
+
+    async def iter_lines():
+        sent_count = 0
+        while True:
+            done = future.done()
+            summaries = finished_summaries[sent_count:]
+            for summary in summaries:
+                yield dump_line({"type": "testcase", "result": summary.dict()})
+            sent_count += len(summaries)
+
+            if done:
+                break
+
+            await asyncio.sleep(0.1)
+
+        try:
+            suite_summary = future.result().dict(exclude={"testcases"})
+        except Exception as ex:
+            # response has been started, report error with the last line
+            error = f"{type(ex).__name__}: {ex}"
+            yield dump_line({"type": "error", "success": False, "error": error})
+            return
+
+        yield dump_line({"type": "summary", "result": suite_summary})
+
+    return StreamingResponse(iter_lines(), media_type="application/x-ndjson")
+
+
 # @router.post("/hrun/debug/api", tags=["debug"])
 # async def debug_single_api():
 #     resp = {
@@ -44,11 +226,3 @@ async def debug_single_testcase(project_meta: ProjectMeta, testcase: TestCase):
 #     # summary = runner.run_tests(tests_mapping)
 #
 #     return resp
-#
-#
-# @router.post("/hrun/debug/testcases", tags=["debug"])
-# async def debug_multiple_testcases(project_meta: ProjectMeta, testcases: TestCases):
-#     tests_mapping = {
-#         "project_meta": project_meta,
-#         "testcases": testcases
-#     }
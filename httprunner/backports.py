@@ -0,0 +1,115 @@
+# python 3.6 兼容: 提供 python 3.7+ 标准库特性的替代实现, 运行时模块统一从这里导入
+"""
+contextvars 在 python 3.6 中不存在, 此时以 threading.local 实现的 LocalContextVar 与 copy_local_context 代替:
+每个线程持有独立的变量映射, copy_context().run() 在目标线程中临时替换为复制的映射,
+满足按线程隔离以及在线程池中继承提交方上下文的用法, 但不支持 asyncio task 之间的隔离。
+
+http.server.ThreadingHTTPServer 在 python 3.6 中不存在, 以 ThreadingMixIn 与 HTTPServer 组合代替。
+
+contextlib.nullcontext 在 python 3.6 中不存在, 以等价的空上下文管理器代替。
+
+"""
+import socketserver
+import threading
+from http.server import HTTPServer
+from typing import Any, Callable, Dict
+
+_MISSING = object()
+_local = threading.local()
+
+
+def _get_local_values() -> Dict:
+    values = getattr(_local, "values", None)
+    if values is None:
+        values = _local.values = {}
+    return values
+
+
+class LocalToken(object):
+    __slots__ = ("var", "old_value")
+
+    def __init__(self, var: "LocalContextVar", old_value: Any):
+        self.var = var
+        self.old_value = old_value
+
+
+class LocalContextVar(object):
+    """ contextvars.ContextVar implemented with threading.local
+    """
+
+    def __init__(self, name: str, default: Any = _MISSING):
+        self.name = name
+        self.default = default
+
+    def get(self, default: Any = _MISSING) -> Any:
+        value = _get_local_values().get(self, _MISSING)
+        if value is not _MISSING:
+            return value
+        if default is not _MISSING:
+            return default
+        if self.default is not _MISSING:
+            return self.default
+        raise LookupError(self)
+
+    def set(self, value: Any) -> LocalToken:
+        values = _get_local_values()
+        token = LocalToken(self, values.get(self, _MISSING))
+        values[self] = value
+        return token
+
+    def reset(self, token: LocalToken):
+        values = _get_local_values()
+        if token.old_value is _MISSING:
+            values.pop(self, None)
+        else:
+            values[self] = token.old_value
+
+
+class LocalContext(dict):
+    def run(self, func: Callable, *args, **kwargs) -> Any:
+        """ run func with copied variables in current thread, restored after return
+        """
+        saved_values = _get_local_values()
+        _local.values = dict(self)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _local.values = saved_values
+
+
+def copy_local_context() -> LocalContext:
+    return LocalContext(_get_local_values())
+
+
+try:
+    from contextvars import ContextVar, copy_context
+except ImportError:
+    # python 3.6
+    ContextVar = LocalContextVar
+    copy_context = copy_local_context
+
+
+try:
+    from http.server import ThreadingHTTPServer
+except ImportError:
+    # python 3.6
+    class ThreadingHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+        daemon_threads = True
+
+
+try:
+    from contextlib import nullcontext
+except ImportError:
+    # python 3.6
+    class nullcontext(object):
+        """ context manager does nothing, returns enter_result from __enter__
+        """
+
+        def __init__(self, enter_result: Any = None):
+            self.enter_result = enter_result
+
+        def __enter__(self) -> Any:
+            return self.enter_result
+
+        def __exit__(self, *excinfo):
+            pass
@@ -0,0 +1,231 @@
+# teststep 结果缓存: 标记了 cache 的 teststep 对相同输入变量只执行一次, 之后复用导出/提取的变量
+"""
+常用于登录等被大量 testcase 引用的前置步骤:
+
+    teststeps:
+    -   name: login
+        testcase: testcases/login.yml
+        cache:
+            scope: session
+            ttl: 600
+        export:
+        - token
+
+缓存范围:
+    session: pytest-xdist 同一次运行的所有 worker 共享, 通过文件锁保证只有一个 worker 执行
+    worker: 当前进程内共享
+    module: 同一个 testcase 文件内共享
+
+同一个缓存 key 同时只有一个线程/进程执行 teststep, 其余等待并复用结果, 避免并发请求打垮鉴权服务。
+仅复用变量, 被缓存 teststep 在 session 上设置的 cookies 不会复用。
+
+"""
+import copy
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Text, Tuple
+
+from loguru import logger
+
+try:
+    import fcntl
+except ImportError:
+    # windows, session cache is shared in current process only
+    fcntl = None
+
+from httprunner.models import CacheScopeEnum, VariablesMapping
+
+SESSION_ID_ENV = "PYTEST_XDIST_TESTRUNUID"
+CACHE_DIR_ENV = "HRUN_CACHE_DIR"
+
+
+def get_session_cache_dir() -> Optional[Text]:
+    """ get directory shared by processes of one test session,
+        None if not running with pytest-xdist and HRUN_CACHE_DIR not specified.
+    """
+    cache_dir = os.getenv(CACHE_DIR_ENV)
+    if cache_dir:
+        return cache_dir
+
+    session_id = os.getenv(SESSION_ID_ENV)
+    if session_id:
+        return os.path.join(tempfile.gettempdir(), f"hrun-cache-{session_id}")
+
+    return None
+
+
+def make_cache_key(
+    scope: Text,
+    step_content: Dict,
+    variables_mapping: VariablesMapping,
+    module_path: Text = "",
+) -> Text:
+    """ make cache key of teststep with its content and input variables
+    """
+    key_content = [
+        scope,
+        module_path if scope == CacheScopeEnum.MODULE else "",
+        step_content,
+        variables_mapping,
+    ]
+    key_str = json.dumps(key_content, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(key_str.encode("utf-8")).hexdigest()
+
+
+@contextmanager
+def _file_lock(lock_path: Text):
+    if fcntl is None:
+        yield
+        return
+
+    with open(lock_path, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class StepCache(object):
+    """ cache of teststep variables in memory, and in files if shared by processes
+
+    Args:
+        cache_dir: directory of files shared by processes, get_session_cache_dir() if not specified
+
+    """
+
+    def __init__(self, cache_dir: Text = None):
+        self.__cache_dir = cache_dir
+        # key => (expire_at, variables), expire_at is 0 if never expire
+        self.__entries: Dict[Text, Tuple[float, VariablesMapping]] = {}
+        # key => (lock, count of threads holding or waiting for it), dropped when count is 0
+        self.__key_locks: Dict[Text, Tuple[threading.Lock, int]] = {}
+        self.__lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cache_dir(self) -> Optional[Text]:
+        return self.__cache_dir or get_session_cache_dir()
+
+    @contextmanager
+    def __key_lock(self, key: Text):
+        """ lock of key, kept only while threads are holding or waiting for it,
+            thus locks of distinct keys do not pile up in long sessions
+        """
+        with self.__lock:
+            lock, count = self.__key_locks.get(key, (None, 0))
+            lock = lock or threading.Lock()
+            self.__key_locks[key] = (lock, count + 1)
+
+        try:
+            with lock:
+                yield
+        finally:
+            with self.__lock:
+                count = self.__key_locks[key][1] - 1
+                if count:
+                    self.__key_locks[key] = (lock, count)
+                else:
+                    del self.__key_locks[key]
+
+    @staticmethod
+    def __is_valid(expire_at: float) -> bool:
+        return not expire_at or expire_at > time.time()
+
+    def __load_file(self, file_path: Text) -> Optional[Tuple[float, VariablesMapping]]:
+        if not os.path.isfile(file_path):
+            return None
+
+        try:
+            with open(file_path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError) as ex:
+            logger.warning(f"failed to load step cache {file_path}: {ex}")
+            return None
+
+        if not self.__is_valid(entry["expire_at"]):
+            return None
+
+        return entry["expire_at"], entry["value"]
+
+    @staticmethod
+    def __dump_file(file_path: Text, expire_at: float, value: VariablesMapping):
+        try:
+            content = json.dumps({"expire_at": expire_at, "value": value})
+        except (TypeError, ValueError) as ex:
+            logger.warning(f"step cache is not shared by processes, {ex}")
+            return
+
+        # write to temp file and rename, readers never see partial content
+        temp_path = f"{file_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(temp_path, file_path)
+
+    def get_or_run(
+        self,
+        key: Text,
+        func: Callable[[], VariablesMapping],
+        ttl: float = 0,
+        shared: bool = False,
+    ) -> Tuple[VariablesMapping, bool]:
+        """ get cached variables of key, or call func to get and cache them.
+            func is called only once for the same key concurrently, others wait for its result.
+
+        Args:
+            key: cache key, made by make_cache_key()
+            func: function to run teststep and return its variables
+            ttl: seconds before cached variables expire, 0 means never expire
+            shared: share with other processes via files in cache_dir
+
+        Returns:
+            tuple: (variables, True if got from cache)
+
+        """
+        with self.__key_lock(key):
+            entry = self.__entries.get(key)
+            if entry is not None and self.__is_valid(entry[0]):
+                self.hits += 1
+                return copy.copy(entry[1]), True
+
+            cache_dir = self.cache_dir if shared else None
+            if cache_dir:
+                os.makedirs(cache_dir, exist_ok=True)
+                file_path = os.path.join(cache_dir, f"{key}.json")
+                with _file_lock(f"{file_path}.lock"):
+                    entry = self.__load_file(file_path)
+                    if entry is None:
+                        value = func()
+                        expire_at = time.time() + ttl if ttl else 0
+                        self.__dump_file(file_path, expire_at, value)
+                        entry = (expire_at, value)
+                        hit = False
+                    else:
+                        hit = True
+            else:
+                value = func()
+                entry = (time.time() + ttl if ttl else 0, value)
+                hit = False
+
+            self.__entries[key] = entry
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+            return copy.copy(entry[1]), hit
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+step_cache = StepCache()
@@ -1,37 +1,66 @@
 # 命令行驱动执行
+# 为加快启动速度, 子命令依赖的模块(pytest/make/har2case/mock 等)均在函数内按需导入
 import argparse
 import enum
 import os
 import sys
-
-import pytest
-from loguru import logger
-from sentry_sdk import capture_message
+from typing import Dict, Text
 
 from httprunner import __description__, __version__
-from httprunner.compat import ensure_cli_args
-from httprunner.ext.har2case import init_har2case_parser, main_har2case
-from httprunner.make import init_make_parser, main_make
-from httprunner.scaffold import init_parser_scaffold, main_scaffold
-from httprunner.utils import init_sentry_sdk
 
-init_sentry_sdk()
+SUB_COMMANDS = ["run", "startproject", "har2case", "make", "mock"]
 
 
 def init_parser_run(subparsers):
     sub_parser_run = subparsers.add_parser(
-        "run", help="Make HttpRunner testcases and run with pytest."
+        "run",
+        help="Make HttpRunner testcases and run with pytest, "
+        "specify log level with --hrun-log-level, e.g. DEBUG/INFO/WARNING/QUIET, "
+        "limit requests per second to hosts with --rate-limit PATTERN=RATE[:BURST], "
+        "profile teststeps with --profile[=timers|cprofile|sampling], "
+        "serve live metrics with --metrics [HOST:]PORT, "
+        "export trace spans with --hrun-trace FILE|COLLECTOR_URL.",
     )
     return sub_parser_run
 
 
 def main_run(extra_args) -> enum.IntEnum:
-    # 用于不抓用户调用传到开发者搭建的sentry_sdk监控
-    capture_message("start to run")
+    import pytest
+    from loguru import logger
+
+    from httprunner import log, metrics, profiler, ratelimit, telemetry, tracing
+    from httprunner.compat import ensure_cli_args
+    from httprunner.make import main_make
+
+    # 用于不抓用户调用传到开发者搭建的sentry_sdk监控, 需设置 HRUN_TELEMETRY=1 开启
+    telemetry.capture_message("start to run")
 
     # 因为python2和python3的extra_args不同，要做兼容
     extra_args = ensure_cli_args(extra_args)
 
+    # hrun options are popped from cli args since they should not be passed to pytest,
+    # and passed to testcases by environment variables, which are inherited by xdist workers.
+    # pytest has its own --log-level and --trace options, thus hrun ones are prefixed.
+    hrun_options = [
+        # --hrun-log-level LEVEL
+        (log.pop_log_level_arg, log.setup_logger),
+        # --rate-limit PATTERN=RATE[:BURST]
+        (ratelimit.pop_rate_limit_args, ratelimit.set_cli_rate_limits),
+        # --profile[=MODE]
+        (profiler.pop_profile_arg, profiler.set_profile_mode),
+        # --metrics [HOST:]PORT
+        (metrics.pop_metrics_arg, metrics.set_metrics_address),
+        # --hrun-trace FILE|URL
+        (tracing.pop_trace_arg, tracing.set_trace_destination),
+    ]
+    for pop_option, set_option in hrun_options:
+        try:
+            extra_args, value = pop_option(extra_args)
+        except ValueError as ex:
+            logger.error(ex)
+            sys.exit(1)
+        set_option(value)
+
     tests_path_list = []
     extra_args_new = []
     for item in extra_args:
@@ -60,19 +89,56 @@ def main_run(extra_args) -> enum.IntEnum:
     return pytest.main(extra_args_new)
 
 
+def init_sub_parsers(
+    subparsers, command: Text
+) -> Dict[Text, argparse.ArgumentParser]:
+    """ init parser of specified sub-command only, thus modules of other sub-commands
+        will not be imported. parsers of all sub-commands are inited for help or unknown command.
+    """
+    init_all = command not in SUB_COMMANDS
+    sub_parsers = {}
+
+    if init_all or command == "run":
+        sub_parsers["run"] = init_parser_run(subparsers)
+
+    if init_all or command == "startproject":
+        from httprunner.scaffold import init_parser_scaffold
+
+        sub_parsers["startproject"] = init_parser_scaffold(subparsers)
+
+    if init_all or command == "har2case":
+        from httprunner.ext.har2case import init_har2case_parser
+
+        sub_parsers["har2case"] = init_har2case_parser(subparsers)
+
+    if init_all or command == "make":
+        from httprunner.make import init_make_parser
+
+        sub_parsers["make"] = init_make_parser(subparsers)
+
+    if init_all or command == "mock":
+        from httprunner.ext.mock import init_mock_parser
+
+        sub_parsers["mock"] = init_mock_parser(subparsers)
+
+    return sub_parsers
+
+
 def main():
     """ API test: parse command line options and run commands.
     """
+    if len(sys.argv) == 2 and sys.argv[1] in ["-V", "--version"]:
+        # httprunner -V, print version without importing any dependency
+        print(f"{__version__}")
+        sys.exit(0)
+
     parser = argparse.ArgumentParser(description=__description__)
     parser.add_argument(
         "-V", "--version", dest="version", action="store_true", help="show version"
     )
 
     subparsers = parser.add_subparsers(help="sub-command help")
-    sub_parser_run = init_parser_run(subparsers)
-    sub_parser_scaffold = init_parser_scaffold(subparsers)
-    sub_parser_har2case = init_har2case_parser(subparsers)
-    sub_parser_make = init_make_parser(subparsers)
+    sub_parsers = init_sub_parsers(subparsers, sys.argv[1] if len(sys.argv) > 1 else "")
 
     if len(sys.argv) == 1:
         # httprunner
@@ -88,21 +154,28 @@ def main():
             parser.print_help()
         elif sys.argv[1] == "startproject":
             # httprunner startproject
-            sub_parser_scaffold.print_help()
+            sub_parsers["startproject"].print_help()
         elif sys.argv[1] == "har2case":
             # httprunner har2case
-            sub_parser_har2case.print_help()
+            sub_parsers["har2case"].print_help()
         elif sys.argv[1] == "run":
             # httprunner run
+            import pytest
+
             pytest.main(["-h"])
         elif sys.argv[1] == "make":
             # httprunner make
-            sub_parser_make.print_help()
+            sub_parsers["make"].print_help()
+        elif sys.argv[1] == "mock":
+            # httprunner mock
+            sub_parsers["mock"].print_help()
         sys.exit(0)
     elif (
         len(sys.argv) == 3 and sys.argv[1] == "run" and sys.argv[2] in ["-h", "--help"]
     ):
         # httprunner run -h
+        import pytest
+
         pytest.main(["-h"])
         sys.exit(0)
 
@@ -119,22 +192,38 @@ def main():
     if sys.argv[1] == "run":
         sys.exit(main_run(extra_args))
     elif sys.argv[1] == "startproject":
+        from httprunner.scaffold import main_scaffold
+
         main_scaffold(args)
     elif sys.argv[1] == "har2case":
+        from httprunner.ext.har2case import main_har2case
+
         main_har2case(args)
     elif sys.argv[1] == "make":
+        from httprunner.make import main_make
+
         main_make(args.testcase_path)
+    elif sys.argv[1] == "mock":
+        from httprunner.ext.mock import main_mock
+
+        sys.exit(main_mock(args))
 
 
 def main_hrun_alias():
     """ command alias
         hrun = httprunner run
+        hrun mock = httprunner mock, unless path named mock exists in current directory
     """
-    if len(sys.argv) == 2:
+    if len(sys.argv) >= 2 and sys.argv[1] == "mock" and not os.path.exists("mock"):
+        # hrun mock testcases/
+        pass
+    elif len(sys.argv) == 2:
         if sys.argv[1] in ["-V", "--version"]:
             # hrun -V
             sys.argv = ["httprunner", "-V"]
         elif sys.argv[1] in ["-h", "--help"]:
+            import pytest
+
             pytest.main(["-h"])
             sys.exit(0)
         else:
@@ -1,6 +1,7 @@
 # 客户端相关方法,主要是封装 requests.Session.request,安全调用,输出log等, 给runner.py调用.
 
 import json
+import threading
 import time
 
 import requests
@@ -14,8 +15,18 @@ from requests.exceptions import (
     RequestException,
 )
 
-from httprunner.models import RequestData, ResponseData
-from httprunner.models import SessionData, ReqRespData
+from httprunner import log, metrics, profiler
+from httprunner.models import TCircuitBreaker, TRetry
+from httprunner.ratelimit import RateLimits, rate_limiter
+from httprunner.records import RequestRecord, ResponseRecord
+from httprunner.records import SessionRecord, ReqRespRecord
+from httprunner.retry import (
+    CircuitBreakerOpenError,
+    get_backoff_seconds,
+    get_circuit_breaker,
+    is_failure,
+    is_retryable,
+)
 from httprunner.utils import lower_dict_keys, omit_long_data
 
 # 屏蔽https证书警告
@@ -36,18 +47,22 @@ class ApiResponse(Response):
         Response.raise_for_status(self)
 
 
-def get_req_resp_record(resp_obj: Response) -> ReqRespData:
+def get_req_resp_record(resp_obj: Response) -> ReqRespRecord:
     """
     从 Response()对象获取请求记录和响应记录
 
     :param resp_obj: Response响应
-    :return: 返回自定义的ReqResData模型类
+    :return: 返回轻量的ReqRespRecord记录, 需要时通过to_model()转换为ReqRespData模型
     """
 
     def log_print(req_or_resp, r_type):
         """
         日志打印，格式为标准的json
         """
+        if not log.is_enabled("DEBUG"):
+            # skip json.dumps of headers and body if debug log is discarded
+            return
+
         msg = f"\n================== {r_type} details ==================\n"
         for key, value in req_or_resp.dict().items():
             # 如果value中还包含着dict或者list，就把value转成json格式
@@ -91,7 +106,7 @@ def get_req_resp_record(resp_obj: Response) -> ReqRespData:
             # upload file type
             request_body = "upload file stream (OMITTED)"
 
-    request_data = RequestData(
+    request_data = RequestRecord(
         method=resp_obj.request.method,
         url=resp_obj.request.url,
         headers=request_headers,
@@ -120,10 +135,10 @@ def get_req_resp_record(resp_obj: Response) -> ReqRespData:
             # 长度处理
             response_body = omit_long_data(resp_text)
 
-    # 实例化ResponseData模型
-    response_data = ResponseData(
+    # 实例化ResponseRecord记录, 不做pydantic校验
+    response_data = ResponseRecord(
         status_code=resp_obj.status_code,
-        cookies=resp_obj.cookies or {},
+        cookies=resp_obj.cookies.get_dict() if resp_obj.cookies else {},
         encoding=resp_obj.encoding,
         headers=resp_headers,
         content_type=content_type,
@@ -133,10 +148,22 @@ def get_req_resp_record(resp_obj: Response) -> ReqRespData:
     # 在debug模式下打印响应日志
     log_print(response_data, "response")
 
-    # 实例化ReqRespData 其就是 RequestData ResponseData 组成
-    req_resp_data = ReqRespData(request=request_data, response=response_data)
+    # 实例化ReqRespRecord 其就是 RequestRecord ResponseRecord 组成
+    req_resp_data = ReqRespRecord(request=request_data, response=response_data)
     return req_resp_data
 
+
+def make_error_response(method, url, error: RequestException) -> ApiResponse:
+    """
+    请求失败时构造的响应, status_code 为 0, raise_for_status() 抛出请求异常
+    """
+    resp = ApiResponse()
+    resp.error = error
+    resp.status_code = 0  # with this status_code, content returns None
+    resp.request = Request(method, url).prepare()
+    return resp
+
+
 # 继承requests.Session
 class HttpSession(requests.Session):
     """
@@ -149,7 +176,21 @@ class HttpSession(requests.Session):
 
     def __init__(self):
         super(HttpSession, self).__init__()
-        self.data = SessionData()
+        self.__local = threading.local()
+        self.data = SessionRecord()
+
+    @property
+    def data(self) -> SessionRecord:
+        """ data of last request, kept per thread since teststeps may run concurrently
+        """
+        data = getattr(self.__local, "data", None)
+        if data is None:
+            data = self.__local.data = SessionRecord()
+        return data
+
+    @data.setter
+    def data(self, data: SessionRecord):
+        self.__local.data = data
 
     def update_last_req_resp_record(self, resp_obj):
         """
@@ -161,7 +202,16 @@ class HttpSession(requests.Session):
 
 
 
-    def request(self, method, url, name=None, **kwargs):
+    def request(
+        self,
+        method,
+        url,
+        name=None,
+        retry: TRetry = None,
+        circuit_breaker: TCircuitBreaker = None,
+        rate_limits: RateLimits = None,
+        **kwargs,
+    ):
         """
         1.设置了超时时间120s
         2.计算整个请求花费了多少时间
@@ -181,6 +231,12 @@ class HttpSession(requests.Session):
             URL for the new :class:`Request` object.
         :param name: (optional)
             Placeholder, make compatible with Locust's HttpSession
+        :param retry: (optional)
+            retry request on retryable exceptions or status codes with backoff.
+        :param circuit_breaker: (optional)
+            fail fast without sending request if circuit breaker of host is open.
+        :param rate_limits: (optional)
+            host pattern => token bucket rate limit, wait before sending request if throttled.
         :param params: (optional)
             Dictionary or bytes to be sent in the query string for the :class:`Request`.
         :param data: (optional)
@@ -209,7 +265,7 @@ class HttpSession(requests.Session):
         :param cert: (optional)
             if String, path to ssl client cert file (.pem). If Tuple, ('cert', 'key') pair.
         """
-        self.data = SessionData()
+        self.data = SessionRecord()
 
         # 设置了超时时间120s
         kwargs.setdefault("timeout", 120)
@@ -219,21 +275,30 @@ class HttpSession(requests.Session):
 
         # 计算整个请求花费了多少时间
         start_timestamp = time.time()
-        response = self._send_request_safe_mode(method, url, **kwargs)
+        response = self._send_request_with_retry(
+            method, url, retry, circuit_breaker, rate_limits, **kwargs
+        )
         """
         round() 方法返回浮点数x的四舍五入值
         round( x [, n]  )
         x -- 数值表达式。
         n -- 数值表达式，表示从小数点位数。
         """
-        response_time_ms = round((time.time() - start_timestamp) * 1000, 2)
+        # 不包含重试前失败请求、退避等待与限流等待的时间
+        response_time_ms = round(
+            (time.time() - start_timestamp) * 1000
+            - self.data.stat.retry_elapsed_ms
+            - self.data.stat.throttle_ms,
+            2,
+        )
 
         # 定义了客户端ip地址和端口号、服务端ip地址和端口号
         try:
             client_ip, client_port = response.raw.connection.sock.getsockname()
             self.data.address.client_ip = client_ip
             self.data.address.client_port = client_port
-            logger.debug(f"client IP: {client_ip}, Port: {client_port}")
+            if log.is_enabled("DEBUG"):
+                logger.debug(f"client IP: {client_ip}, Port: {client_port}")
         except AttributeError as ex:
             logger.warning(f"failed to get client address info: {ex}")
 
@@ -241,7 +306,8 @@ class HttpSession(requests.Session):
             server_ip, server_port = response.raw.connection.sock.getpeername()
             self.data.address.server_ip = server_ip
             self.data.address.server_port = server_port
-            logger.debug(f"server IP: {server_ip}, Port: {server_port}")
+            if log.is_enabled("DEBUG"):
+                logger.debug(f"server IP: {server_ip}, Port: {server_port}")
         except AttributeError as ex:
             logger.warning(f"failed to get server address info: {ex}")
 
@@ -255,21 +321,94 @@ class HttpSession(requests.Session):
 
         # 记录了request和response记录，包括重定向记录
         response_list = response.history + [response]
-        self.data.req_resps = [
-            get_req_resp_record(resp_obj) for resp_obj in response_list
-        ]
+        with profiler.phase("record"):
+            self.data.req_resps = [
+                get_req_resp_record(resp_obj) for resp_obj in response_list
+            ]
+
+        if metrics.registry is not None:
+            metrics.registry.observe_request(
+                method,
+                response.status_code,
+                response_time_ms,
+                self.data.stat.retry_times,
+            )
 
         try:
             response.raise_for_status()
         except RequestException as ex:
             logger.error(f"{str(ex)}")
         else:
-            logger.info(
-                f"status_code: {response.status_code}, "
-                f"response_time(ms): {response_time_ms} ms, "
-                f"response_length: {content_size} bytes"
-            )
+            if log.is_enabled("INFO"):
+                logger.info(
+                    f"status_code: {response.status_code}, "
+                    f"response_time(ms): {response_time_ms} ms, "
+                    f"response_length: {content_size} bytes"
+                )
+
+        return response
 
+    def _send_request_with_retry(
+        self,
+        method,
+        url,
+        retry: TRetry = None,
+        circuit_breaker: TCircuitBreaker = None,
+        rate_limits: RateLimits = None,
+        **kwargs,
+    ):
+        """
+        发送请求, 可重试的异常或状态码按退避时间重试, host 熔断时直接失败不发送请求,
+        每次发送前按限流等待, 重试与限流的次数及耗时记录在 self.data.stat 中
+        """
+        breaker = get_circuit_breaker(url, circuit_breaker) if circuit_breaker else None
+        max_retry_times = retry.times if retry else 0
+        first_start_timestamp = time.time()
+        retry_times = 0
+        throttle_seconds = 0
+
+        while True:
+            attempt_start_timestamp = time.time()
+            if breaker and not breaker.allow_request():
+                response = make_error_response(
+                    method,
+                    url,
+                    CircuitBreakerOpenError(
+                        f"circuit breaker is open, fail fast without sending request: {url}"
+                    ),
+                )
+                break
+
+            if rate_limits and rate_limiter.acquire(url, rate_limits):
+                # throttled, actual time slept is recorded
+                throttle_end_timestamp = time.time()
+                throttle_seconds += throttle_end_timestamp - attempt_start_timestamp
+                attempt_start_timestamp = throttle_end_timestamp
+
+            response = self._send_request_safe_mode(method, url, **kwargs)
+            if breaker:
+                breaker.record(not is_failure(response))
+
+            if retry_times >= max_retry_times or not is_retryable(response, retry):
+                break
+
+            backoff = get_backoff_seconds(retry, retry_times)
+            retry_times += 1
+            logger.warning(
+                f"retry request {retry_times}/{max_retry_times} after {backoff:.3f}s, "
+                f"status_code: {response.status_code}, error: {getattr(response, 'error', None)}"
+            )
+            if response.raw is not None:
+                # release connection of discarded response
+                response.close()
+            time.sleep(backoff)
+
+        self.data.stat.retry_times = retry_times
+        self.data.stat.throttle_ms = round(throttle_seconds * 1000, 2)
+        self.data.stat.retry_elapsed_ms = round(
+            (attempt_start_timestamp - first_start_timestamp - throttle_seconds) * 1000,
+            2,
+        )
         return response
 
     def _send_request_safe_mode(self, method, url, **kwargs):
@@ -282,11 +421,7 @@ class HttpSession(requests.Session):
         except (MissingSchema, InvalidSchema, InvalidURL):
             raise
         except RequestException as ex:
-            resp = ApiResponse()
-            resp.error = ex
-            resp.status_code = 0  # with this status_code, content returns None
-            resp.request = Request(method, url).prepare()
-            return resp
+            return make_error_response(method, url, ex)
 
 if __name__ == '__main__':
     url = "https://www.baidu.com"
@@ -153,6 +153,8 @@ def _sort_step_by_custom_order(step: Dict) -> Dict:
         "variables",
         "request",
         "testcase",
+        "cache",
+        "retry",
         "setup_hooks",
         "teardown_hooks",
         "extract",
@@ -290,68 +292,37 @@ def _generate_conftest_for_summary(args: List):
         sys.exit(1)
 
     conftest_content = '''# NOTICE: Generated By HttpRunner.
-import json
-import os
-import time
-
 import pytest
 from loguru import logger
 
-from httprunner.utils import get_platform, ExtendJSONEncoder
+from httprunner.summary import SummaryWriter
 
 
 @pytest.fixture(scope="session", autouse=True)
-def session_fixture(request):
+def session_fixture():
     """setup and teardown each task"""
     logger.info(f"start running testcases ...")
 
-    start_at = time.time()
+    summary_path = r"{{SUMMARY_PATH_PLACEHOLDER}}"
+    summary_writer = SummaryWriter(summary_path)
 
-    yield
+    yield summary_writer
 
     logger.info(f"task finished, generate task summary for --save-tests")
+    summary_writer.close()
+    logger.info(f"generated task summary: {summary_path}")
 
-    summary = {
-        "success": True,
-        "stat": {
-            "testcases": {"total": 0, "success": 0, "fail": 0},
-            "teststeps": {"total": 0, "failures": 0, "successes": 0},
-        },
-        "time": {"start_at": start_at, "duration": time.time() - start_at},
-        "platform": get_platform(),
-        "details": [],
-    }
-
-    for item in request.node.items:
-        testcase_summary = item.instance.get_summary()
-        summary["success"] &= testcase_summary.success
-
-        summary["stat"]["testcases"]["total"] += 1
-        summary["stat"]["teststeps"]["total"] += len(testcase_summary.step_datas)
-        if testcase_summary.success:
-            summary["stat"]["testcases"]["success"] += 1
-            summary["stat"]["teststeps"]["successes"] += len(
-                testcase_summary.step_datas
-            )
-        else:
-            summary["stat"]["testcases"]["fail"] += 1
-            summary["stat"]["teststeps"]["successes"] += (
-                len(testcase_summary.step_datas) - 1
-            )
-            summary["stat"]["teststeps"]["failures"] += 1
-
-        testcase_summary_json = testcase_summary.dict()
-        testcase_summary_json["records"] = testcase_summary_json.pop("step_datas")
-        summary["details"].append(testcase_summary_json)
 
-    summary_path = r"{{SUMMARY_PATH_PLACEHOLDER}}"
-    summary_dir = os.path.dirname(summary_path)
-    os.makedirs(summary_dir, exist_ok=True)
+@pytest.fixture(autouse=True)
+def testcase_fixture(request, session_fixture):
+    """dump testcase summary as soon as each testcase finished"""
+    yield
 
-    with open(summary_path, "w", encoding="utf-8") as f:
-        json.dump(summary, f, indent=4, ensure_ascii=False, cls=ExtendJSONEncoder)
+    if not hasattr(request.instance, "get_summary"):
+        # not HttpRunner testcase
+        return
 
-    logger.info(f"generated task summary: {summary_path}")
+    session_fixture.add_testcase(request.instance.get_summary())
 
 '''
 
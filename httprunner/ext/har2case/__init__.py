@@ -7,10 +7,39 @@ Usage:
     # convert to YAML format testcase
     $ hrun har2case demo.har -2y
 
+    # split into one testcase file per host
+    $ hrun har2case demo.har -2y --split-by host
+
+    # split into one testcase file per 60 seconds
+    $ hrun har2case demo.har -2y --split-by time --time-window 60
+
+    # cluster repeated requests into parameterized testcases
+    $ hrun har2case demo.har -2y --cluster
+
+    # convert many HAR files, entries are converted with 4 processes
+    $ hrun har2case a.har b.har -2y --jobs 4
+
 """
 
-from httprunner.ext.har2case.core import HarParser
-from sentry_sdk import capture_message
+import sys
+import time
+
+from loguru import logger
+
+
+def __getattr__(name):
+    # keep compatible with `from httprunner.ext.har2case import HarParser`
+    if name == "HarParser":
+        from httprunner.ext.har2case.core import HarParser
+
+        return HarParser
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+if sys.version_info < (3, 7):
+    # module __getattr__ (PEP 562) is not supported
+    from httprunner.ext.har2case.core import HarParser
 
 
 def init_har2case_parser(subparsers):
@@ -20,7 +49,9 @@ def init_har2case_parser(subparsers):
         "har2case",
         help="Convert HAR(HTTP Archive) to YAML/JSON testcases for HttpRunner.",
     )
-    parser.add_argument("har_source_file", nargs="?", help="Specify HAR source file")
+    parser.add_argument(
+        "har_source_file", nargs="*", help="Specify HAR source file(s)"
+    )
     parser.add_argument(
         "-2y",
         "--to-yml",
@@ -45,12 +76,39 @@ def init_har2case_parser(subparsers):
         help="Specify exclude keyword, url that includes exclude string will be ignored, "
         "multiple keywords can be joined with '|'",
     )
+    parser.add_argument(
+        "--split-by",
+        choices=["host", "time"],
+        help="Split teststeps into multiple testcase files by request host or time window.",
+    )
+    parser.add_argument(
+        "--time-window",
+        type=int,
+        default=300,
+        help="Specify time window in seconds when split by time, default to 300.",
+    )
+    parser.add_argument(
+        "--cluster",
+        action="store_true",
+        help="Drop duplicate requests, and cluster requests by method and URL template "
+        "into parameterized testcases.",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Convert HAR entries with N processes, 0 means count of cpu, default to 1.",
+    )
 
     return parser
 
 
 def main_har2case(args):
-    har_source_file = args.har_source_file
+    har_source_files = args.har_source_file
+    if not har_source_files:
+        logger.error("HAR file not specified.")
+        sys.exit(1)
 
     if args.to_yaml:
         output_file_type = "YAML"
@@ -59,7 +117,32 @@ def main_har2case(args):
     else:
         output_file_type = "pytest"
 
-    capture_message(f"har2case {output_file_type}")
-    HarParser(har_source_file, args.filter, args.exclude).gen_testcase(output_file_type)
+    # import when converting, keep parser initialization light for cli
+    from httprunner import telemetry
+    from httprunner.ext.har2case.core import HarParser
+
+    telemetry.capture_message(f"har2case {output_file_type}")
+
+    start_at = time.time()
+    entries_count = 0
+    for har_source_file in har_source_files:
+        har_parser = HarParser(
+            har_source_file,
+            args.filter,
+            args.exclude,
+            split_by=args.split_by,
+            time_window=args.time_window,
+            jobs=args.jobs,
+            cluster=args.cluster,
+        )
+        har_parser.gen_testcase(output_file_type)
+        entries_count += har_parser.entries_count
+
+    if len(har_source_files) > 1:
+        elapsed = time.time() - start_at
+        logger.info(
+            f"converted {entries_count} entries of {len(har_source_files)} HAR files "
+            f"in {elapsed:.2f} seconds, {entries_count / max(elapsed, 1e-6):.1f} entries/s"
+        )
 
     return 0
@@ -0,0 +1,164 @@
+""" Deduplicate and cluster teststeps converted from HAR entries.
+
+Requests to the same endpoint with different ids or query values, e.g. polling and
+pagination, are clustered by method and URL template:
+
+    GET /api/users/123?page=1
+    GET /api/users/456?page=2
+    =>
+    GET /api/users/$id_1?page=$page
+    parameters: {"id_1-page": [["123", "1"], ["456", "2"]]}
+
+"""
+import json
+import re
+import urllib.parse as urlparse
+from collections import OrderedDict
+from typing import Dict, List, Text, Tuple
+
+UUID_REGEX = re.compile(
+    r"^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$"
+)
+NUMBER_REGEX = re.compile(r"^\d+$")
+
+
+def make_url_template(url: Text) -> Tuple[Text, List[Text]]:
+    """ replace numeric and UUID path segments of url with variables
+
+    Examples:
+        >>> make_url_template("https://httprunner.top/users/123/orders/5")
+        ("https://httprunner.top/users/$id_1/orders/$id_2", ["123", "5"])
+
+    """
+    parsed_object = urlparse.urlparse(url)
+    segments = parsed_object.path.split("/")
+    path_values = []
+    for index, segment in enumerate(segments):
+        if NUMBER_REGEX.match(segment) or UUID_REGEX.match(segment):
+            path_values.append(segment)
+            segments[index] = f"$id_{len(path_values)}"
+
+    template_url = parsed_object._replace(path="/".join(segments)).geturl()
+    return template_url, path_values
+
+
+def _make_variable_name(name: Text) -> Text:
+    return re.sub(r"\W", "_", name)
+
+
+def _get_cluster_key(teststep: Dict) -> Text:
+    request = teststep["request"]
+    template_url, _ = make_url_template(request["url"])
+    # requests with different body are not clustered
+    body = {key: request.get(key) for key in ["data", "json"] if key in request}
+    return json.dumps(
+        [
+            request.get("method"),
+            template_url,
+            sorted(request.get("params", {}).keys()),
+            body,
+        ],
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+
+
+def _make_cluster_teststep(teststeps: List[Dict]) -> Tuple[Dict, Dict]:
+    """ make one parameterized teststep from teststeps in one cluster
+
+    Returns:
+        tuple: (parameters, teststep)
+
+    """
+    first_teststep = teststeps[0]
+    template_url, path_values = make_url_template(first_teststep["request"]["url"])
+    params = first_teststep["request"].get("params", {})
+
+    # only query params with different values are parameterized
+    variable_params = [
+        key
+        for key in params
+        if any(step["request"]["params"][key] != params[key] for step in teststeps)
+    ]
+
+    names = [f"id_{index}" for index in range(1, len(path_values) + 1)]
+    names += [_make_variable_name(key) for key in variable_params]
+    if not names:
+        return {}, first_teststep
+
+    rows = []
+    # rows kept in order of appearance, deduplicated in O(1) for large captures
+    seen_rows = set()
+    for teststep in teststeps:
+        _, row = make_url_template(teststep["request"]["url"])
+        row += [teststep["request"]["params"][key] for key in variable_params]
+        row_key = tuple(row)
+        if row_key not in seen_rows:
+            seen_rows.add(row_key)
+            rows.append(row)
+
+    if len(names) == 1:
+        parameters = {names[0]: [row[0] for row in rows]}
+    else:
+        parameters = {"-".join(names): rows}
+
+    teststep = json.loads(json.dumps(first_teststep))
+    teststep["name"] = urlparse.urlparse(template_url).path
+    teststep["request"]["url"] = template_url
+    for key in variable_params:
+        teststep["request"]["params"][key] = f"${_make_variable_name(key)}"
+
+    # only keep validators shared by all teststeps in cluster
+    teststep["validate"] = [
+        validator
+        for validator in first_teststep["validate"]
+        if all(validator in step["validate"] for step in teststeps)
+    ]
+
+    return parameters, teststep
+
+
+def cluster_teststeps(
+    teststeps: List[Dict],
+) -> Tuple[List[Dict], List[Tuple[Dict, Dict]]]:
+    """ drop duplicate teststeps, and cluster teststeps by method and URL template
+
+    Args:
+        teststeps (list): teststeps converted from HAR entries
+
+    Returns:
+        tuple: (single teststeps, clusters)
+            single teststeps are kept in original order,
+            each cluster is a tuple of (parameters, parameterized teststep)
+
+    """
+    clusters: Dict[Text, List[Dict]] = OrderedDict()
+    requests_seen = set()
+    for teststep in teststeps:
+        request_str = json.dumps(
+            teststep["request"], sort_keys=True, ensure_ascii=False
+        )
+        if request_str in requests_seen:
+            continue
+
+        requests_seen.add(request_str)
+        clusters.setdefault(_get_cluster_key(teststep), []).append(teststep)
+
+    single_teststeps = []
+    parameterized_teststeps = []
+    for cluster in clusters.values():
+        if len(cluster) == 1:
+            single_teststeps.extend(cluster)
+            continue
+
+        parameters, teststep = _make_cluster_teststep(cluster)
+        rows = list(parameters.values())[0] if parameters else []
+        if len(rows) <= 1:
+            single_teststeps.extend(cluster)
+        else:
+            parameterized_teststeps.append((parameters, teststep))
+
+    # keep original order of single teststeps
+    steps_order = {id(teststep): index for index, teststep in enumerate(teststeps)}
+    single_teststeps.sort(key=lambda step: steps_order[id(step)])
+    return single_teststeps, parameterized_teststeps
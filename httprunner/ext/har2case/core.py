@@ -1,16 +1,21 @@
 import base64
 import json
 import os
+import re
 import sys
+import time
 import urllib.parse as urlparse
-from typing import Text
+from collections import deque
+from multiprocessing import Pool, cpu_count
+from typing import Dict, Iterator, List, Text, Tuple
 
 from httprunner.compat import ensure_path_sep
 from loguru import logger
-from sentry_sdk import capture_exception
 
+from httprunner import telemetry
 from httprunner.ext.har2case import utils
-from httprunner.make import make_testcase, format_pytest_with_black
+from httprunner.ext.har2case.cluster import cluster_teststeps
+from httprunner.utils import is_support_multiprocessing
 
 try:
     from json.decoder import JSONDecodeError
@@ -35,11 +40,64 @@ def ensure_file_path(path: Text) -> Text:
     return path
 
 
+# HarParser in worker process, initialized once for each worker
+_worker_har_parser = None
+
+
+def _init_worker(har_parser: "HarParser"):
+    global _worker_har_parser
+    _worker_har_parser = har_parser
+
+
+def _prepare_teststeps_in_worker(entries: List[Dict]) -> List[Dict]:
+    try:
+        return [_worker_har_parser._prepare_teststep(entry) for entry in entries]
+    except SystemExit:
+        # SystemExit can not be passed back to the main process
+        return None
+
+
 class HarParser(object):
-    def __init__(self, har_file_path, filter_str=None, exclude_str=None):
+    """ convert HAR to testcase, log entries are parsed one by one in stream.
+
+    Args:
+        har_file_path: HAR file path
+        filter_str: only url include filter string will be converted
+        exclude_str: url that includes exclude string will be ignored, joined with '|'
+        split_by: split teststeps into testcase files, "host" or "time"
+        time_window: time window in seconds when split by time
+        jobs: count of processes converting entries, 0 means cpu count
+        chunk_size: count of entries dispatched to process each time
+        cluster: drop duplicate entries, and cluster entries by method and URL template
+            into parameterized testcases
+
+    """
+
+    def __init__(
+        self,
+        har_file_path,
+        filter_str=None,
+        exclude_str=None,
+        split_by=None,
+        time_window=300,
+        jobs=1,
+        chunk_size=100,
+        cluster=False,
+    ):
         self.har_file_path = ensure_file_path(har_file_path)
         self.filter_str = filter_str
         self.exclude_str = exclude_str or ""
+        self.split_by = split_by
+        self.time_window = time_window
+        # more processes than cpu count only adds overhead of pickling
+        self.jobs = min(jobs, cpu_count()) if jobs else cpu_count()
+        self.chunk_size = chunk_size
+        self.cluster = cluster
+        self.__first_started_at = None
+
+        # progress of conversion
+        self.entries_count = 0
+        self.elapsed = 0.0
 
     def __make_request_url(self, teststep_dict, entry_json):
         """ parse HAR entry request url and queryString, and make teststep url and params
@@ -313,33 +371,134 @@ class HarParser(object):
         """
         return {"name": "testcase description", "variables": {}, "verify": False}
 
-    def _prepare_teststeps(self):
-        """ make teststep list.
-            teststeps list are parsed from HAR log entries list.
-
-        """
+    def _is_included(self, url: Text) -> bool:
+        if self.filter_str and self.filter_str not in url:
+            return False
 
-        def is_exclude(url, exclude_str):
-            exclude_str_list = exclude_str.split("|")
-            for exclude_str in exclude_str_list:
-                if exclude_str and exclude_str in url:
-                    return True
+        for exclude_str in self.exclude_str.split("|"):
+            if exclude_str and exclude_str in url:
+                return False
 
-            return False
+        return True
 
-        teststeps = []
-        log_entries = utils.load_har_log_entries(self.har_file_path)
-        for entry_json in log_entries:
+    def _iter_entries(self) -> Iterator[Dict]:
+        """ iterate HAR log entries matched with filter and exclude options
+        """
+        for entry_json in utils.iter_har_log_entries(self.har_file_path):
             url = entry_json["request"].get("url")
-            if self.filter_str and self.filter_str not in url:
+            if not self._is_included(url):
                 continue
 
-            if is_exclude(url, self.exclude_str):
-                continue
+            yield entry_json
+
+    def _get_split_key(self, entry_json: Dict) -> Text:
+        """ get key of testcase file the entry belongs to, empty string if not split
+        """
+        if self.split_by == "host":
+            host = urlparse.urlparse(entry_json["request"].get("url")).netloc
+            return re.sub(r"\W", "_", host)
+
+        if self.split_by == "time":
+            # e.g. 2020-03-11T09:35:19.853+08:00, 2020-03-11T01:35:19.853Z
+            started_date_time = entry_json.get("startedDateTime", "")
+            try:
+                started_at = utils.parse_iso_timestamp(started_date_time)
+            except (ValueError, TypeError):
+                logger.warning(f"invalid startedDateTime: {started_date_time}")
+                started_at = self.__first_started_at or 0
+
+            if self.__first_started_at is None:
+                self.__first_started_at = started_at
+
+            window_index = int((started_at - self.__first_started_at) // self.time_window)
+            return f"window{max(0, window_index)}"
 
-            teststeps.append(self._prepare_teststep(entry_json))
+        return ""
 
-        return teststeps
+    def _iter_teststeps(self) -> Iterator[Tuple[Text, Dict]]:
+        """ iterate teststeps parsed from HAR log entries, with key of split testcase file
+        """
+        self.__first_started_at = None
+        if self.jobs > 1 and is_support_multiprocessing():
+            teststeps = self.__iter_teststeps_in_parallel()
+        else:
+            if self.jobs > 1:
+                logger.warning(
+                    "this system does not support multiprocessing well, convert entries one by one ..."
+                )
+            teststeps = (
+                (self._get_split_key(entry_json), self._prepare_teststep(entry_json))
+                for entry_json in self._iter_entries()
+            )
+
+        self.entries_count = 0
+        start_at = last_report_at = time.time()
+        for split_key, teststep in teststeps:
+            yield split_key, teststep
+
+            self.entries_count += 1
+            if time.time() - last_report_at >= 5:
+                last_report_at = time.time()
+                rate = self.entries_count / (last_report_at - start_at)
+                logger.info(
+                    f"converted {self.entries_count} entries, {rate:.1f} entries/s"
+                )
+
+        self.elapsed = time.time() - start_at
+        logger.info(
+            f"converted {self.entries_count} entries in {self.elapsed:.2f} seconds, "
+            f"{self.entries_count / max(self.elapsed, 1e-6):.1f} entries/s"
+        )
+
+    def __iter_teststeps_in_parallel(self) -> Iterator[Tuple[Text, Dict]]:
+        """ convert chunks of entries in process pool, and yield teststeps in original order.
+            at most jobs * 2 chunks are pending, thus memory is bounded for large HAR.
+        """
+
+        def iter_chunks():
+            chunk = []
+            for entry_json in self._iter_entries():
+                # split key depends on former entries, thus get it in main process
+                chunk.append((self._get_split_key(entry_json), entry_json))
+                if len(chunk) >= self.chunk_size:
+                    yield chunk
+                    chunk = []
+
+            if chunk:
+                yield chunk
+
+        def collect(split_keys, async_result):
+            teststeps = async_result.get()
+            if teststeps is None:
+                logger.error("failed to convert HAR entries in worker process.")
+                sys.exit(1)
+
+            return zip(split_keys, teststeps)
+
+        logger.info(f"convert HAR entries with {self.jobs} processes")
+        pending = deque()
+        with Pool(self.jobs, initializer=_init_worker, initargs=(self,)) as pool:
+            for chunk in iter_chunks():
+                split_keys = [split_key for split_key, _ in chunk]
+                entries = [entry_json for _, entry_json in chunk]
+                pending.append(
+                    (
+                        split_keys,
+                        pool.apply_async(_prepare_teststeps_in_worker, (entries,)),
+                    )
+                )
+                if len(pending) >= self.jobs * 2:
+                    yield from collect(*pending.popleft())
+
+            while pending:
+                yield from collect(*pending.popleft())
+
+    def _prepare_teststeps(self):
+        """ make teststep list.
+            teststeps list are parsed from HAR log entries list.
+
+        """
+        return [teststep for _, teststep in self._iter_teststeps()]
 
     def _make_testcase(self):
         """ Extract info from HAR file and prepare for testcase
@@ -352,26 +511,121 @@ class HarParser(object):
         testcase = {"config": config, "teststeps": teststeps}
         return testcase
 
+    def _gen_testcase_files(self, file_type: Text) -> List[Text]:
+        """ write teststeps to testcase files in stream, one file for each split key
+        """
+        harfile = os.path.splitext(self.har_file_path)[0]
+        writer_class, file_ext = {
+            "YAML": (utils.YamlTestcaseWriter, "yml"),
+            "JSON": (utils.JsonTestcaseWriter, "json"),
+        }[file_type]
+
+        if self.cluster:
+            return self.__gen_clustered_testcase_files(harfile, writer_class, file_ext)
+
+        writers = {}
+        try:
+            for split_key, teststep in self._iter_teststeps():
+                if split_key not in writers:
+                    file_name = f"{harfile}_{split_key}" if split_key else harfile
+                    output_testcase_file = f"{file_name}.{file_ext}"
+                    logger.info(f"dump testcase to {file_type} format.")
+                    writers[split_key] = writer_class(
+                        output_testcase_file, self._prepare_config()
+                    )
+
+                writers[split_key].add_teststep(teststep)
+        finally:
+            for writer in writers.values():
+                writer.close()
+
+        if not writers and not self.split_by:
+            # keep generating testcase file even if no entry matched
+            writer = writer_class(f"{harfile}.{file_ext}", self._prepare_config())
+            writer.close()
+            writers[""] = writer
+
+        return [writer.path for writer in writers.values()]
+
+    def __gen_clustered_testcase_files(
+        self, harfile: Text, writer_class, file_ext: Text
+    ) -> List[Text]:
+        """ cluster teststeps of each split key, single teststeps are written to main
+            testcase file, and each cluster is written to one parameterized testcase file.
+            HttpRunner parameters only work on testcase level, thus clusters can not be
+            steps of the main testcase.
+        """
+        groups: Dict[Text, List[Dict]] = {}
+        for split_key, teststep in self._iter_teststeps():
+            groups.setdefault(split_key, []).append(teststep)
+
+        if not groups and not self.split_by:
+            groups[""] = []
+
+        def write_testcase(path: Text, config: Dict, teststeps: List[Dict]) -> Text:
+            writer = writer_class(path, config)
+            for teststep in teststeps:
+                writer.add_teststep(teststep)
+            writer.close()
+            return path
+
+        output_testcase_files = []
+        for split_key, teststeps in groups.items():
+            file_name = f"{harfile}_{split_key}" if split_key else harfile
+            single_teststeps, clusters = cluster_teststeps(teststeps)
+            logger.info(
+                f"clustered {len(teststeps)} teststeps into {len(single_teststeps)} "
+                f"single teststeps and {len(clusters)} parameterized testcases"
+            )
+
+            if single_teststeps or not clusters:
+                output_testcase_files.append(
+                    write_testcase(
+                        f"{file_name}.{file_ext}", self._prepare_config(), single_teststeps
+                    )
+                )
+
+            for index, (parameters, teststep) in enumerate(clusters, start=1):
+                config = self._prepare_config()
+                config["name"] = teststep["name"]
+                config["parameters"] = parameters
+                output_testcase_files.append(
+                    write_testcase(
+                        f"{file_name}_cluster{index}.{file_ext}", config, [teststep]
+                    )
+                )
+
+        return output_testcase_files
+
     def gen_testcase(self, file_type="pytest"):
         logger.info(f"Start to generate testcase from {self.har_file_path}")
-        harfile = os.path.splitext(self.har_file_path)[0]
+        # make pytest depends on loader and models, only import when needed
+        from httprunner.make import make_testcase, format_pytest_with_black
 
         try:
-            testcase = self._make_testcase()
+            if file_type in ["JSON", "YAML"]:
+                output_testcase_files = self._gen_testcase_files(file_type)
+            elif self.split_by or self.cluster:
+                # pytest file is rendered from whole testcase, thus make pytest files
+                # one by one from split JSON testcases to keep memory bounded
+                output_testcase_files = []
+                for json_file in self._gen_testcase_files("JSON"):
+                    with open(json_file, encoding="utf-8") as f:
+                        testcase = json.load(f)
+                    testcase["config"]["path"] = json_file
+                    output_testcase_files.append(make_testcase(testcase))
+                format_pytest_with_black(*output_testcase_files)
+            else:
+                # default to generate pytest file
+                testcase = self._make_testcase()
+                testcase["config"]["path"] = self.har_file_path
+                output_testcase_files = [make_testcase(testcase)]
+                format_pytest_with_black(*output_testcase_files)
         except Exception as ex:
-            capture_exception(ex)
+            telemetry.capture_exception(ex)
             raise
 
-        if file_type == "JSON":
-            output_testcase_file = f"{harfile}.json"
-            utils.dump_json(testcase, output_testcase_file)
-        elif file_type == "YAML":
-            output_testcase_file = f"{harfile}.yml"
-            utils.dump_yaml(testcase, output_testcase_file)
-        else:
-            # default to generate pytest file
-            testcase["config"]["path"] = self.har_file_path
-            output_testcase_file = make_testcase(testcase)
-            format_pytest_with_black(output_testcase_file)
+        for output_testcase_file in output_testcase_files:
+            logger.info(f"generated testcase: {output_testcase_file}")
 
-        logger.info(f"generated testcase: {output_testcase_file}")
+        return output_testcase_files
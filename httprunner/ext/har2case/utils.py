@@ -1,12 +1,162 @@
+import calendar
 import json
+import re
 import sys
+import textwrap
+from datetime import datetime
 from json.decoder import JSONDecodeError
+from typing import Dict, Iterator, Text
 from urllib.parse import unquote
 
 import yaml
 from loguru import logger
 
 
+class _JsonStreamReader(object):
+    """ minimal incremental JSON reader, only reads as much content as current value needs
+    """
+
+    def __init__(self, fp, chunk_size: int = 1024 * 1024):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def __fill(self, size: int = None) -> bool:
+        if self.eof:
+            return False
+
+        # drop consumed content, keep memory bounded by the largest single value
+        if self.pos > len(self.buf) // 2:
+            self.buf = self.buf[self.pos :]
+            self.pos = 0
+
+        chunk = self.fp.read(size or self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+
+        self.buf += chunk
+        return True
+
+    def peek(self) -> Text:
+        """ skip whitespaces and return next char, empty string if reach end of file
+        """
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.__fill():
+                return ""
+
+    def expect(self, char: Text):
+        if self.peek() != char:
+            raise JSONDecodeError(f"Expecting '{char}'", self.buf, self.pos)
+        self.pos += 1
+
+    def decode_value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except JSONDecodeError:
+                # value may be truncated at the end of buffer, double buffer and retry
+                if not self.__fill(max(self.chunk_size, len(self.buf))):
+                    raise
+                continue
+
+            if end == len(self.buf) and not self.eof:
+                # number literal may be truncated, e.g. 12|34
+                self.__fill()
+                continue
+
+            self.pos = end
+            return value
+
+    def iter_object_keys(self) -> Iterator[Text]:
+        """ iterate keys of current object, value of each key should be consumed by caller
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+
+        while True:
+            key = self.decode_value()
+            self.expect(":")
+            yield key
+            if self.peek() == ",":
+                self.pos += 1
+                continue
+
+            self.expect("}")
+            return
+
+    def iter_array_items(self) -> Iterator:
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+
+        while True:
+            yield self.decode_value()
+            if self.peek() == ",":
+                self.pos += 1
+                continue
+
+            self.expect("]")
+            return
+
+
+def iter_har_log_entries(
+    file_path: Text, chunk_size: int = 1024 * 1024
+) -> Iterator[Dict]:
+    """ iterate HAR log entries one by one without loading the whole HAR file into memory,
+        only one entry is kept in memory at a time.
+
+    Args:
+        file_path (str)
+        chunk_size (int): size of content read from HAR file each time
+
+    Yields:
+        dict: entry
+            {
+                "request": {},
+                "response": {}
+            }
+
+    """
+    entries_found = False
+    with open(file_path, mode="r", encoding="utf-8-sig") as f:
+        reader = _JsonStreamReader(f, chunk_size)
+        try:
+            for key in reader.iter_object_keys():
+                if key != "log":
+                    reader.decode_value()
+                    continue
+
+                for log_key in reader.iter_object_keys():
+                    if log_key != "entries":
+                        reader.decode_value()
+                        continue
+
+                    entries_found = True
+                    yield from reader.iter_array_items()
+
+                # no need to parse the rest of HAR file
+                break
+        except (JSONDecodeError, UnicodeDecodeError) as ex:
+            logger.error(f"failed to load HAR file {file_path}: {ex}")
+            sys.exit(1)
+
+    if not entries_found:
+        logger.error(f"log entries not found in HAR file: {file_path}")
+        sys.exit(1)
+
+
 def load_har_log_entries(file_path):
     """ load HAR file and return log entries list
 
@@ -27,16 +177,48 @@ def load_har_log_entries(file_path):
             ]
 
     """
-    with open(file_path, mode="rb") as f:
-        try:
-            content_json = json.load(f)
-            return content_json["log"]["entries"]
-        except (TypeError, JSONDecodeError) as ex:
-            logger.error(f"failed to load HAR file {file_path}: {ex}")
-            sys.exit(1)
-        except KeyError:
-            logger.error(f"log entries not found in HAR file: {content_json}")
-            sys.exit(1)
+    return list(iter_har_log_entries(file_path))
+
+
+# e.g. 2020-03-11T09:35:19.853+08:00, 2020-03-11T01:35:19.853Z, 2020-03-11T01:35:19
+DATE_TIME_REGEX = re.compile(
+    r"^(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})(\.\d+)?(Z|[+-]\d{2}:?\d{2})?$"
+)
+
+
+def parse_iso_timestamp(date_time: Text) -> float:
+    """ parse ISO 8601 date time of HAR entry to unix timestamp,
+        date time without offset is regarded as UTC
+
+    Examples:
+        >>> parse_iso_timestamp("2020-03-11T09:35:19.853+08:00")
+        1583890519.853
+
+    Raises:
+        ValueError: invalid date time format
+        TypeError: date time is not a string
+
+    """
+    if not isinstance(date_time, str):
+        raise TypeError(f"ISO date time should be a string, got: {date_time!r}")
+
+    matched = DATE_TIME_REGEX.match(date_time.strip())
+    if not matched:
+        raise ValueError(f"invalid ISO date time: {date_time}")
+
+    # %z with colon and datetime.fromisoformat are not supported in python 3.6
+    date_time_str, fraction, offset = matched.groups()
+    timestamp = calendar.timegm(
+        datetime.strptime(date_time_str, "%Y-%m-%dT%H:%M:%S").timetuple()
+    )
+    if fraction:
+        timestamp += float(fraction)
+    if offset and offset != "Z":
+        sign = -1 if offset[0] == "-" else 1
+        offset = offset[1:].replace(":", "")
+        timestamp -= sign * (int(offset[:2]) * 3600 + int(offset[2:]) * 60)
+
+    return timestamp
 
 
 def x_www_form_urlencoded(post_data):
@@ -128,3 +310,58 @@ def dump_json(testcase, json_file):
         outfile.write(my_json_str)
 
     logger.info("Generate JSON testcase successfully: {}".format(json_file))
+
+
+class JsonTestcaseWriter(object):
+    """ write testcase to JSON file step by step, output is the same as dump_json
+    """
+
+    def __init__(self, json_file: Text, config: Dict):
+        self.path = json_file
+        self.steps_count = 0
+        self.__file = open(json_file, "w", encoding="utf-8")
+        # {"config": {...}} => {"config": {...},
+        config_str = json.dumps({"config": config}, ensure_ascii=False, indent=4)
+        self.__file.write(config_str[: -len("\n}")] + ',\n    "teststeps": [')
+
+    def add_teststep(self, teststep: Dict):
+        teststep_str = json.dumps(teststep, ensure_ascii=False, indent=4)
+        prefix = ",\n" if self.steps_count else "\n"
+        self.__file.write(prefix + textwrap.indent(teststep_str, " " * 8))
+        self.steps_count += 1
+
+    def close(self):
+        self.__file.write("\n    ]\n}" if self.steps_count else "]\n}")
+        self.__file.close()
+        logger.info(f"Generate JSON testcase successfully: {self.path}")
+
+
+class YamlTestcaseWriter(object):
+    """ write testcase to YAML file step by step, output is the same as dump_yaml
+    """
+
+    def __init__(self, yaml_file: Text, config: Dict):
+        self.path = yaml_file
+        self.steps_count = 0
+        self.__file = open(yaml_file, "w", encoding="utf-8")
+        self.__dump({"config": config})
+
+    def __dump(self, data):
+        yaml.dump(
+            data, self.__file, allow_unicode=True, default_flow_style=False, indent=4
+        )
+
+    def add_teststep(self, teststep: Dict):
+        if not self.steps_count:
+            self.__file.write("teststeps:\n")
+
+        # sequence in mapping is not indented by PyYAML
+        self.__dump([teststep])
+        self.steps_count += 1
+
+    def close(self):
+        if not self.steps_count:
+            self.__file.write("teststeps: []\n")
+
+        self.__file.close()
+        logger.info(f"Generate YAML testcase successfully: {self.path}")
@@ -70,11 +70,9 @@ def prepare_locust_tests() -> List:
 def main_locusts():
     """ locusts entrance
     """
-    from httprunner.utils import init_sentry_sdk
-    from sentry_sdk import capture_message
+    from httprunner import telemetry
 
-    init_sentry_sdk()
-    capture_message("start to run locusts")
+    telemetry.capture_message("start to run locusts")
 
     # avoid print too much log details in console
     logger.remove()
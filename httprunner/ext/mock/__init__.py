@@ -0,0 +1,96 @@
+""" Mock HTTP server for HttpRunner, routes and responses are loaded from
+YAML/JSON testcases, HAR files or recorded sessions (summary.json).
+
+Usage:
+    # serve responses made from validators and extractors of testcases
+    $ hrun mock testcases/ --port 8080
+
+    # replay recorded responses of HAR file and summary of former run
+    $ hrun mock demo.har logs/all.summary.json
+
+    # respond with 10~50ms latency, 1% of 503 error and 0.1% of connection reset
+    $ hrun mock testcases/ --latency uniform:10,50 --error 503:0.01 --error reset:0.001
+
+"""
+
+import sys
+
+from loguru import logger
+
+
+def init_mock_parser(subparsers):
+    """ mock server: parse command line options and run commands.
+    """
+    parser = subparsers.add_parser(
+        "mock",
+        help="Start mock HTTP server with responses of testcases, HAR files or summary.json.",
+    )
+    parser.add_argument(
+        "mock_source",
+        nargs="*",
+        help="Specify testcase files/folders, HAR files or summary.json of recorded sessions",
+    )
+    parser.add_argument(
+        "--host", default="127.0.0.1", help="Specify bind host, default to 127.0.0.1."
+    )
+    parser.add_argument(
+        "--port", type=int, default=8080, help="Specify bind port, default to 8080."
+    )
+    parser.add_argument(
+        "--latency",
+        help="Specify latency in milliseconds, e.g. 50, fixed:50, uniform:10,100, "
+        "normal:50,10 or exponential:30.",
+    )
+    parser.add_argument(
+        "--error",
+        action="append",
+        default=[],
+        help="Inject error response or connection reset by rate, e.g. 503:0.01 or reset:0.001, "
+        "can be specified multiple times.",
+    )
+
+    return parser
+
+
+def main_mock(args):
+    if not args.mock_source:
+        logger.error("mock source not specified.")
+        sys.exit(1)
+
+    # import when serving, keep parser initialization light for cli
+    from httprunner.ext.mock.core import (
+        ErrorInjector,
+        Latency,
+        MockServer,
+        load_routes,
+        parse_error_arg,
+    )
+
+    try:
+        latency = Latency.parse(args.latency) if args.latency else None
+        errors = ErrorInjector([parse_error_arg(arg) for arg in args.error])
+    except ValueError as ex:
+        logger.error(ex)
+        sys.exit(1)
+
+    routes = load_routes(args.mock_source)
+    if not len(routes):
+        logger.error(f"no mock routes loaded from {args.mock_source}")
+        sys.exit(1)
+
+    for route in routes:
+        logger.debug(f"{route.method} {route.path}: {len(route.responses)} response(s)")
+
+    server = MockServer((args.host, args.port), routes, latency, errors)
+    logger.info(
+        f"mock server with {len(routes)} routes listening on "
+        f"http://{args.host}:{server.server_port}, press Ctrl+C to stop"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+    return 0
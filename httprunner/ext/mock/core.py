@@ -0,0 +1,618 @@
+import base64
+import itertools
+import json
+import os
+import random
+import re
+import socket
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Text, Tuple, Union
+from urllib.parse import urlparse
+
+from loguru import logger
+
+from httprunner import exceptions
+from httprunner.backports import ThreadingHTTPServer
+from httprunner.loader import load_folder_files, load_test_file
+from httprunner.response import uniform_validator
+
+# headers computed by mock server itself, recorded values are dropped
+HOP_BY_HOP_HEADERS = {
+    "connection",
+    "content-encoding",
+    "content-length",
+    "date",
+    "keep-alive",
+    "server",
+    "transfer-encoding",
+}
+
+# $var or ${var} in url path of testcase
+VARIABLE_REGEX = re.compile(r"\$\{\w+\}|\$\w+")
+# jmespath segment which can be converted to dict key, e.g. body.data.token
+KEY_REGEX = re.compile(r"^[A-Za-z_][\w-]*$")
+
+RESET = "reset"
+
+# expected value referencing unknown variables
+UNRESOLVED = object()
+
+
+class MockResponse(NamedTuple):
+    status_code: int
+    headers: Dict[Text, Text]
+    body: bytes
+
+
+def make_mock_response(
+    status_code: int = 200, headers: Dict = None, body: Any = None
+) -> MockResponse:
+    """ make mock response, dict/list body is dumped as JSON
+    """
+    headers = {
+        key: str(value)
+        for key, value in (headers or {}).items()
+        if key.lower() not in HOP_BY_HOP_HEADERS
+    }
+    lower_keys = {key.lower() for key in headers}
+
+    if body is None:
+        body = b""
+    elif isinstance(body, (dict, list, bool, int, float)):
+        body = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        if "content-type" not in lower_keys:
+            headers["Content-Type"] = "application/json; charset=utf-8"
+    elif isinstance(body, str):
+        body = body.encode("utf-8")
+        if "content-type" not in lower_keys:
+            headers["Content-Type"] = "text/plain; charset=utf-8"
+
+    return MockResponse(int(status_code), headers, body)
+
+
+def get_path_template(url: Text) -> Text:
+    """ get path of request url, leading base url is ignored
+
+    Examples:
+        >>> get_path_template("https://httprunner.top/api/users?page=1")
+        "/api/users"
+        >>> get_path_template("${base_url}/api/users/$user_id")
+        "/api/users/$user_id"
+
+    """
+    if url.startswith("$"):
+        # strip leading base url variable, e.g. $base_url/api/users
+        match = VARIABLE_REGEX.match(url)
+        if match and url[match.end() :].startswith("/"):
+            url = url[match.end() :]
+
+    path = urlparse(url).path if "://" in url else url.split("?", 1)[0]
+    if not path.startswith("/"):
+        path = "/" + path
+
+    return path
+
+
+class MockRoute(object):
+    """ responses of request method and path, path may contain variables as wildcard.
+        responses are returned in turn if route is recorded multiple times.
+    """
+
+    def __init__(self, method: Text, path: Text):
+        self.method = method.upper()
+        self.path = path
+        self.responses: List[MockResponse] = []
+        self.__counter = itertools.count()
+
+        self.regex = None
+        if VARIABLE_REGEX.search(path):
+            # /users/$user_id/orders => ^/users/[^/]+/orders$
+            pattern = "[^/]+".join(
+                re.escape(part) for part in VARIABLE_REGEX.split(path)
+            )
+            self.regex = re.compile(f"^{pattern}$")
+
+    def add_response(self, response: MockResponse):
+        self.responses.append(response)
+
+    def next_response(self) -> MockResponse:
+        if len(self.responses) == 1:
+            return self.responses[0]
+
+        # itertools.count is thread safe in CPython
+        return self.responses[next(self.__counter) % len(self.responses)]
+
+
+class MockRoutes(object):
+    """ route table, exact path is looked up in dict, path with variables in order
+    """
+
+    def __init__(self):
+        self.__exact: Dict[Tuple[Text, Text], MockRoute] = {}
+        self.__templates: List[MockRoute] = []
+        self.__all: Dict[Tuple[Text, Text], MockRoute] = {}
+
+    def __len__(self):
+        return len(self.__all)
+
+    def __iter__(self) -> Iterator[MockRoute]:
+        return iter(self.__all.values())
+
+    def add(self, method: Text, path: Text, response: MockResponse) -> MockRoute:
+        key = (method.upper(), path)
+        route = self.__all.get(key)
+        if route is None:
+            route = self.__all[key] = MockRoute(method, path)
+            if route.regex is None:
+                self.__exact[key] = route
+            else:
+                self.__templates.append(route)
+
+        route.add_response(response)
+        return route
+
+    def match(self, method: Text, path: Text) -> Optional[MockRoute]:
+        route = self.__exact.get((method, path))
+        if route is not None:
+            return route
+
+        for route in self.__templates:
+            if route.method == method and route.regex.match(path):
+                return route
+
+        return None
+
+
+def _set_json_path(data: Dict, keys: List[Text], value: Any):
+    for key in keys[:-1]:
+        child = data.get(key)
+        if not isinstance(child, dict):
+            child = data[key] = {}
+        data = child
+
+    data.setdefault(keys[-1], value)
+
+
+def _get_body_keys(jmespath: Text) -> Optional[List[Text]]:
+    """ body.data.token => ["data", "token"], None if not supported
+    """
+    keys = jmespath.split(".")
+    if keys[0] != "body" or len(keys) < 2:
+        return None
+    if not all(KEY_REGEX.match(key) for key in keys[1:]):
+        return None
+    return keys[1:]
+
+
+def _resolve_expect_value(value: Any, variables: Dict) -> Any:
+    """ resolve expected value which is exactly one known variable, e.g. $token
+    """
+    if not isinstance(value, str) or "$" not in value:
+        return value
+
+    match = VARIABLE_REGEX.fullmatch(value)
+    if match:
+        var_name = value.lstrip("$").strip("{}")
+        if var_name in variables:
+            return variables[var_name]
+
+    return UNRESOLVED
+
+
+def make_response_from_teststep(
+    teststep: Dict, variables: Dict = None
+) -> MockResponse:
+    """ make mock response which passes eq validators and extractors of teststep
+
+    Args:
+        teststep (dict): teststep of testcase content
+        variables (dict): known variables, expected value referencing them is resolved.
+            extracted variables are updated with mock values.
+
+    """
+    variables = {} if variables is None else variables
+    status_code = 200
+    headers = {}
+    body = None
+    body_fields = {}
+
+    for validator in teststep.get("validate", []):
+        try:
+            validator = uniform_validator(validator)
+        except exceptions.ParamsError:
+            continue
+        if validator["assert"] != "equal":
+            continue
+
+        check_item = validator["check"]
+        expect_value = _resolve_expect_value(validator["expect"], variables)
+        if not isinstance(check_item, str) or expect_value is UNRESOLVED:
+            continue
+
+        if check_item == "status_code":
+            status_code = expect_value
+        elif check_item.startswith("headers."):
+            # headers."Content-Type" => Content-Type
+            headers[check_item[len("headers.") :].strip('"')] = expect_value
+        elif check_item == "body":
+            body = expect_value
+        else:
+            keys = _get_body_keys(check_item)
+            if keys:
+                _set_json_path(body_fields, keys, expect_value)
+
+    extractors = teststep.get("extract", {})
+    for var_name, jmespath in extractors.items():
+        keys = _get_body_keys(jmespath) if isinstance(jmespath, str) else None
+        if keys:
+            _set_json_path(body_fields, keys, f"mock-{var_name}")
+            variables[var_name] = f"mock-{var_name}"
+
+    if body is None and body_fields:
+        body = body_fields
+    elif isinstance(body, dict):
+        for key, value in body_fields.items():
+            body.setdefault(key, value)
+
+    return make_mock_response(status_code, headers, body)
+
+
+def load_routes_from_testcase(testcase: Dict, routes: MockRoutes) -> int:
+    """ load routes from teststeps of YAML/JSON testcase content,
+        responses are made from validators and extractors.
+    """
+    def literal_variables(mapping) -> Dict:
+        if not isinstance(mapping, dict):
+            return {}
+        return {
+            key: value
+            for key, value in mapping.items()
+            if not (isinstance(value, str) and "$" in value)
+        }
+
+    config = testcase.get("config") or {}
+    variables = literal_variables(config.get("variables"))
+
+    count = 0
+    for teststep in testcase.get("teststeps", []):
+        request = teststep.get("request")
+        if not isinstance(request, dict) or "url" not in request:
+            # teststep referenced testcase, or invalid format
+            continue
+
+        step_variables = {**variables, **literal_variables(teststep.get("variables"))}
+        response = make_response_from_teststep(teststep, step_variables)
+        # extracted variables are shared by subsequent teststeps
+        for var_name in teststep.get("extract") or {}:
+            if var_name in step_variables:
+                variables[var_name] = step_variables[var_name]
+
+        method = request.get("method", "GET")
+        path = get_path_template(request["url"])
+        routes.add(method, path, response)
+        count += 1
+
+    return count
+
+
+def make_response_from_har_entry(entry: Dict) -> MockResponse:
+    response = entry["response"]
+    headers = {
+        item["name"]: item.get("value", "") for item in response.get("headers", [])
+    }
+    content = response.get("content", {})
+    text = content.get("text") or ""
+    if content.get("encoding") == "base64":
+        body = base64.b64decode(text)
+    else:
+        body = text.encode("utf-8")
+
+    if content.get("mimeType"):
+        headers.setdefault("Content-Type", content["mimeType"])
+
+    return make_mock_response(response.get("status") or 200, headers, body)
+
+
+def load_routes_from_har(har_file: Text, routes: MockRoutes) -> int:
+    """ load routes from HAR entries, recorded responses are replayed
+    """
+    from httprunner.ext.har2case.utils import iter_har_log_entries
+
+    count = 0
+    for entry in iter_har_log_entries(har_file):
+        request = entry["request"]
+        routes.add(
+            request["method"],
+            get_path_template(request["url"]),
+            make_response_from_har_entry(entry),
+        )
+        count += 1
+
+    return count
+
+
+def _iter_req_resps(step_datas: List[Dict]) -> Iterator[Dict]:
+    for step_data in step_datas:
+        data = step_data.get("data")
+        if isinstance(data, list):
+            # referenced testcase
+            yield from _iter_req_resps(data)
+        elif isinstance(data, dict):
+            yield from data.get("req_resps", [])
+
+
+def load_routes_from_summary(summary_file: Text, routes: MockRoutes) -> int:
+    """ load routes from request & response records of recorded session, i.e. summary.json
+    """
+    from httprunner.summary import iter_summary_details
+
+    count = 0
+    for testcase_summary in iter_summary_details(summary_file):
+        step_datas = testcase_summary.get("records") or testcase_summary.get(
+            "step_datas", []
+        )
+        for req_resp in _iter_req_resps(step_datas):
+            request, response = req_resp["request"], req_resp["response"]
+            if not response.get("status_code"):
+                # request failed without response
+                continue
+
+            routes.add(
+                request["method"],
+                get_path_template(request["url"]),
+                make_mock_response(
+                    response["status_code"],
+                    response.get("headers"),
+                    response.get("body"),
+                ),
+            )
+            count += 1
+
+    return count
+
+
+def load_routes(paths: List[Text]) -> MockRoutes:
+    """ load routes from testcase files/folders, HAR files and summary files.
+        the former route is replayed first if loaded multiple times.
+    """
+    routes = MockRoutes()
+    for path in paths:
+        if os.path.isdir(path):
+            files = sorted(
+                file_path
+                for file_path in load_folder_files(path)
+                if not file_path.endswith(".py")
+            )
+        else:
+            files = [path]
+
+        for file_path in files:
+            if file_path.lower().endswith(".har"):
+                count = load_routes_from_har(file_path, routes)
+            elif file_path.lower().endswith(".summary.json"):
+                count = load_routes_from_summary(file_path, routes)
+            else:
+                try:
+                    content = load_test_file(file_path)
+                except exceptions.MyBaseError as ex:
+                    logger.warning(f"skip invalid mock source {file_path}: {ex}")
+                    continue
+
+                if isinstance(content, dict) and "details" in content:
+                    count = load_routes_from_summary(file_path, routes)
+                elif isinstance(content, dict):
+                    count = load_routes_from_testcase(content, routes)
+                else:
+                    count = 0
+
+            logger.info(f"loaded {count} mock responses from {file_path}")
+
+    return routes
+
+
+class Latency(object):
+    """ latency distribution of responses, in milliseconds
+
+    Examples:
+        >>> Latency.parse("50")                 # fixed 50ms
+        >>> Latency.parse("uniform:10,100")     # uniform between 10ms and 100ms
+        >>> Latency.parse("normal:50,10")       # normal with mean 50ms and stdev 10ms
+        >>> Latency.parse("exponential:30")     # exponential with mean 30ms
+
+    """
+
+    DISTRIBUTIONS = {"fixed": 1, "uniform": 2, "normal": 2, "exponential": 1}
+
+    def __init__(self, distribution: Text = "fixed", params: Tuple[float, ...] = (0,)):
+        self.distribution = distribution
+        self.params = params
+
+    @classmethod
+    def parse(cls, spec: Text) -> "Latency":
+        distribution, sep, params_str = spec.partition(":")
+        if not sep:
+            distribution, params_str = "fixed", spec
+
+        if distribution not in cls.DISTRIBUTIONS:
+            raise ValueError(
+                f"invalid latency: {spec}, distribution should be one of "
+                f"{list(cls.DISTRIBUTIONS)}"
+            )
+
+        try:
+            params = tuple(float(param) for param in params_str.split(","))
+        except ValueError:
+            raise ValueError(f"invalid latency: {spec}, params should be numbers")
+
+        if len(params) != cls.DISTRIBUTIONS[distribution] or min(params) < 0:
+            raise ValueError(
+                f"invalid latency: {spec}, {distribution} expects "
+                f"{cls.DISTRIBUTIONS[distribution]} non-negative param(s)"
+            )
+
+        return cls(distribution, params)
+
+    def sample(self) -> float:
+        """ sample latency in seconds
+        """
+        if self.distribution == "fixed":
+            ms = self.params[0]
+        elif self.distribution == "uniform":
+            ms = random.uniform(*self.params)
+        elif self.distribution == "normal":
+            ms = max(0.0, random.gauss(*self.params))
+        else:
+            ms = random.expovariate(1 / self.params[0]) if self.params[0] else 0
+
+        return ms / 1000
+
+
+def parse_error_arg(arg: Text) -> Tuple[Union[int, Text], float]:
+    """ parse error injection argument, STATUS:RATE or reset:RATE
+
+    Examples:
+        >>> parse_error_arg("503:0.05")
+        (503, 0.05)
+        >>> parse_error_arg("reset:0.01")
+        ("reset", 0.01)
+
+    """
+    error, sep, rate_str = arg.partition(":")
+    try:
+        rate = float(rate_str)
+        error = error if error == RESET else int(error)
+    except ValueError:
+        raise ValueError(
+            f"invalid error injection: {arg}, should be in format STATUS:RATE or reset:RATE"
+        )
+
+    if not sep or not 0 <= rate <= 1:
+        raise ValueError(
+            f"invalid error injection: {arg}, rate should be between 0 and 1"
+        )
+
+    return error, rate
+
+
+class ErrorInjector(object):
+    """ inject error responses or connection resets by rates
+    """
+
+    def __init__(self, errors: List[Tuple[Union[int, Text], float]] = None):
+        self.errors = errors or []
+        if sum(rate for _, rate in self.errors) > 1:
+            raise ValueError("sum of error injection rates should not exceed 1")
+
+    def pick(self) -> Union[int, Text, None]:
+        """ pick error to inject for one request, None for normal response
+        """
+        if not self.errors:
+            return None
+
+        point = random.random()
+        for error, rate in self.errors:
+            if point < rate:
+                return error
+            point -= rate
+
+        return None
+
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "MockServer"
+
+    def handle_mock(self):
+        content_length = int(self.headers.get("Content-Length") or 0)
+        if content_length:
+            self.rfile.read(content_length)
+        if self.headers.get("Transfer-Encoding"):
+            # chunked request body is not consumed, do not reuse connection
+            self.close_connection = True
+
+        server = self.server
+        if server.latency is not None:
+            time.sleep(server.latency.sample())
+
+        error = server.errors.pick()
+        if error == RESET:
+            # close with RST instead of FIN, client gets connection reset error
+            self.connection.setsockopt(
+                socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0)
+            )
+            self.close_connection = True
+            return
+
+        path = self.path.split("?", 1)[0]
+        route = server.routes.match(self.command, path)
+        if error is not None:
+            response = make_mock_response(error, body={"error": "injected error"})
+        elif route is None:
+            response = make_mock_response(
+                404,
+                body={
+                    "error": "mock route not found",
+                    "method": self.command,
+                    "path": path,
+                },
+            )
+        else:
+            response = route.next_response()
+
+        self.send_response(response.status_code)
+        for key, value in response.headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(response.body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(response.body)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = handle_mock
+    do_HEAD = do_OPTIONS = handle_mock
+
+    def log_message(self, format, *args):
+        # logging each request slows down mock server
+        pass
+
+
+class MockServer(ThreadingHTTPServer):
+    """ mock HTTP server, one thread per connection with HTTP keep-alive
+    """
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(
+        self,
+        server_address: Tuple[Text, int],
+        routes: MockRoutes,
+        latency: Latency = None,
+        errors: ErrorInjector = None,
+    ):
+        super().__init__(server_address, MockRequestHandler)
+        self.routes = routes
+        self.latency = latency
+        self.errors = errors or ErrorInjector()
+
+
+def start_mock_server(
+    routes: MockRoutes,
+    host: Text = "127.0.0.1",
+    port: int = 0,
+    latency: Latency = None,
+    errors: ErrorInjector = None,
+) -> MockServer:
+    """ start mock server in background thread, port 0 picks an unused port
+
+    Examples:
+        >>> server = start_mock_server(load_routes(["testcases/"]))
+        >>> base_url = f"http://127.0.0.1:{server.server_port}"
+        >>> server.shutdown()
+
+    """
+    server = MockServer((host, port), routes, latency, errors)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
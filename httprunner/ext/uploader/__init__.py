@@ -102,16 +102,19 @@ def prepare_upload_step(step: TStep, functions: FunctionsMapping) -> "NoReturn":
         return
 
     ensure_upload_ready()
+    upload_variables = {}
     params_list = []
     for key, value in step.request.upload.items():
-        step.variables[key] = value
+        upload_variables[key] = value
         params_list.append(f"{key}=${key}")
 
     params_str = ", ".join(params_list)
-    step.variables["m_encoder"] = "${multipart_encoder(" + params_str + ")}"
+    upload_variables["m_encoder"] = "${multipart_encoder(" + params_str + ")}"
 
-    # parse variables
-    step.variables = parse_variables_mapping(step.variables, functions)
+    # parse upload variables, step variables are referenced without being parsed again
+    step.variables.update(
+        parse_variables_mapping(upload_variables, functions, step.variables)
+    )
 
     step.request.headers["Content-Type"] = "${multipart_content_type($m_encoder)}"
 
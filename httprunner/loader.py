@@ -16,6 +16,7 @@ import importlib    # 内置库 处理动态导包
 import json     # 内置库 json 处理
 import os       # 内置库 操作系统
 import sys      # 内置库 系统相关的参数和函数
+import threading
 import types        # 内置库 动态类型创建和内置类型名称
 from typing import Tuple, Dict, Union, Text, List, Callable
 
@@ -139,6 +140,45 @@ def load_testcase_file(testcase_file: Text) -> TestCase:
     return testcase_obj
 
 
+# absolute path of testcase file => (mtime in ns, TestCase)
+_testcase_file_cache: Dict[Text, Tuple[int, TestCase]] = {}
+_testcase_file_cache_lock = threading.Lock()
+
+
+def copy_testcase(testcase: TestCase) -> TestCase:
+    """ copy testcase for one run, only config and teststeps with their variables are copied,
+        other parts (request, validators, etc.) are shared since runner does not modify them.
+    """
+    config = testcase.config.copy()
+    if isinstance(config.variables, dict):
+        config.variables = dict(config.variables)
+
+    teststeps = []
+    for step in testcase.teststeps:
+        step = step.copy()
+        step.variables = dict(step.variables)
+        teststeps.append(step)
+
+    return TestCase.construct(config=config, teststeps=teststeps)
+
+
+def load_testcase_file_cached(testcase_file: Text) -> TestCase:
+    """
+    读取 testcase 文件, 按绝对路径缓存解析校验后的 TestCase, 文件修改时间变化后重新加载
+    返回的是 copy_testcase 复制的对象, 可以被 runner 修改
+    """
+    abs_path = os.path.abspath(testcase_file)
+    mtime = os.stat(abs_path).st_mtime_ns
+    cached = _testcase_file_cache.get(abs_path)
+    if cached is None or cached[0] != mtime:
+        testcase_obj = load_testcase_file(testcase_file)
+        cached = (mtime, testcase_obj)
+        with _testcase_file_cache_lock:
+            _testcase_file_cache[abs_path] = cached
+
+    return copy_testcase(cached[1])
+
+
 def load_testsuite(testsuite: Dict) -> TestSuite:
     """
     测试套件，将套件字典 加载成TestSuite对象
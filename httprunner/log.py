@@ -0,0 +1,312 @@
+# 日志级别控制: 热路径中先判断日志级别是否生效再格式化, 避免无效的字符串拼接和 json 序列化
+"""
+日志级别可通过 hrun 参数或环境变量指定, 对控制台和每个 testcase 的日志文件同时生效:
+
+    $ hrun examples/ --hrun-log-level WARNING
+    $ HRUN_LOG_LEVEL=QUIET pytest examples/
+
+QUIET 模式仅输出错误日志, 每个请求的详情日志完全不会被格式化。
+
+每个 testcase 的日志文件由全局唯一的 sink 写入: 日志记录按当前上下文中的 testcase 日志路径分流,
+放入队列后由后台线程批量追加到对应文件, 运行 testcase 时不再反复添加和移除 loguru sink。
+
+"""
+import atexit
+import os
+import queue
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import IO, Dict, List, Text, Tuple
+
+from loguru import logger
+
+from httprunner.backports import ContextVar
+from httprunner.utils import pop_cli_option
+
+LOG_LEVEL_ENV = "HRUN_LOG_LEVEL"
+LOG_LEVEL_ARG = "--hrun-log-level"
+QUIET = "QUIET"
+LOG_LEVELS = ["TRACE", "DEBUG", "INFO", "SUCCESS", "WARNING", "ERROR", "CRITICAL", QUIET]
+
+# level name => level no, e.g. DEBUG => 10
+_level_no_cache: Dict[Text, int] = {}
+_configured_level: Text = ""
+
+# log file path of testcase running in current thread/context, empty if not in testcase
+_case_log_path: ContextVar = ContextVar("hrun_case_log_path", default="")
+
+
+def get_level_no(level: Text) -> int:
+    if level not in _level_no_cache:
+        _level_no_cache[level] = logger.level(level).no
+
+    return _level_no_cache[level]
+
+
+def is_enabled(level: Text) -> bool:
+    """ check if log record of level will be handled by any sink,
+        log message should only be formatted if enabled.
+        testcase log sink only counts when running in testcase context.
+    """
+    try:
+        level_no = get_level_no(level)
+        if _get_min_level_without_case_sink() <= level_no:
+            return True
+        return (
+            _case_sink_id is not None
+            and _case_log_path.get() != ""
+            and _case_sink_level_no <= level_no
+        )
+    except (AttributeError, ValueError):
+        # private api of loguru changed, always format log message
+        return True
+
+
+# (handlers of loguru, min level of handlers except testcase log sink)
+_min_level_cache: Tuple[Dict, float] = (None, float("inf"))
+
+
+def _get_min_level_without_case_sink() -> float:
+    global _min_level_cache
+
+    # handlers dict of loguru is copied on write, cache by identity
+    handlers = logger._core.handlers
+    if _min_level_cache[0] is not handlers:
+        min_level = min(
+            (
+                handler.levelno
+                for handler_id, handler in handlers.items()
+                if handler_id != _case_sink_id
+            ),
+            default=float("inf"),
+        )
+        _min_level_cache = (handlers, min_level)
+
+    return _min_level_cache[1]
+
+
+def get_log_level() -> Text:
+    """ get log level specified by HRUN_LOG_LEVEL, empty string if not specified
+    """
+    level = os.getenv(LOG_LEVEL_ENV, "").upper()
+    if level == QUIET:
+        return "ERROR"
+
+    return level
+
+
+def get_testcase_log_level() -> Text:
+    """ log level of testcase log file, default to DEBUG
+    """
+    return get_log_level() or "DEBUG"
+
+
+def setup_logger(level: Text = None):
+    """ set log level of console output, level is passed to pytest via HRUN_LOG_LEVEL.
+        default console sink of loguru is replaced, do nothing if level not specified.
+    """
+    global _configured_level
+
+    if level:
+        os.environ[LOG_LEVEL_ENV] = level.upper()
+
+    log_level = get_log_level()
+    if not log_level or log_level == _configured_level:
+        return
+
+    logger.remove()
+    logger.add(sys.stderr, level=log_level)
+    _configured_level = log_level
+
+
+def pop_log_level_arg(args: List[Text]) -> Tuple[List[Text], Text]:
+    """ pop log level argument from cli args, which should not be passed to pytest
+
+    Examples:
+        >>> pop_log_level_arg(["demo_test.py", "--hrun-log-level", "WARNING"])
+        (["demo_test.py"], "WARNING")
+
+    """
+    remaining_args, values = pop_cli_option(args, LOG_LEVEL_ARG, "log level")
+    level = values[-1].upper() if values else ""
+    if level and level not in LOG_LEVELS:
+        raise ValueError(f"invalid log level: {level}, choices: {LOG_LEVELS}")
+
+    return remaining_args, level
+
+
+class CaseLogWriter(object):
+    """ loguru sink which writes records to log file of current testcase.
+        records are queued and appended to files in a daemon thread, at most
+        max_open_files files are kept open, the least recently used one is closed.
+
+    Args:
+        max_open_files: max log files kept open
+        maxsize: max records waiting to be written, emitting blocks when queue is full
+
+    """
+
+    def __init__(self, max_open_files: int = 32, maxsize: int = 10000):
+        self.max_open_files = max_open_files
+        self.__queue = queue.Queue(maxsize=maxsize)
+        self.__files: Dict[Text, IO] = OrderedDict()
+        self.__thread = None
+        self.__lock = threading.Lock()
+
+    def write(self, message):
+        log_path = _case_log_path.get()
+        if log_path:
+            self.__put((log_path, str(message)))
+
+    def close(self, log_path: Text):
+        """ close log file of testcase when it finishes, file will be reopened in append mode if needed
+        """
+        self.__put((log_path, None))
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """ wait until queued records are written and flushed to files, return False if timeout
+        """
+        if self.__thread is None:
+            return True
+
+        self.__put(("", None))
+        deadline = time.time() + timeout
+        while self.__queue.unfinished_tasks:
+            if time.time() >= deadline:
+                return False
+            time.sleep(0.005)
+
+        return True
+
+    def __put(self, item: Tuple[Text, Text]):
+        if self.__thread is None:
+            self.__start()
+
+        self.__queue.put(item)
+
+    def __start(self):
+        with self.__lock:
+            if self.__thread is not None:
+                return
+
+            self.__thread = threading.Thread(
+                target=self.__run, name="hrun-case-log", daemon=True
+            )
+            self.__thread.start()
+
+    def __run(self):
+        while True:
+            # write all queued records in one batch
+            items = [self.__queue.get()]
+            while len(items) < 1000:
+                try:
+                    items.append(self.__queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            for log_path, message in items:
+                try:
+                    if message is not None:
+                        self.__get_file(log_path).write(message)
+                    elif log_path:
+                        self.__close_file(log_path)
+                    else:
+                        for file in self.__files.values():
+                            file.flush()
+                except Exception as ex:
+                    # logging failure should never break tests
+                    sys.stderr.write(f"failed to write testcase log {log_path}: {ex}\n")
+
+            for _ in items:
+                self.__queue.task_done()
+
+    def __get_file(self, log_path: Text) -> IO:
+        if log_path in self.__files:
+            self.__files.move_to_end(log_path)
+            return self.__files[log_path]
+
+        if len(self.__files) >= self.max_open_files:
+            _, file = self.__files.popitem(last=False)
+            file.close()
+
+        log_dir = os.path.dirname(log_path)
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+
+        file = open(log_path, "a", encoding="utf-8")
+        self.__files[log_path] = file
+        return file
+
+    def __close_file(self, log_path: Text):
+        file = self.__files.pop(log_path, None)
+        if file is not None:
+            file.close()
+
+
+_case_log_writer = CaseLogWriter()
+_case_sink_id = None
+_case_sink_level_no = 0
+_case_sink_lock = threading.Lock()
+atexit.register(_case_log_writer.flush)
+
+
+def _in_case_context(record) -> bool:
+    return _case_log_path.get() != ""
+
+
+def _has_case_sink() -> bool:
+    try:
+        return _case_sink_id in logger._core.handlers
+    except AttributeError:
+        return _case_sink_id is not None
+
+
+def ensure_case_log_sink():
+    """ add the testcase log sink once, it is re-added if log level changed
+        or removed by logger.remove()
+    """
+    global _case_sink_id, _case_sink_level_no
+
+    level_no = get_level_no(get_testcase_log_level())
+    if _has_case_sink() and _case_sink_level_no == level_no:
+        return
+
+    with _case_sink_lock:
+        if _has_case_sink():
+            if _case_sink_level_no == level_no:
+                return
+            logger.remove(_case_sink_id)
+
+        _case_sink_level_no = level_no
+        _case_sink_id = logger.add(
+            _case_log_writer.write, level=level_no, filter=_in_case_context
+        )
+
+
+def get_case_log_path() -> Text:
+    """ get log file path of testcase running in current context
+    """
+    return _case_log_path.get()
+
+
+@contextmanager
+def case_log_context(log_path: Text):
+    """ route log records emitted in this context to log file of testcase,
+        file is closed asynchronously when exited, call flush_case_logs() to wait.
+    """
+    ensure_case_log_sink()
+    token = _case_log_path.set(log_path)
+    try:
+        yield
+    finally:
+        _case_log_path.reset(token)
+        _case_log_writer.close(log_path)
+
+
+def flush_case_logs(timeout: float = 5.0) -> bool:
+    """ wait until all testcase log records are written to files
+    """
+    return _case_log_writer.flush(timeout)
@@ -7,9 +7,8 @@ from typing import Text, List, Tuple, Dict, Set, NoReturn
 
 import jinja2
 from loguru import logger
-from sentry_sdk import capture_exception
 
-from httprunner import exceptions, __version__
+from httprunner import exceptions, telemetry, __version__
 from httprunner.compat import (
     ensure_testcase_v3_api,
     ensure_testcase_v3,
@@ -180,7 +179,7 @@ def format_pytest_with_black(*python_paths: Text) -> NoReturn:
             # 对多个python文件进行格式化
             [subprocess.run(["black", path]) for path in python_paths]
     except subprocess.CalledProcessError as ex:
-        capture_exception(ex)
+        telemetry.capture_exception(ex)
         logger.error(ex)
         sys.exit(1)
     except FileNotFoundError:
@@ -212,6 +211,21 @@ def make_config_chain_style(config: Dict) -> Text:
     if "weight" in config:
         config_chain_style += f'.locust_weight({config["weight"]})'
 
+    if config.get("concurrency", 1) > 1:
+        config_chain_style += f'.concurrency({config["concurrency"]})'
+
+    if config.get("retry"):
+        config_chain_style += f'.retry(**{config["retry"]})'
+
+    if config.get("circuit_breaker"):
+        config_chain_style += f'.circuit_breaker(**{config["circuit_breaker"]})'
+
+    for host_pattern, rate_limit in config.get("rate_limits", {}).items():
+        if isinstance(rate_limit, Dict):
+            config_chain_style += f'.rate_limit("{host_pattern}", **{rate_limit})'
+        else:
+            config_chain_style += f'.rate_limit("{host_pattern}", {rate_limit})'
+
     return config_chain_style
 
 
@@ -275,6 +289,15 @@ def make_teststep_chain_style(teststep: Dict) -> Text:
         variables = teststep["variables"]
         step_info += f".with_variables(**{variables})"
 
+    if teststep.get("cache"):
+        cache = teststep["cache"]
+        step_info += f".with_cache(**{cache})"
+
+    if teststep.get("retry") and teststep.get("request"):
+        # retry of request teststep only
+        retry = teststep["retry"]
+        step_info += f".with_retry(**{retry})"
+
     if "setup_hooks" in teststep:
         setup_hooks = teststep["setup_hooks"]
         for hook in setup_hooks:
@@ -0,0 +1,357 @@
+# 运行指标: 可选的进程内指标注册表, 长时间运行时通过本地 HTTP 端点以 OpenMetrics 文本格式实时暴露
+"""
+启用方式, 指定监听地址 [HOST:]PORT, HOST 默认为 127.0.0.1:
+
+    $ hrun --metrics 9464 testcases/
+    $ hrun --metrics=0.0.0.0:9464 testcases/ -n 4
+
+pytest-xdist 的每个 worker 进程各自监听 PORT + worker 序号, 例如 gw0 => 9464, gw1 => 9465。
+Prometheus 抓取 http://HOST:PORT/metrics, 指标按 testcase、step、method 与状态码类别(2xx/5xx/error)分组:
+
+    hrun_requests_total                 请求数
+    hrun_request_duration_seconds       请求响应时间直方图, 不含重试退避与限流等待
+    hrun_request_retries_total          重试次数
+    hrun_validations_total              校验次数, 按 result(pass/fail) 分组
+
+未启用时 registry 为 None, 埋点处仅多一次模块属性判断。
+
+"""
+import bisect
+import os
+import threading
+from http.server import BaseHTTPRequestHandler
+from typing import ContextManager, Dict, List, Optional, Text, Tuple
+
+from loguru import logger
+
+from httprunner.backports import ContextVar, ThreadingHTTPServer, nullcontext
+from httprunner.utils import pop_cli_option
+
+METRICS_ENV = "HRUN_METRICS_ADDRESS"
+METRICS_ARG = "--metrics"
+METRICS_PATH = "/metrics"
+
+DEFAULT_HOST = "127.0.0.1"
+# seconds, same as default buckets of prometheus client
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelValues = Tuple[Text, ...]
+
+# (testcase name, step name) of running teststep
+_current_labels: ContextVar = ContextVar("hrun_metrics_labels", default=("", ""))
+_null_context = nullcontext()
+
+
+def _escape_label_value(value: Text) -> Text:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _format_labels(names: Tuple[Text, ...], values: LabelValues) -> Text:
+    if not names:
+        return ""
+
+    pairs = ",".join(
+        f'{name}="{_escape_label_value(str(value))}"'
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> Text:
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+class Counter(object):
+    def __init__(self, name: Text, documentation: Text, label_names: Tuple[Text, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, label_values: LabelValues, amount: float = 1):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self, openmetrics: bool) -> List[Text]:
+        # OpenMetrics counter family is named without _total suffix
+        family = self.name if openmetrics else f"{self.name}_total"
+        lines = [f"# HELP {family} {self.documentation}", f"# TYPE {family} counter"]
+        for label_values, value in sorted(self.values.items()):
+            labels = _format_labels(self.label_names, label_values)
+            lines.append(f"{self.name}_total{labels} {_format_value(value)}")
+        return lines
+
+
+class Histogram(object):
+    def __init__(
+        self,
+        name: Text,
+        documentation: Text,
+        label_names: Tuple[Text, ...],
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = tuple(sorted(buckets))
+        # label values => [counts of each bucket and +Inf, sum]
+        self.values: Dict[LabelValues, List] = {}
+
+    def observe(self, label_values: LabelValues, value: float):
+        state = self.values.get(label_values)
+        if state is None:
+            state = self.values[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+
+        state[0][bisect.bisect_left(self.buckets, value)] += 1
+        state[1] += value
+
+    def render(self, openmetrics: bool) -> List[Text]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        bucket_names = self.label_names + ("le",)
+        bucket_bounds = [_format_value(bound) for bound in self.buckets] + ["+Inf"]
+        for label_values, (counts, total) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(bucket_bounds, counts):
+                cumulative += count
+                labels = _format_labels(bucket_names, label_values + (bound,))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+
+            labels = _format_labels(self.label_names, label_values)
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        return lines
+
+
+def get_status_class(status_code: int) -> Text:
+    """ 200 => 2xx, 0 (request failed without response) => error
+    """
+    if not status_code:
+        return "error"
+    return f"{status_code // 100}xx"
+
+
+class MetricsRegistry(object):
+    """ in-process metrics of requests and validations, shared by threads and runners
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        request_labels = ("testcase", "step", "method", "status_class")
+        self.requests = Counter(
+            "hrun_requests", "Requests sent by teststeps.", request_labels
+        )
+        self.request_duration = Histogram(
+            "hrun_request_duration_seconds",
+            "Response time of requests, excluding retry backoff and throttle.",
+            request_labels,
+            buckets,
+        )
+        self.retries = Counter(
+            "hrun_request_retries", "Retries of requests.", request_labels
+        )
+        self.validations = Counter(
+            "hrun_validations",
+            "Validations of teststeps by result.",
+            ("testcase", "step", "result"),
+        )
+        self.__lock = threading.Lock()
+
+    def observe_request(
+        self,
+        method: Text,
+        status_code: int,
+        response_time_ms: float,
+        retry_times: int = 0,
+    ):
+        testcase, step = _current_labels.get()
+        label_values = (testcase, step, method.upper(), get_status_class(status_code))
+        with self.__lock:
+            self.requests.inc(label_values)
+            self.request_duration.observe(label_values, response_time_ms / 1000)
+            if retry_times:
+                self.retries.inc(label_values, retry_times)
+
+    def observe_validation(self, success: bool):
+        label_values = _current_labels.get() + ("pass" if success else "fail",)
+        with self.__lock:
+            self.validations.inc(label_values)
+
+    def render(self, openmetrics: bool = True) -> Text:
+        lines = []
+        with self.__lock:
+            for metric in [
+                self.requests,
+                self.request_duration,
+                self.retries,
+                self.validations,
+            ]:
+                lines.extend(metric.render(openmetrics))
+
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+# None if metrics disabled, checked before observing
+registry: Optional[MetricsRegistry] = None
+server: Optional["MetricsServer"] = None
+_env_checked = False
+
+
+def step(testcase: Text, step_name: Text) -> ContextManager:
+    """ label requests and validations in teststep with testcase and step name
+    """
+    if registry is None:
+        return _null_context
+
+    return _LabelsContext((testcase, step_name))
+
+
+class _LabelsContext(object):
+    __slots__ = ("labels", "token")
+
+    def __init__(self, labels: Tuple[Text, Text]):
+        self.labels = labels
+
+    def __enter__(self):
+        self.token = _current_labels.set(self.labels)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _current_labels.reset(self.token)
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != METRICS_PATH or registry is None:
+            self.send_error(404)
+            return
+
+        openmetrics = "application/openmetrics-text" in self.headers.get("Accept", "")
+        body = registry.render(openmetrics).encode("utf-8")
+        self.send_response(200)
+        self.send_header(
+            "Content-Type",
+            OPENMETRICS_CONTENT_TYPE if openmetrics else PROMETHEUS_CONTENT_TYPE,
+        )
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+def parse_address(address: Text) -> Tuple[Text, int]:
+    """ parse metrics address [HOST:]PORT
+
+    Examples:
+        >>> parse_address("9464")
+        ("127.0.0.1", 9464)
+        >>> parse_address("0.0.0.0:9464")
+        ("0.0.0.0", 9464)
+
+    """
+    host, _, port = address.rpartition(":")
+    try:
+        port = int(port)
+    except ValueError:
+        raise ValueError(
+            f"invalid metrics address: {address}, should be in format [HOST:]PORT"
+        )
+    if not 0 <= port <= 65535:
+        raise ValueError(f"invalid metrics address: {address}, invalid port {port}")
+
+    return host or DEFAULT_HOST, port
+
+
+def pop_metrics_arg(args: List[Text]) -> Tuple[List[Text], Text]:
+    """ pop metrics argument from cli args, which should not be passed to pytest
+
+    Examples:
+        >>> pop_metrics_arg(["demo_test.py", "--metrics", "9464"])
+        (["demo_test.py"], "9464")
+
+    """
+    remaining_args, values = pop_cli_option(args, METRICS_ARG, "[HOST:]PORT")
+    address = values[-1] if values else ""
+    if address:
+        # validate before running testcases
+        parse_address(address)
+
+    return remaining_args, address
+
+
+def set_metrics_address(address: Text):
+    """ pass metrics address to testcases by environment variable,
+        which is inherited by pytest-xdist worker processes.
+    """
+    if address:
+        os.environ[METRICS_ENV] = address
+
+
+def enable(address: Text = None) -> MetricsRegistry:
+    """ enable metrics in current process, serve metrics endpoint if address specified
+    """
+    global registry, server
+
+    if registry is None:
+        registry = MetricsRegistry()
+
+    if address and server is None:
+        server = MetricsServer(parse_address(address), MetricsRequestHandler)
+        threading.Thread(
+            target=server.serve_forever, name="hrun-metrics", daemon=True
+        ).start()
+
+    return registry
+
+
+def disable():
+    global registry, server
+
+    if server is not None:
+        server.shutdown()
+        server.server_close()
+        server = None
+    registry = None
+
+
+def init_from_env():
+    """ enable metrics once per process if metrics address specified by cli,
+        each pytest-xdist worker listens on port offset by its index, e.g. gw1 => PORT + 1
+    """
+    global _env_checked
+
+    if _env_checked:
+        return
+    _env_checked = True
+
+    address = os.getenv(METRICS_ENV)
+    if not address:
+        return
+
+    host, port = parse_address(address)
+    worker = os.getenv("PYTEST_XDIST_WORKER", "")
+    if worker.startswith("gw") and worker[2:].isdigit() and port:
+        port += int(worker[2:])
+
+    try:
+        enable(f"{host}:{port}")
+    except OSError as ex:
+        # metrics should not fail testcases
+        logger.error(f"failed to serve metrics on {host}:{port}: {ex}")
+        disable()
+        return
+
+    logger.info(f"serve metrics on http://{host}:{server.server_port}{METRICS_PATH}")
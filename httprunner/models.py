@@ -6,10 +6,10 @@
 import os
 from enum import Enum
 from typing import Any
-from typing import Dict, Text, Union, Callable  # Callable是一个可调用对象类型
+from typing import Dict, Text, Union, Callable, Optional  # Callable是一个可调用对象类型
 from typing import List
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, validator
 from pydantic import HttpUrl
 
 Name = Text
@@ -39,6 +39,62 @@ class MethodEnum(Text, Enum):
     PATCH = "PATCH"
 
 
+class TRetry(BaseModel):
+    """
+    请求重试配置, 请求异常或响应状态码可重试时, 按指数退避等待后重新发送请求
+
+    times：最多重试次数
+    status_codes：可重试的响应状态码, e.g. [502, 503, 504]
+    exceptions：可重试的 requests 异常类名, 子类异常同样重试
+    backoff：首次重试前等待时间(秒), 之后每次重试翻倍
+    max_backoff：最长等待时间(秒)
+    jitter：在 [0, 等待时间] 内随机等待, 避免大量用例同时重试
+    methods：可重试的请求方法, 默认仅重试幂等方法; POST/PATCH 超时后服务端可能已处理请求, 需显式指定才会重试
+    """
+    times: int = 3
+    status_codes: List[int] = []
+    exceptions: List[Text] = ["ConnectionError", "Timeout"]
+    backoff: float = 0.5
+    max_backoff: float = 10
+    jitter: bool = True
+    methods: List[Text] = ["GET", "HEAD", "OPTIONS", "PUT", "DELETE"]
+
+
+class TCircuitBreaker(BaseModel):
+    """
+    按 host 熔断配置, 同一 host 连续失败(请求异常或 5xx 响应)达到阈值后熔断, 请求不再发送而是直接失败,
+    熔断 recovery_timeout 秒后放行一个探测请求, 成功则恢复
+
+    threshold：连续失败次数阈值
+    recovery_timeout：熔断持续时间(秒)
+    """
+    threshold: int = 5
+    recovery_timeout: float = 30
+
+
+class TRateLimit(BaseModel):
+    """
+    令牌桶限流配置
+
+    rate：每秒请求数, 须大于 0
+    burst：桶容量, 即允许的突发请求数, 至少为 1, 未指定时与 rate 相同(至少为 1)
+    """
+    rate: float
+    burst: Optional[int] = None
+
+    @validator("rate")
+    def check_rate(cls, rate: float) -> float:
+        if rate <= 0:
+            raise ValueError(f"rate should be greater than 0, got: {rate}")
+        return rate
+
+    @validator("burst")
+    def check_burst(cls, burst: int) -> int:
+        if burst is not None and burst < 1:
+            raise ValueError(f"burst should be at least 1, got: {burst}")
+        return burst
+
+
 class TConfig(BaseModel):
     """
     定义配置信息，包含如下：
@@ -50,6 +106,10 @@ class TConfig(BaseModel):
     6.export    （list[str]）
     7.path      （str）
     8.weight    （int）
+    9.concurrency（int）
+    10.retry    （TRetry）
+    11.circuit_breaker（TCircuitBreaker）
+    12.rate_limits（dict(host模式: TRateLimit/float)）
     """
     name: Name
     verify: Verify = False
@@ -62,6 +122,20 @@ class TConfig(BaseModel):
     export: Export = []
     path: Text = None
     weight: int = 1
+    # max teststeps run concurrently, independent teststeps run concurrently if greater than 1
+    concurrency: int = 1
+    # default retry of request teststeps, overridden by teststep retry
+    retry: Union[TRetry, None] = None
+    circuit_breaker: Union[TCircuitBreaker, None] = None
+    # host pattern => rate limit, or requests per second
+    rate_limits: Dict[Text, Union[TRateLimit, float]] = {}
+
+    @validator("rate_limits", each_item=True)
+    def check_rate_limit(cls, rate_limit: Union[TRateLimit, float]):
+        # rate limit declared as requests per second
+        if not isinstance(rate_limit, TRateLimit) and rate_limit <= 0:
+            raise ValueError(f"rate should be greater than 0, got: {rate_limit}")
+        return rate_limit
 
 
 class TRequest(BaseModel):
@@ -94,6 +168,23 @@ class TRequest(BaseModel):
     upload: Dict = {}  # used for upload files
 
 
+class CacheScopeEnum(Text, Enum):
+    SESSION = "session"  # shared by all pytest-xdist workers of one test session
+    WORKER = "worker"  # shared in current process
+    MODULE = "module"  # shared by teststeps of the same testcase file
+
+
+class TStepCache(BaseModel):
+    """
+    teststep 缓存配置, 相同输入变量的 teststep 只执行一次, 之后复用其导出/提取的变量
+
+    scope：缓存范围，session/worker/module
+    ttl：缓存有效期(秒)，0 表示在缓存范围内一直有效
+    """
+    scope: CacheScopeEnum = CacheScopeEnum.SESSION
+    ttl: float = 0
+
+
 class TStep(BaseModel):
     """
     测试步骤，里面包含了request请求
@@ -108,6 +199,8 @@ class TStep(BaseModel):
     8.export            （list）
     9.validators        （list(dict)）
     10.validate_script  （list[str]）
+    11.cache            （TStepCache）
+    12.retry            （TRetry）
     """
     name: Name
     request: Union[TRequest, None] = None
@@ -121,6 +214,8 @@ class TStep(BaseModel):
     export: Export = []
     validators: Validators = Field([], alias="validate")
     validate_script: List[Text] = []
+    cache: Union[TStepCache, None] = None
+    retry: Union[TRetry, None] = None
 
 
 class TestCase(BaseModel):
@@ -190,10 +285,16 @@ class RequestStat(BaseModel):
     content_size：内容大小
     response_time_ms：响应时间(ms)
     elapsed_ms：逝去的时间(ms)
+    retry_times：重试次数
+    retry_elapsed_ms：重试前失败请求与退避等待的时间(ms)
+    throttle_ms：限流等待的时间(ms)
     """
     content_size: float = 0
     response_time_ms: float = 0
     elapsed_ms: float = 0
+    retry_times: int = 0
+    retry_elapsed_ms: float = 0
+    throttle_ms: float = 0
 
 
 class AddressData(BaseModel):
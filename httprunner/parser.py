@@ -3,15 +3,17 @@
 
 import ast
 import builtins
+import collections
 import re
 import os
-from typing import Any, Set, Text, Callable, List, Dict, Union
+import threading
+from collections import OrderedDict
+from typing import Any, Set, Text, Callable, List, Dict, Tuple, Union
 
 from loguru import logger
-from sentry_sdk import capture_exception
 
-from httprunner import loader, utils, exceptions
-from httprunner.models import VariablesMapping, FunctionsMapping
+from httprunner import loader, utils, exceptions, telemetry
+from httprunner.models import VariablesMapping, FunctionsMapping, TRequest
 
 # 匹配http://或https://
 # re.I使匹配对大小写不敏感
@@ -159,7 +161,7 @@ def regex_findall_functions(content: Text) -> List[Text]:
     try:
         return function_regex_compile.findall(content)
     except TypeError as ex:
-        capture_exception(ex)
+        telemetry.capture_exception(ex)
         return []
 
 
@@ -453,22 +455,171 @@ def parse_data(
         return raw_data
 
 
+def _copy_static(data: Any) -> Any:
+    # containers are copied, thus parsed result can be modified by caller
+    if isinstance(data, dict):
+        return {key: _copy_static(value) for key, value in data.items()}
+    elif isinstance(data, list):
+        return [_copy_static(item) for item in data]
+
+    return data
+
+
+def _compile_data(raw_data: Any) -> Tuple[bool, Any]:
+    """ analyze raw data, parse static parts which contain no variables or functions
+
+    Returns:
+        tuple: (True, parsed data) if raw data is static,
+            (False, function to parse data with variables and functions) if not.
+
+    """
+    if isinstance(raw_data, str):
+        raw_data = raw_data.strip(" \t")
+        if "$" not in raw_data:
+            return True, raw_data
+
+        return False, lambda variables, functions: parse_string(
+            raw_data, variables, functions
+        )
+
+    elif isinstance(raw_data, (list, set, tuple)):
+        items = [_compile_data(item) for item in raw_data]
+        if all(is_static for is_static, _ in items):
+            return True, [value for _, value in items]
+
+        def parse_list(variables, functions):
+            return [
+                _copy_static(value) if is_static else value(variables, functions)
+                for is_static, value in items
+            ]
+
+        return False, parse_list
+
+    elif isinstance(raw_data, dict):
+        items = [
+            (_compile_data(key), _compile_data(value))
+            for key, value in raw_data.items()
+        ]
+        if all(key[0] and value[0] for key, value in items):
+            return True, {key[1]: value[1] for key, value in items}
+
+        def parse_dict(variables, functions):
+            parsed_data = {}
+            for (key_static, key), (value_static, value) in items:
+                parsed_key = key if key_static else key(variables, functions)
+                parsed_data[parsed_key] = (
+                    _copy_static(value) if value_static else value(variables, functions)
+                )
+            return parsed_data
+
+        return False, parse_dict
+
+    else:
+        # other types, e.g. None, int, float, bool
+        return True, raw_data
+
+
+class DataTemplate(object):
+    """ raw data analyzed once, parsing it is equivalent to parse_data(raw_data)
+        while static parts are not parsed again, only strings with $ are evaluated.
+
+    Examples:
+        >>> template = DataTemplate({"headers": {"User-Agent": "hrun"}, "url": "/api/$uid"})
+        >>> template.parse({"uid": 1000})
+            {"headers": {"User-Agent": "hrun"}, "url": "/api/1000"}
+
+    """
+
+    def __init__(self, raw_data: Any):
+        self.raw_data = raw_data
+        self.is_static, self.__compiled = _compile_data(raw_data)
+
+    def parse(
+        self,
+        variables_mapping: VariablesMapping = None,
+        functions_mapping: FunctionsMapping = None,
+    ) -> Any:
+        if self.is_static:
+            return _copy_static(self.__compiled)
+
+        return self.__compiled(variables_mapping or {}, functions_mapping or {})
+
+
+# id(TRequest) => (TRequest, DataTemplate), request is referenced thus its id is not reused
+_request_templates: Dict[int, Tuple[TRequest, DataTemplate]] = OrderedDict()
+_request_templates_lock = threading.Lock()
+REQUEST_TEMPLATES_MAX_SIZE = 1024
+
+
+def get_request_template(request: TRequest) -> DataTemplate:
+    """ get template of teststep request, request is analyzed once and cached.
+        request should not be modified after it's run.
+    """
+    key = id(request)
+    with _request_templates_lock:
+        cached = _request_templates.get(key)
+        if cached is not None and cached[0] is request:
+            _request_templates.move_to_end(key)
+            return cached[1]
+
+    request_dict = request.dict()
+    request_dict.pop("upload", None)
+    template = DataTemplate(request_dict)
+
+    with _request_templates_lock:
+        _request_templates[key] = (request, template)
+        while len(_request_templates) > REQUEST_TEMPLATES_MAX_SIZE:
+            _request_templates.popitem(last=False)
+
+    return template
+
+
+def parse_request(
+    request: TRequest,
+    variables_mapping: VariablesMapping,
+    functions_mapping: FunctionsMapping = None,
+) -> Dict:
+    """ parse teststep request with variables and functions, equivalent to
+        parse_data(request.dict()) with upload removed.
+    """
+    if request.upload:
+        # upload request is modified by prepare_upload_step, not cached
+        request_dict = request.dict()
+        request_dict.pop("upload", None)
+        return parse_data(request_dict, variables_mapping, functions_mapping)
+
+    return get_request_template(request).parse(variables_mapping, functions_mapping)
+
+
 def parse_variables_mapping(
-    variables_mapping: VariablesMapping, functions_mapping: FunctionsMapping = None
+    variables_mapping: VariablesMapping,
+    functions_mapping: FunctionsMapping = None,
+    base_mapping: VariablesMapping = None,
 ) -> VariablesMapping:
     """
     解析变量映射
+
+    base_mapping 为已解析的低优先级变量(如 config 变量、前序步骤提取的变量), 可被 variables_mapping 引用但不会被重复解析,
+    返回结果只包含 variables_mapping 中的变量, 与 base_mapping 分层组合即为完整变量作用域。
+    variables_mapping 中引用自身的变量, e.g. {"base_url": "$base_url"}, 直接使用 base_mapping 中的值。
     """
 
     parsed_variables: VariablesMapping = {}
+    if base_mapping is None:
+        pending_variables = dict(variables_mapping)
+        scope = parsed_variables
+    else:
+        pending_variables = {
+            var_name: var_value
+            for var_name, var_value in variables_mapping.items()
+            if var_value != f"${var_name}" and var_value != "${" + var_name + "}"
+        }
+        scope = collections.ChainMap(parsed_variables, base_mapping)
 
-    while len(parsed_variables) != len(variables_mapping):
-        for var_name in variables_mapping:
-
-            if var_name in parsed_variables:
-                continue
-
-            var_value = variables_mapping[var_name]
+    while pending_variables:
+        parsed_count = len(parsed_variables)
+        for var_name in list(pending_variables):
+            var_value = pending_variables[var_name]
             variables = extract_variables(var_value)
 
             # check if reference variable itself
@@ -480,21 +631,28 @@ def parse_variables_mapping(
 
             # check if reference variable not in variables_mapping
             not_defined_variables = [
-                v_name for v_name in variables if v_name not in variables_mapping
+                v_name
+                for v_name in variables
+                if v_name not in variables_mapping
+                and (base_mapping is None or v_name not in base_mapping)
             ]
             if not_defined_variables:
                 # e.g. {"varA": "123$varB", "varB": "456$varC"}
                 # e.g. {"varC": "${sum_two($a, $b)}"}
                 raise exceptions.VariableNotFound(not_defined_variables)
 
-            try:
-                parsed_value = parse_data(
-                    var_value, parsed_variables, functions_mapping
-                )
-            except exceptions.VariableNotFound:
+            if any(v_name in pending_variables for v_name in variables):
+                # reference variables not parsed yet
                 continue
 
-            parsed_variables[var_name] = parsed_value
+            parsed_variables[var_name] = parse_data(var_value, scope, functions_mapping)
+            del pending_variables[var_name]
+
+        if len(parsed_variables) == parsed_count:
+            # e.g. {"varA": "$varB", "varB": "$varA"}
+            raise exceptions.VariableNotFound(
+                f"circular reference in variables: {list(pending_variables)}"
+            )
 
     return parsed_variables
 
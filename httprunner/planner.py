@@ -0,0 +1,132 @@
+# 扁平化执行计划: 将 RunTestCase 引用的 testcase 内联展开为一个扁平的步骤列表
+"""
+嵌套引用 testcase 时, 默认每个引用都会创建子 HttpRunner 并重新解析配置、合并变量;
+开启扁平化执行后, 引用的 testcase 在执行前被展开为一个扁平的执行计划, 由同一个 runner 按顺序执行:
+
+    testcase A                      plan
+    - step a1                       STEP  a1      (frame A)
+    - step a2: ref testcase B  =>   ENTER a2      (frame B, export: [token])
+        - step b1                   STEP  b1      (frame B)
+    - step a3                       EXIT  a2      (frame B)
+                                    STEP  a3      (frame A)
+
+每个被引用的 testcase 对应一个变量作用域(frame), 导出变量名在生成计划时确定,
+summary 中的步骤数据仍然保持嵌套结构。
+
+    $ HRUN_FLAT_PLAN=1 hrun examples/
+
+"""
+import os
+from typing import Callable, List, Text
+
+from httprunner import exceptions
+from httprunner.models import TConfig, TestCase, TStep
+
+FLAT_PLAN_ENV = "HRUN_FLAT_PLAN"
+# max depth of nested testcase references, exceeded if testcases reference circularly
+MAX_PLAN_DEPTH = 32
+
+
+def is_flat_plan_enabled() -> bool:
+    return os.getenv(FLAT_PLAN_ENV, "").lower() in ["1", "true", "yes", "on"]
+
+
+class PlanFrame(object):
+    """ variables scope of testcase in plan, root testcase or referenced testcase
+
+    Args:
+        config: config of testcase
+        export: variable names exported to parent frame, resolved at plan time
+        ref_step: teststep referencing this testcase in parent frame, None for root
+        parent: parent frame, None for root
+        depth: 0 for root testcase
+
+    """
+
+    __slots__ = ("config", "export", "ref_step", "parent", "depth")
+
+    def __init__(
+        self,
+        config: TConfig,
+        export: List[Text] = None,
+        ref_step: TStep = None,
+        parent: "PlanFrame" = None,
+        depth: int = 0,
+    ):
+        self.config = config
+        self.export = export or []
+        self.ref_step = ref_step
+        self.parent = parent
+        self.depth = depth
+
+
+class PlanNode(object):
+    """ one instruction of plan
+
+        STEP: run request teststep (or teststep not inlined) in frame
+        ENTER: start running referenced testcase of step, frame is the new frame
+        EXIT: finish running referenced testcase of step, return to parent frame
+    """
+
+    STEP = "step"
+    ENTER = "enter"
+    EXIT = "exit"
+
+    __slots__ = ("kind", "step", "frame")
+
+    def __init__(self, kind: Text, step: TStep, frame: PlanFrame):
+        self.kind = kind
+        self.step = step
+        self.frame = frame
+
+    def __repr__(self) -> Text:
+        return f"PlanNode({self.kind}, {self.step.name}, depth={self.frame.depth})"
+
+
+def build_plan(
+    testcase: TestCase,
+    load_ref_testcase: Callable[[TStep], TestCase],
+    max_depth: int = MAX_PLAN_DEPTH,
+) -> List[PlanNode]:
+    """ inline referenced testcases into flat plan
+
+    Args:
+        testcase: root testcase
+        load_ref_testcase: function to load referenced testcase of teststep,
+            a copy should be returned since teststeps are modified when running.
+        max_depth: max depth of nested testcase references
+
+    Returns:
+        list: plan nodes in execution order
+
+    """
+    plan: List[PlanNode] = []
+
+    def expand(teststeps: List[TStep], frame: PlanFrame):
+        for step in teststeps:
+            if not step.testcase or step.request or step.cache:
+                # request, invalid teststep, or cached teststep which is run as a whole
+                plan.append(PlanNode(PlanNode.STEP, step, frame))
+                continue
+
+            if frame.depth >= max_depth:
+                raise exceptions.ParamsError(
+                    f"testcase references are nested over {max_depth} levels, "
+                    f"maybe referenced circularly: {step.testcase}"
+                )
+
+            ref_testcase = load_ref_testcase(step)
+            ref_frame = PlanFrame(
+                ref_testcase.config,
+                # step export overrides testcase export
+                step.export or ref_testcase.config.export,
+                step,
+                frame,
+                frame.depth + 1,
+            )
+            plan.append(PlanNode(PlanNode.ENTER, step, ref_frame))
+            expand(ref_testcase.teststeps, ref_frame)
+            plan.append(PlanNode(PlanNode.EXIT, step, ref_frame))
+
+    expand(testcase.teststeps, PlanFrame(testcase.config))
+    return plan
@@ -0,0 +1,394 @@
+# 性能剖析: hrun --profile 统计每个测试步骤及其各阶段(解析/钩子/发送/记录/提取/校验)的耗时
+"""
+启用方式:
+
+    $ hrun --profile testcases/                 # 仅阶段计时器, 开销很低
+    $ hrun --profile=cprofile testcases/        # 另外用 cProfile 确定性剖析整个 testcase
+    $ hrun --profile=sampling testcases/        # 另外按固定间隔采样 testcase 线程的调用栈
+
+每个 testcase 执行结束后, 在日志目录下生成:
+
+    logs/<case_id>.profile.txt      步骤与阶段耗时汇总表, 以及 cProfile/采样的热点函数
+    logs/<case_id>.folded           阶段计时的折叠栈(微秒), 可直接用 flamegraph.pl 生成火焰图
+    logs/<case_id>.samples.folded   sampling 模式下采样得到的折叠栈(采样次数)
+    logs/<case_id>.prof             cprofile 模式下的 pstats 文件, 可用 snakeviz 等工具查看
+
+当前 profiler 与步骤路径保存在 contextvars 中, 引用的 testcase、并发执行的步骤与 client 均可记录阶段耗时;
+未启用时 phase()/step() 仅返回共享的空上下文管理器。
+
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import ContextManager, Dict, List, Optional, Text, Tuple
+
+from httprunner.backports import ContextVar, nullcontext
+from httprunner.utils import pop_cli_option
+
+PROFILE_ENV = "HRUN_PROFILE"
+PROFILE_ARG = "--profile"
+PROFILE_MODES = ["timers", "cprofile", "sampling"]
+
+# seconds between stack samples in sampling mode
+SAMPLING_INTERVAL = 0.005
+# functions listed in profile table of cprofile/sampling mode
+TOP_FUNCTIONS = 30
+
+FramePath = Tuple[Text, ...]
+
+_current_profiler: ContextVar = ContextVar("hrun_profiler", default=None)
+_current_path: ContextVar = ContextVar("hrun_profile_path", default=())
+_null_timer = nullcontext()
+
+
+def pop_profile_arg(args: List[Text]) -> Tuple[List[Text], Text]:
+    """ pop profile argument from cli args, which should not be passed to pytest
+
+    Examples:
+        >>> pop_profile_arg(["demo_test.py", "--profile"])
+        (["demo_test.py"], "timers")
+        >>> pop_profile_arg(["demo_test.py", "--profile=sampling"])
+        (["demo_test.py"], "sampling")
+
+    """
+    remaining_args, values = pop_cli_option(
+        args, PROFILE_ARG, "profile mode", const="timers"
+    )
+    mode = values[-1].lower() if values else ""
+    if mode and mode not in PROFILE_MODES:
+        raise ValueError(f"invalid profile mode: {mode}, choices: {PROFILE_MODES}")
+
+    return remaining_args, mode
+
+
+def set_profile_mode(mode: Text):
+    """ pass profile mode to testcases by environment variable,
+        which is inherited by pytest-xdist worker processes.
+    """
+    if mode:
+        os.environ[PROFILE_ENV] = mode
+
+
+def get_profile_mode() -> Text:
+    mode = os.getenv(PROFILE_ENV, "").lower()
+    return mode if mode in PROFILE_MODES else ""
+
+
+class _FrameTimer(object):
+    """ time step or phase as a frame under current path
+    """
+
+    __slots__ = ("profiler", "path", "kind", "token", "start_at")
+
+    def __init__(self, profiler: "Profiler", path: FramePath, kind: Text):
+        self.profiler = profiler
+        self.path = path
+        self.kind = kind
+
+    def __enter__(self):
+        self.token = _current_path.set(self.path)
+        self.start_at = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        elapsed = time.perf_counter() - self.start_at
+        _current_path.reset(self.token)
+        self.profiler.add(self.path, self.kind, elapsed)
+
+
+def step(name: Text) -> ContextManager:
+    """ time teststep of current profiler, phases in teststep are nested under it
+    """
+    profiler = _current_profiler.get()
+    if profiler is None:
+        return _null_timer
+
+    return _FrameTimer(profiler, _current_path.get() + (name,), "step")
+
+
+def phase(name: Text, step_name: Text = None) -> ContextManager:
+    """ time phase of current teststep, step_name is specified if phase is run
+        before entering teststep, e.g. parsing step variables.
+    """
+    profiler = _current_profiler.get()
+    if profiler is None:
+        return _null_timer
+
+    path = _current_path.get()
+    if step_name is not None:
+        path += (step_name,)
+    return _FrameTimer(profiler, path + (name,), "phase")
+
+
+def get_current_profiler() -> Optional["Profiler"]:
+    return _current_profiler.get()
+
+
+class _StackSampler(object):
+    """ sample call stack of one thread in background, stacks under root frame are counted
+    """
+
+    def __init__(self, thread_id: int, root_frame, interval: float):
+        self.thread_id = thread_id
+        self.root_code = root_frame.f_code if root_frame else None
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.__labels: Dict = {}
+        self.__stopped = threading.Event()
+        self.__thread = threading.Thread(
+            target=self.__run, name="hrun-profile-sampler", daemon=True
+        )
+
+    def __label(self, code) -> Text:
+        label = self.__labels.get(code)
+        if label is None:
+            file_name = os.path.basename(code.co_filename)
+            label = self.__labels[code] = (
+                f"{code.co_name} ({file_name}:{code.co_firstlineno})"
+            )
+        return label
+
+    def __run(self):
+        while not self.__stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            labels = []
+            while frame is not None:
+                labels.append(self.__label(frame.f_code))
+                if frame.f_code is self.root_code:
+                    break
+                frame = frame.f_back
+
+            if labels:
+                self.stacks[tuple(reversed(labels))] += 1
+
+    def start(self):
+        self.__thread.start()
+
+    def stop(self):
+        self.__stopped.set()
+        self.__thread.join()
+
+
+class Profiler(object):
+    """ profile one testcase, teststeps and phases are timed in any mode,
+        cprofile/sampling mode profiles functions of the whole testcase in addition.
+
+    Examples:
+        >>> with Profiler("demo", mode="sampling") as profiler:
+        ...     HttpRunner().run_testcase(testcase)
+        >>> profiler.dump("logs/demo")
+
+    """
+
+    def __init__(self, name: Text, mode: Text = "timers", interval: float = None):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"invalid profile mode: {mode}, choices: {PROFILE_MODES}")
+
+        self.name = name
+        self.mode = mode
+        self.interval = interval or SAMPLING_INTERVAL
+        # frame path => [count, total seconds, max seconds]
+        self.frames: Dict[FramePath, List[float]] = {}
+        self.kinds: Dict[FramePath, Text] = {}
+        self.duration = 0.0
+        self.__lock = threading.Lock()
+        self.__token = None
+        self.__start_at = 0.0
+        self.__cprofile = None
+        self.__sampler: Optional[_StackSampler] = None
+
+    def add(self, path: FramePath, kind: Text, elapsed: float):
+        with self.__lock:
+            frame = self.frames.get(path)
+            if frame is None:
+                self.frames[path] = [1, elapsed, elapsed]
+                self.kinds[path] = kind
+                return
+
+            frame[0] += 1
+            frame[1] += elapsed
+            if elapsed > frame[2]:
+                frame[2] = elapsed
+
+    def __enter__(self) -> "Profiler":
+        self.__token = _current_profiler.set(self)
+        if self.mode == "cprofile":
+            # imported when profiling, keep importing client/runner light
+            import cProfile
+
+            self.__cprofile = cProfile.Profile()
+            self.__cprofile.enable()
+        elif self.mode == "sampling":
+            self.__sampler = _StackSampler(
+                threading.get_ident(), sys._getframe(1), self.interval
+            )
+            self.__sampler.start()
+
+        self.__start_at = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.duration = time.perf_counter() - self.__start_at
+        if self.__cprofile is not None:
+            self.__cprofile.disable()
+        if self.__sampler is not None:
+            self.__sampler.stop()
+        _current_profiler.reset(self.__token)
+
+    def get_ordered_paths(self) -> List[FramePath]:
+        """ frame paths in order of execution, parent frame is followed by its children
+        """
+        # frames are added when finished, i.e. children before parent
+        order: Dict[FramePath, int] = {}
+        for path in list(self.frames):
+            for depth in range(1, len(path) + 1):
+                order.setdefault(path[:depth], len(order))
+
+        return sorted(
+            self.frames,
+            key=lambda path: [order[path[:depth]] for depth in range(1, len(path) + 1)],
+        )
+
+    def get_self_seconds(self, path: FramePath) -> float:
+        """ total seconds of frame excluding its direct children
+        """
+        children_total = sum(
+            frame[1]
+            for child_path, frame in self.frames.items()
+            if len(child_path) == len(path) + 1 and child_path[: len(path)] == path
+        )
+        return max(0.0, self.frames[path][1] - children_total)
+
+    def get_folded_lines(self) -> List[Text]:
+        """ folded stacks of steps and phases in microseconds, for flamegraph.pl/speedscope
+        """
+        lines = []
+        for path in self.get_ordered_paths():
+            microseconds = int(self.get_self_seconds(path) * 1e6)
+            if microseconds > 0:
+                lines.append(f"{';'.join((self.name,) + path)} {microseconds}")
+        return lines
+
+    def get_sampled_folded_lines(self) -> List[Text]:
+        if self.__sampler is None:
+            return []
+
+        return [
+            f"{';'.join((self.name,) + stack)} {count}"
+            for stack, count in sorted(self.__sampler.stacks.items())
+        ]
+
+    def get_table(self) -> Text:
+        """ aggregate table of teststeps and phases, with hot functions of cprofile/sampling
+        """
+        def header(label: Text) -> Text:
+            return (
+                f"{label:<48}{'count':>8}{'total(ms)':>12}{'mean(ms)':>12}"
+                f"{'max(ms)':>12}{'%':>8}"
+            )
+
+        lines = [
+            f"profile of testcase: {self.name}, mode: {self.mode}, "
+            f"duration: {self.duration * 1000:.2f} ms",
+            "",
+            header("step / phase"),
+        ]
+
+        def add_row(label: Text, count: float, total: float, max_seconds: float):
+            percent = total / self.duration * 100 if self.duration else 0
+            lines.append(
+                f"{label[:47]:<48}{int(count):>8}{total * 1000:>12.2f}"
+                f"{total / count * 1000:>12.2f}{max_seconds * 1000:>12.2f}"
+                f"{percent:>8.1f}"
+            )
+
+        for path in self.get_ordered_paths():
+            count, total, max_seconds = self.frames[path]
+            add_row("  " * (len(path) - 1) + path[-1], count, total, max_seconds)
+
+        # phases of all teststeps
+        phase_totals: Dict[Text, List[float]] = {}
+        for path, (count, total, max_seconds) in self.frames.items():
+            if self.kinds[path] != "phase":
+                continue
+            phase_total = phase_totals.setdefault(path[-1], [0, 0.0, 0.0])
+            phase_total[0] += count
+            phase_total[1] += total
+            phase_total[2] = max(phase_total[2], max_seconds)
+
+        lines.extend(["", header("phase of all steps")])
+        for name, (count, total, max_seconds) in sorted(
+            phase_totals.items(), key=lambda item: -item[1][1]
+        ):
+            add_row(name, count, total, max_seconds)
+
+        if self.__cprofile is not None:
+            import io
+            import pstats
+
+            stream = io.StringIO()
+            stats = pstats.Stats(self.__cprofile, stream=stream)
+            stats.sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+            lines.extend(["", stream.getvalue().strip()])
+
+        if self.__sampler is not None:
+            lines.extend(self.__get_sampled_functions_table())
+
+        return "\n".join(lines) + "\n"
+
+    def __get_sampled_functions_table(self) -> List[Text]:
+        stacks = self.__sampler.stacks
+        total_samples = sum(stacks.values())
+        self_samples = Counter()
+        inclusive_samples = Counter()
+        for stack, count in stacks.items():
+            self_samples[stack[-1]] += count
+            for label in set(stack):
+                inclusive_samples[label] += count
+
+        lines = [
+            "",
+            f"sampled {total_samples} stacks every {self.interval * 1000:g} ms",
+            f"{'function':<72}{'self':>8}{'self%':>8}{'total%':>8}",
+        ]
+        for label, count in self_samples.most_common(TOP_FUNCTIONS):
+            lines.append(
+                f"{label[:71]:<72}{count:>8}"
+                f"{count / total_samples * 100:>8.1f}"
+                f"{inclusive_samples[label] / total_samples * 100:>8.1f}"
+            )
+        return lines
+
+    def dump(self, path_prefix: Text) -> List[Text]:
+        """ dump profile files with path prefix, e.g. logs/<case_id>
+
+        Returns:
+            list: paths of files dumped
+
+        """
+        profile_dir = os.path.dirname(path_prefix)
+        if profile_dir:
+            os.makedirs(profile_dir, exist_ok=True)
+
+        contents = {
+            f"{path_prefix}.profile.txt": self.get_table(),
+            f"{path_prefix}.folded": "\n".join(self.get_folded_lines()) + "\n",
+        }
+        if self.__sampler is not None:
+            contents[f"{path_prefix}.samples.folded"] = (
+                "\n".join(self.get_sampled_folded_lines()) + "\n"
+            )
+
+        paths = []
+        for path, content in contents.items():
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(content)
+            paths.append(path)
+
+        if self.__cprofile is not None:
+            self.__cprofile.dump_stats(f"{path_prefix}.prof")
+            paths.append(f"{path_prefix}.prof")
+
+        return paths
@@ -0,0 +1,225 @@
+# 客户端限流: 按 host 模式的令牌桶限制请求速率, 避免并发运行压垮共享的测试环境
+"""
+config 中按 host 模式声明每秒请求数, 模式支持通配符, "*" 匹配所有 host 即全局限流:
+
+    config:
+        name: demo
+        rate_limits:
+            auth.internal: 200
+            "*.internal":
+                rate: 500
+                burst: 50
+            "*": 1000
+
+或在命令行中指定, 同一模式命令行优先:
+
+    $ hrun --rate-limit auth.internal=200 --rate-limit "*=1000:100" testcases/
+
+令牌桶在当前进程内按 (模式, 速率, 容量) 共享, 同一进程内的所有线程与 runner 共用同一个桶;
+请求匹配多个模式时需从每个桶获取令牌, 等待时间(throttle_ms)与响应时间分开统计。
+
+"""
+import fnmatch
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Text, Tuple, Union
+from urllib.parse import urlparse
+
+from pydantic import ValidationError
+
+from httprunner.models import TRateLimit
+from httprunner.utils import pop_cli_option
+
+RATE_LIMITS_ENV = "HRUN_RATE_LIMITS"
+RATE_LIMIT_ARG = "--rate-limit"
+
+RateLimits = Dict[Text, TRateLimit]
+
+
+def to_rate_limit(value: Union[TRateLimit, float, Dict]) -> TRateLimit:
+    """ rate limit declared as requests per second, or with rate and burst
+    """
+    if isinstance(value, TRateLimit):
+        return value
+    if isinstance(value, dict):
+        return TRateLimit(**value)
+    return TRateLimit(rate=value)
+
+
+def parse_rate_limit_arg(arg: Text) -> Tuple[Text, TRateLimit]:
+    """ parse rate limit cli argument
+
+    Examples:
+        >>> parse_rate_limit_arg("auth.internal=200")
+        ("auth.internal", TRateLimit(rate=200, burst=None))
+        >>> parse_rate_limit_arg("*=1000:100")
+        ("*", TRateLimit(rate=1000, burst=100))
+
+    """
+    pattern, sep, limit = arg.rpartition("=")
+    if not sep or not pattern:
+        raise ValueError(
+            f"invalid rate limit: {arg}, should be in format PATTERN=RATE[:BURST]"
+        )
+
+    rate, _, burst = limit.partition(":")
+    try:
+        rate = float(rate)
+        burst = int(burst) if burst else None
+    except ValueError:
+        raise ValueError(
+            f"invalid rate limit: {arg}, should be in format PATTERN=RATE[:BURST]"
+        )
+
+    try:
+        rate_limit = TRateLimit(rate=rate, burst=burst)
+    except ValidationError as ex:
+        raise ValueError(f"invalid rate limit: {arg}, {ex.errors()[0]['msg']}")
+
+    return pattern, rate_limit
+
+
+def pop_rate_limit_args(args: List[Text]) -> Tuple[List[Text], RateLimits]:
+    """ pop rate limit arguments from cli args, which should not be passed to pytest
+
+    Examples:
+        >>> pop_rate_limit_args(["demo_test.py", "--rate-limit", "auth.internal=200"])
+        (["demo_test.py"], {"auth.internal": TRateLimit(rate=200, burst=None)})
+
+    """
+    remaining_args, values = pop_cli_option(
+        args, RATE_LIMIT_ARG, "PATTERN=RATE[:BURST]"
+    )
+    rate_limits = {}
+    for value in values:
+        pattern, rate_limit = parse_rate_limit_arg(value)
+        rate_limits[pattern] = rate_limit
+
+    return remaining_args, rate_limits
+
+
+def set_cli_rate_limits(rate_limits: RateLimits):
+    """ pass cli rate limits to testcases by environment variable,
+        which is inherited by pytest-xdist worker processes.
+    """
+    if not rate_limits:
+        return
+
+    os.environ[RATE_LIMITS_ENV] = json.dumps(
+        {pattern: rate_limit.dict() for pattern, rate_limit in rate_limits.items()}
+    )
+
+
+# environment variable value => cli rate limits parsed
+_cli_rate_limits: Tuple[Text, RateLimits] = ("", {})
+
+
+def get_cli_rate_limits() -> RateLimits:
+    global _cli_rate_limits
+
+    env_value = os.getenv(RATE_LIMITS_ENV, "")
+    if env_value != _cli_rate_limits[0]:
+        rate_limits = {}
+        if env_value:
+            rate_limits = {
+                pattern: to_rate_limit(value)
+                for pattern, value in json.loads(env_value).items()
+            }
+        _cli_rate_limits = (env_value, rate_limits)
+
+    return _cli_rate_limits[1]
+
+
+def get_rate_limits(config_rate_limits: Dict = None) -> RateLimits:
+    """ merge rate limits of config and cli, cli rate limits take precedence
+    """
+    cli_rate_limits = get_cli_rate_limits()
+    if not config_rate_limits:
+        return cli_rate_limits
+
+    rate_limits = {
+        pattern: to_rate_limit(value) for pattern, value in config_rate_limits.items()
+    }
+    rate_limits.update(cli_rate_limits)
+    return rate_limits
+
+
+class TokenBucket(object):
+    """ token bucket, tokens are reserved in advance, thus waiters are served in order
+
+    Args:
+        rate: tokens added per second
+        burst: max tokens in bucket
+
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """ reserve one token, return seconds to wait before it is available
+        """
+        with self.__lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.burst, self.tokens + (now - self.updated_at) * self.rate
+            )
+            self.updated_at = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0
+
+            return -self.tokens / self.rate
+
+
+class RateLimiter(object):
+    """ local coordinator of token buckets, shared by threads and runners in current process
+    """
+
+    def __init__(self):
+        self.__buckets: Dict[Tuple[Text, float, int], TokenBucket] = {}
+        self.__lock = threading.Lock()
+
+    def get_bucket(self, pattern: Text, rate_limit: TRateLimit) -> TokenBucket:
+        burst = rate_limit.burst or max(1, int(rate_limit.rate))
+        key = (pattern, rate_limit.rate, burst)
+        with self.__lock:
+            bucket = self.__buckets.get(key)
+            if bucket is None:
+                bucket = self.__buckets[key] = TokenBucket(rate_limit.rate, burst)
+            return bucket
+
+    def acquire(self, url: Text, rate_limits: RateLimits) -> float:
+        """ wait until request to url is allowed by all matched rate limits
+
+        Returns:
+            float: seconds throttled
+
+        """
+        parsed_url = urlparse(url)
+        hosts = {parsed_url.hostname or "", parsed_url.netloc}
+        wait_seconds = 0
+        for pattern, rate_limit in rate_limits.items():
+            if not any(fnmatch.fnmatchcase(host, pattern) for host in hosts):
+                continue
+
+            bucket = self.get_bucket(pattern, rate_limit)
+            wait_seconds = max(wait_seconds, bucket.reserve())
+
+        if wait_seconds > 0:
+            time.sleep(wait_seconds)
+
+        return wait_seconds
+
+    def clear(self):
+        with self.__lock:
+            self.__buckets.clear()
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,176 @@
+# 运行时记录: 请求热路径上使用 __slots__ 轻量对象记录请求/响应数据, 不做 pydantic 校验
+"""
+每个请求都会产生 SessionData/ReqRespData 等数据, 使用 pydantic 模型时实例化和校验的开销较大,
+运行时统一使用本模块中的记录对象, 仅在生成 summary 或接口返回时通过 to_model() 转换为 pydantic 模型。
+
+"""
+from typing import Any, Dict, List, Text, Type, Union
+
+from pydantic import BaseModel
+
+from httprunner.models import (
+    AddressData,
+    ReqRespData,
+    RequestData,
+    RequestStat,
+    ResponseData,
+    SessionData,
+    StepData,
+)
+
+
+def _to_model(value: Any) -> Any:
+    if isinstance(value, Record):
+        return value.to_model()
+    elif isinstance(value, list) and value and isinstance(value[0], Record):
+        return [item.to_model() for item in value]
+
+    return value
+
+
+class Record(object):
+    """ base class of runtime records, attributes are the same as fields of model
+    """
+
+    __slots__ = ()
+    model: Type[BaseModel] = BaseModel
+
+    def to_model(self) -> BaseModel:
+        """ materialize pydantic model without validation, nested records are converted as well
+        """
+        return self.model.construct(
+            **{name: _to_model(getattr(self, name)) for name in self.__slots__}
+        )
+
+    def dict(self) -> Dict:
+        return self.to_model().dict()
+
+    def __eq__(self, other) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+
+        return all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__
+        )
+
+    def __repr__(self) -> Text:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{self.__class__.__name__}({fields})"
+
+
+class RequestStatRecord(Record):
+    __slots__ = (
+        "content_size",
+        "response_time_ms",
+        "elapsed_ms",
+        "retry_times",
+        "retry_elapsed_ms",
+        "throttle_ms",
+    )
+    model = RequestStat
+
+    def __init__(
+        self,
+        content_size: float = 0,
+        response_time_ms: float = 0,
+        elapsed_ms: float = 0,
+        retry_times: int = 0,
+        retry_elapsed_ms: float = 0,
+        throttle_ms: float = 0,
+    ):
+        self.content_size = content_size
+        self.response_time_ms = response_time_ms
+        self.elapsed_ms = elapsed_ms
+        self.retry_times = retry_times
+        self.retry_elapsed_ms = retry_elapsed_ms
+        self.throttle_ms = throttle_ms
+
+
+class AddressRecord(Record):
+    __slots__ = ("client_ip", "client_port", "server_ip", "server_port")
+    model = AddressData
+
+    def __init__(
+        self,
+        client_ip: Text = "N/A",
+        client_port: int = 0,
+        server_ip: Text = "N/A",
+        server_port: int = 0,
+    ):
+        self.client_ip = client_ip
+        self.client_port = client_port
+        self.server_ip = server_ip
+        self.server_port = server_port
+
+
+class RequestRecord(Record):
+    __slots__ = ("method", "url", "headers", "cookies", "body")
+    model = RequestData
+
+    def __init__(
+        self,
+        method: Text,
+        url: Text,
+        headers: Dict = None,
+        cookies: Dict = None,
+        body: Union[Text, bytes, List, Dict, None] = None,
+    ):
+        self.method = method
+        self.url = url
+        self.headers = headers if headers is not None else {}
+        self.cookies = cookies if cookies is not None else {}
+        self.body = body
+
+
+class ResponseRecord(Record):
+    __slots__ = ("status_code", "headers", "cookies", "encoding", "content_type", "body")
+    model = ResponseData
+
+    def __init__(
+        self,
+        status_code: int,
+        headers: Dict,
+        cookies: Dict,
+        encoding: Union[Text, None],
+        content_type: Text,
+        body: Union[Text, bytes, List, Dict],
+    ):
+        self.status_code = status_code
+        self.headers = headers
+        self.cookies = cookies
+        self.encoding = encoding
+        self.content_type = content_type
+        self.body = body
+
+
+class ReqRespRecord(Record):
+    __slots__ = ("request", "response")
+    model = ReqRespData
+
+    def __init__(self, request: RequestRecord, response: ResponseRecord):
+        self.request = request
+        self.response = response
+
+
+class SessionRecord(Record):
+    __slots__ = ("success", "req_resps", "stat", "address", "validators")
+    model = SessionData
+
+    def __init__(self):
+        self.success = False
+        self.req_resps: List[ReqRespRecord] = []
+        self.stat = RequestStatRecord()
+        self.address = AddressRecord()
+        self.validators: Dict = {}
+
+
+class StepRecord(Record):
+    __slots__ = ("success", "name", "data", "export_vars")
+    model = StepData
+
+    def __init__(self, name: Text = ""):
+        self.success = False
+        self.name = name
+        # SessionRecord for request step, list of StepRecord for testcase step
+        self.data: Union[SessionRecord, List["StepRecord"], None] = None
+        self.export_vars: Dict = {}
@@ -7,7 +7,7 @@ import requests
 from jmespath.exceptions import JMESPathError
 from loguru import logger
 
-from httprunner import exceptions
+from httprunner import exceptions, log, metrics
 from httprunner.exceptions import ValidationFailure, ParamsError
 from httprunner.models import VariablesMapping, Validators, FunctionsMapping
 from httprunner.parser import parse_data, parse_string_value, get_mapping_function
@@ -182,7 +182,8 @@ class ResponseObject(object):
             field_value = self._search_jmespath(field)
             extract_mapping[key] = field_value
 
-        logger.info(f"extract mapping: {extract_mapping}")
+        if log.is_enabled("INFO"):
+            logger.info(f"extract mapping: {extract_mapping}")
         return extract_mapping
 
     def validate(
@@ -238,8 +239,6 @@ class ResponseObject(object):
             # parse message with config/teststep/extracted variables
             message = parse_data(message, variables_mapping, functions_mapping)
 
-            validate_msg = f"assert {check_item} {assert_method} {expect_value}({type(expect_value).__name__})"
-
             validator_dict = {
                 "comparator": assert_method,
                 "check": check_item,
@@ -251,13 +250,20 @@ class ResponseObject(object):
 
             try:
                 assert_func(check_value, expect_value, message)
-                validate_msg += "\t==> pass"
-                logger.info(validate_msg)
+                if log.is_enabled("INFO"):
+                    logger.info(
+                        f"assert {check_item} {assert_method} {expect_value}"
+                        f"({type(expect_value).__name__})\t==> pass"
+                    )
                 validator_dict["check_result"] = "pass"
             except AssertionError as ex:
                 validate_pass = False
                 validator_dict["check_result"] = "fail"
-                validate_msg += "\t==> fail"
+                # failure message is always needed by ValidationFailure
+                validate_msg = (
+                    f"assert {check_item} {assert_method} {expect_value}"
+                    f"({type(expect_value).__name__})\t==> fail"
+                )
                 validate_msg += (
                     f"\n"
                     f"check_item: {check_item}\n"
@@ -274,6 +280,9 @@ class ResponseObject(object):
 
             self.validation_results["validate_extractor"].append(validator_dict)
 
+        if metrics.registry is not None:
+            metrics.registry.observe_validation(validate_pass)
+
         if not validate_pass:
             failures_string = "\n".join([failure for failure in failures])
             raise ValidationFailure(failures_string)
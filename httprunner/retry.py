@@ -0,0 +1,151 @@
+# 请求重试与熔断: 可重试的异常/状态码按指数退避重试, 同一 host 连续失败后熔断, 直接失败不再等待超时
+"""
+teststep 或 config 中声明重试, teststep 优先:
+
+    config:
+        name: demo
+        retry:
+            times: 3
+            status_codes: [502, 503, 504]
+            methods: [GET, POST]    # 默认仅重试幂等方法 GET/HEAD/OPTIONS/PUT/DELETE
+        circuit_breaker:
+            threshold: 5
+            recovery_timeout: 30
+
+熔断状态在当前进程内按 host 共享, 上游故障时后续用例立即失败, 而不是每个用例都等待请求超时:
+
+    closed --(连续失败 threshold 次)--> open --(recovery_timeout 秒后)--> half open
+    half open --(探测请求成功)--> closed
+    half open --(探测请求失败)--> open
+
+熔断阈值以首个请求该 host 的配置为准, 之后其他用例的不同配置不会修改已创建的熔断器。
+
+"""
+import random
+import threading
+import time
+from typing import Dict, Text
+from urllib.parse import urlparse
+
+from requests import Response
+from requests.exceptions import RequestException
+
+from httprunner.models import TCircuitBreaker, TRetry
+
+
+class CircuitBreakerOpenError(RequestException):
+    """ request is not sent since circuit breaker of host is open
+    """
+
+    pass
+
+
+def get_response_error(response: Response):
+    """ get request exception of failed response, None if response is received
+    """
+    return getattr(response, "error", None)
+
+
+def is_retryable(response: Response, retry: TRetry) -> bool:
+    """ check if request should be retried by request method, request exception or response status code
+    """
+    method = (response.request.method if response.request else "") or ""
+    if method.upper() not in {item.upper() for item in retry.methods}:
+        # non-idempotent request may have been applied by server
+        return False
+
+    error = get_response_error(response)
+    if error is not None:
+        if isinstance(error, CircuitBreakerOpenError):
+            return False
+
+        exception_names = {cls.__name__ for cls in type(error).__mro__}
+        return any(name in exception_names for name in retry.exceptions)
+
+    return response.status_code in retry.status_codes
+
+
+def get_backoff_seconds(retry: TRetry, retry_index: int) -> float:
+    """ exponential backoff before the retry_index-th retry (starts from 0),
+        with full jitter if enabled.
+    """
+    backoff = min(retry.max_backoff, retry.backoff * (2 ** retry_index))
+    if retry.jitter:
+        backoff = random.uniform(0, backoff)
+    return backoff
+
+
+class CircuitBreaker(object):
+    """ circuit breaker of one host
+
+    Args:
+        threshold: consecutive failures to open circuit breaker
+        recovery_timeout: seconds before a probe request is allowed after opened
+
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, threshold: int = 5, recovery_timeout: float = 30):
+        self.threshold = threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.__lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """ check if request can be sent, only one probe request is allowed if half open
+        """
+        with self.__lock:
+            if self.state == self.CLOSED:
+                return True
+
+            if (
+                self.state == self.OPEN
+                and time.time() - self.opened_at >= self.recovery_timeout
+            ):
+                self.state = self.HALF_OPEN
+                return True
+
+            return False
+
+    def record(self, success: bool):
+        with self.__lock:
+            if success:
+                self.state = self.CLOSED
+                self.failures = 0
+                return
+
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+                self.state = self.OPEN
+                self.opened_at = time.time()
+
+
+# host => circuit breaker, shared by testcases in current process
+circuit_breakers: Dict[Text, CircuitBreaker] = {}
+_circuit_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(url: Text, config: TCircuitBreaker) -> CircuitBreaker:
+    """ get circuit breaker of url host, thresholds are set by config of the first
+        request to the host, later configs of other testcases do not change them
+    """
+    host = urlparse(url).netloc
+    with _circuit_breakers_lock:
+        breaker = circuit_breakers.get(host)
+        if breaker is None:
+            breaker = circuit_breakers[host] = CircuitBreaker(
+                config.threshold, config.recovery_timeout
+            )
+
+    return breaker
+
+
+def is_failure(response: Response) -> bool:
+    """ failure counted by circuit breaker, request exception or server error
+    """
+    return get_response_error(response) is not None or response.status_code >= 500
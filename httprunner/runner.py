@@ -3,8 +3,10 @@
 import os
 import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
 from datetime import datetime
-from typing import List, Dict, Text, NoReturn
+from typing import List, Dict, Set, Text, NoReturn, Callable, Union
 
 try:
     import allure
@@ -15,16 +17,32 @@ except ModuleNotFoundError:
 
 from loguru import logger
 
-from httprunner import utils, exceptions
+from httprunner import utils, exceptions, log, metrics, profiler, tracing
+from httprunner.backports import copy_context
+from httprunner.cache import make_cache_key, step_cache
 from httprunner.client import HttpSession
 from httprunner.exceptions import ValidationFailure, ParamsError
 from httprunner.ext.uploader import prepare_upload_step
-from httprunner.loader import load_project_meta, load_testcase_file
-from httprunner.parser import build_url, parse_data, parse_variables_mapping
+from httprunner.loader import (
+    copy_testcase,
+    load_project_meta,
+    load_testcase_file_cached,
+)
+from httprunner.parser import (
+    build_url,
+    extract_variables,
+    parse_data,
+    parse_request,
+    parse_variables_mapping,
+)
+from httprunner.planner import PlanFrame, PlanNode, build_plan, is_flat_plan_enabled
+from httprunner.ratelimit import get_rate_limits
+from httprunner.records import StepRecord
 from httprunner.response import ResponseObject
 from httprunner.testcase import Config, Step
-from httprunner.utils import merge_variables
+from httprunner.utils import VariablesScope, get_declared_variables
 from httprunner.models import (
+    CacheScopeEnum,
     TConfig,
     TStep,
     VariablesMapping,
@@ -38,6 +56,140 @@ from httprunner.models import (
 )
 
 
+# fields of teststep to make cache key, together with referenced variables
+STEP_CACHE_KEY_FIELDS = {
+    "request",
+    "testcase",
+    "extract",
+    "export",
+    "setup_hooks",
+    "teardown_hooks",
+    "validators",
+    "validate_script",
+}
+
+# referenced testcase class => TestCase performed from class
+_ref_testcase_classes: Dict[Callable, TestCase] = {}
+
+
+def load_ref_testcase(testcase: Union[Text, Callable]) -> TestCase:
+    """ load referenced testcase by absolute path or class, testcase is loaded once
+        and a copy is returned for each run, thus config and teststeps are not performed again.
+    """
+    if isinstance(testcase, Text):
+        return load_testcase_file_cached(testcase)
+
+    if testcase not in _ref_testcase_classes:
+        # deep copy, thus not affected by running testcase class directly
+        _ref_testcase_classes[testcase] = testcase().raw_testcase.copy(deep=True)
+
+    return copy_testcase(_ref_testcase_classes[testcase])
+
+
+# referenced testcase class or path => variables referenced in it
+_ref_testcase_variables: Dict[Union[Text, Callable], Set[Text]] = {}
+
+
+def get_ref_testcase_variables(testcase: Union[Text, Callable]) -> Set[Text]:
+    """ get variables referenced in testcase, testcase is loaded once
+    """
+    if testcase not in _ref_testcase_variables:
+        testcase_obj = load_ref_testcase(testcase)
+        _ref_testcase_variables[testcase] = extract_variables(testcase_obj.dict())
+
+    return _ref_testcase_variables[testcase]
+
+
+# session types warned of unsupported request options, warned once per type
+_unsupported_option_warned: Set[type] = set()
+
+
+def get_supported_session_options(session, options: Dict) -> Dict:
+    """ request options like retry, circuit breaker and rate limits are supported by
+        httprunner.client.HttpSession only, they are dropped with a warning for
+        other sessions, e.g. locust.clients.HttpSession or requests.Session
+    """
+    if not options or isinstance(session, HttpSession):
+        return options
+
+    session_type = type(session)
+    if session_type not in _unsupported_option_warned:
+        _unsupported_option_warned.add(session_type)
+        logger.warning(
+            f"{', '.join(options)} not supported by {session_type.__module__}."
+            f"{session_type.__name__}, ignored"
+        )
+    return {}
+
+
+def get_step_waves(teststeps: List[TStep]) -> List[List[int]]:
+    """ group teststeps into waves by dependencies, teststeps in one wave are independent
+        of each other, and only depend on teststeps in previous waves.
+
+        a teststep depends on previous teststep if it references variables extracted by it,
+        referenced testcase is run after all previous teststeps and before all later ones.
+
+    Returns:
+        list: indexes of teststeps in each wave, e.g. [[0], [1, 2, 3], [4]]
+
+    """
+    levels: List[int] = []
+    # variable name => indexes of teststeps extracting it
+    extractors: Dict[Text, List[int]] = {}
+    barrier_level = -1
+    for index, step in enumerate(teststeps):
+        if step.testcase:
+            level = max(levels, default=-1) + 1
+            barrier_level = level
+            levels.append(level)
+            continue
+
+        step_content = step.dict(
+            include={
+                "request",
+                "setup_hooks",
+                "teardown_hooks",
+                "validators",
+                "validate_script",
+            }
+        )
+        # step variables take precedence over variables extracted by previous teststeps
+        step_variables = get_declared_variables(step.variables)
+        referenced_variables = (
+            extract_variables(step_content) - set(step_variables.keys())
+        ) | extract_variables(list(step_variables.values()))
+
+        level = barrier_level + 1
+        for var_name in referenced_variables:
+            for extractor_index in extractors.get(var_name, []):
+                level = max(level, levels[extractor_index] + 1)
+
+        levels.append(level)
+        for var_name in step.extract:
+            extractors.setdefault(var_name, []).append(index)
+
+    waves: List[List[int]] = [[] for _ in range(max(levels, default=-1) + 1)]
+    for index, level in enumerate(levels):
+        waves[level].append(index)
+
+    return waves
+
+
+class _FrameState(object):
+    """ runtime state of testcase frame in flat plan
+    """
+
+    __slots__ = ("config", "session_variables", "extracted", "step_datas", "exit_stack")
+
+    def __init__(self, config: TConfig, session_variables: VariablesMapping):
+        self.config = config
+        # variables passed by referencing teststep, updated with extracted variables at exit
+        self.session_variables = session_variables
+        self.extracted: VariablesMapping = {}
+        self.step_datas: List[StepRecord] = []
+        self.exit_stack = ExitStack()
+
+
 class HttpRunner(object):
     config: Config
     teststeps: List[Step]
@@ -48,9 +200,11 @@ class HttpRunner(object):
     __project_meta: ProjectMeta = None
     __case_id: Text = ""
     __export: List[Text] = []
-    __step_datas: List[StepData] = []
+    __step_datas: List[StepRecord] = []
     __session: HttpSession = None
     __session_variables: VariablesMapping = {}
+    __step_callback: Callable[[StepData], None] = None
+    __flat_plan: bool = None
     # time
     __start_at: float = 0
     __duration: float = 0
@@ -90,6 +244,21 @@ class HttpRunner(object):
         self.__export = export
         return self
 
+    def with_flat_plan(self, flat_plan: bool = True) -> "HttpRunner":
+        """ inline referenced testcases into one flat plan instead of running them
+            with nested runners, default to HRUN_FLAT_PLAN environment variable.
+        """
+        self.__flat_plan = flat_plan
+        return self
+
+    def with_step_callback(
+        self, step_callback: Callable[[StepData], None]
+    ) -> "HttpRunner":
+        """ callback will be called with StepData once each teststep finished
+        """
+        self.__step_callback = step_callback
+        return self
+
     def __call_hooks(
         self, hooks: Hooks, step_variables: VariablesMapping, hook_msg: Text,
     ) -> NoReturn:
@@ -111,7 +280,8 @@ class HttpRunner(object):
             hook_msg: setup/teardown request/testcase
 
         """
-        logger.info(f"call hook actions: {hook_msg}")
+        if log.is_enabled("INFO"):
+            logger.info(f"call hook actions: {hook_msg}")
 
         if not isinstance(hooks, List):
             logger.error(f"Invalid hooks format: {hooks}")
@@ -120,7 +290,8 @@ class HttpRunner(object):
         for hook in hooks:
             if isinstance(hook, Text):
                 # format 1: ["${func()}"]
-                logger.debug(f"call hook function: {hook}")
+                if log.is_enabled("DEBUG"):
+                    logger.debug(f"call hook function: {hook}")
                 parse_data(hook, step_variables, self.__project_meta.functions)
             elif isinstance(hook, Dict) and len(hook) == 1:
                 # format 2: {"var": "${func()}"}
@@ -128,25 +299,25 @@ class HttpRunner(object):
                 hook_content_eval = parse_data(
                     hook_content, step_variables, self.__project_meta.functions
                 )
-                logger.debug(
-                    f"call hook function: {hook_content}, got value: {hook_content_eval}"
-                )
-                logger.debug(f"assign variable: {var_name} = {hook_content_eval}")
+                if log.is_enabled("DEBUG"):
+                    logger.debug(
+                        f"call hook function: {hook_content}, got value: {hook_content_eval}"
+                    )
+                    logger.debug(f"assign variable: {var_name} = {hook_content_eval}")
                 step_variables[var_name] = hook_content_eval
             else:
                 logger.error(f"Invalid hook format: {hook}")
 
-    def __run_step_request(self, step: TStep) -> StepData:
+    def __run_step_request(self, step: TStep) -> StepRecord:
         """run teststep: request"""
-        step_data = StepData(name=step.name)
+        step_data = StepRecord(name=step.name)
 
         # parse
-        prepare_upload_step(step, self.__project_meta.functions)
-        request_dict = step.request.dict()
-        request_dict.pop("upload", None)
-        parsed_request_dict = parse_data(
-            request_dict, step.variables, self.__project_meta.functions
-        )
+        with profiler.phase("parse"):
+            prepare_upload_step(step, self.__project_meta.functions)
+            parsed_request_dict = parse_request(
+                step.request, step.variables, self.__project_meta.functions
+            )
         parsed_request_dict["headers"].setdefault(
             "HRUN-Request-ID",
             f"HRUN-{self.__case_id}-{str(int(time.time() * 1000))[-6:]}",
@@ -155,7 +326,8 @@ class HttpRunner(object):
 
         # setup hooks
         if step.setup_hooks:
-            self.__call_hooks(step.setup_hooks, step.variables, "setup request")
+            with profiler.phase("setup_hooks"), tracing.start_span("setup_hooks"):
+                self.__call_hooks(step.setup_hooks, step.variables, "setup request")
 
         # prepare arguments
         method = parsed_request_dict.pop("method")
@@ -163,15 +335,47 @@ class HttpRunner(object):
         url = build_url(self.__config.base_url, url_path)
         parsed_request_dict["verify"] = self.__config.verify
         parsed_request_dict["json"] = parsed_request_dict.pop("req_json", {})
+        session_options = {}
+        # teststep retry > config retry
+        retry = step.retry or self.__config.retry
+        if retry:
+            session_options["retry"] = retry
+        if self.__config.circuit_breaker:
+            session_options["circuit_breaker"] = self.__config.circuit_breaker
+        # config rate limits merged with cli ones
+        rate_limits = get_rate_limits(self.__config.rate_limits)
+        if rate_limits:
+            session_options["rate_limits"] = rate_limits
+        parsed_request_dict.update(
+            get_supported_session_options(self.__session, session_options)
+        )
 
         # request
-        resp = self.__session.request(method, url, **parsed_request_dict)
+        with profiler.phase("send"), tracing.start_span(
+            f"{method.upper()} {step.request.url}", tracing.SpanKind.CLIENT
+        ) as span:
+            # W3C trace context of request span, joined with server-side spans
+            tracing.inject(parsed_request_dict["headers"])
+            resp = self.__session.request(method, url, **parsed_request_dict)
+            span.set_attribute("http.method", method.upper())
+            span.set_attribute("http.url", url)
+            span.set_attribute("http.status_code", resp.status_code)
+            span.set_attribute(
+                "hrun.request_id", parsed_request_dict["headers"]["HRUN-Request-ID"]
+            )
+            if not resp.status_code or resp.status_code >= 400:
+                span.set_status(tracing.StatusCode.ERROR)
         resp_obj = ResponseObject(resp)
         step.variables["response"] = resp_obj
 
         # teardown hooks
         if step.teardown_hooks:
-            self.__call_hooks(step.teardown_hooks, step.variables, "teardown request")
+            with profiler.phase("teardown_hooks"), tracing.start_span(
+                "teardown_hooks"
+            ):
+                self.__call_hooks(
+                    step.teardown_hooks, step.variables, "teardown request"
+                )
 
         def log_req_resp_details():
             err_msg = "\n{} DETAILED REQUEST & RESPONSE {}\n".format("*" * 32, "*" * 32)
@@ -197,7 +401,8 @@ class HttpRunner(object):
 
         # extract
         extractors = step.extract
-        extract_mapping = resp_obj.extract(extractors)
+        with profiler.phase("extract"):
+            extract_mapping = resp_obj.extract(extractors)
         step_data.export_vars = extract_mapping
 
         variables_mapping = step.variables
@@ -207,9 +412,10 @@ class HttpRunner(object):
         validators = step.validators
         session_success = False
         try:
-            resp_obj.validate(
-                validators, variables_mapping, self.__project_meta.functions
-            )
+            with profiler.phase("validate"), tracing.start_span("validate"):
+                resp_obj.validate(
+                    validators, variables_mapping, self.__project_meta.functions
+                )
             session_success = True
         except ValidationFailure:
             session_success = False
@@ -232,9 +438,17 @@ class HttpRunner(object):
 
         return step_data
 
-    def __run_step_testcase(self, step: TStep) -> StepData:
+    def __get_ref_testcase(self, step: TStep) -> Union[Text, Callable]:
+        """ get referenced testcase class, or absolute path of referenced testcase file
+        """
+        if not isinstance(step.testcase, Text) or os.path.isabs(step.testcase):
+            return step.testcase
+
+        return os.path.join(self.__project_meta.RootDir, step.testcase)
+
+    def __run_step_testcase(self, step: TStep) -> StepRecord:
         """run teststep: referenced testcase"""
-        step_data = StepData(name=step.name)
+        step_data = StepRecord(name=step.name)
         step_variables = step.variables
         step_export = step.export
 
@@ -250,17 +464,11 @@ class HttpRunner(object):
                 .with_case_id(self.__case_id)
                 .with_variables(step_variables)
                 .with_export(step_export)
-                .run()
+                .run_testcase(load_ref_testcase(testcase_cls))
             )
 
         elif isinstance(step.testcase, Text):
-            if os.path.isabs(step.testcase):
-                ref_testcase_path = step.testcase
-            else:
-                ref_testcase_path = os.path.join(
-                    self.__project_meta.RootDir, step.testcase
-                )
-
+            ref_testcase_path = self.__get_ref_testcase(step)
             case_result = (
                 HttpRunner()
                 .with_session(self.__session)
@@ -279,7 +487,7 @@ class HttpRunner(object):
         if step.teardown_hooks:
             self.__call_hooks(step.teardown_hooks, step.variables, "teardown testcase")
 
-        step_data.data = case_result.get_step_datas()  # list of step data
+        step_data.data = case_result.get_step_records()  # list of step data
         step_data.export_vars = case_result.get_export_variables()
         step_data.success = case_result.success
         self.success = case_result.success
@@ -289,25 +497,272 @@ class HttpRunner(object):
 
         return step_data
 
-    def __run_step(self, step: TStep) -> Dict:
+    def __run_step(self, step: TStep) -> StepRecord:
         """run teststep, teststep maybe a request or referenced testcase"""
         logger.info(f"run step begin: {step.name} >>>>>>")
 
         if step.request:
-            step_data = self.__run_step_request(step)
+            run_step = self.__run_step_request
         elif step.testcase:
-            step_data = self.__run_step_testcase(step)
+            run_step = self.__run_step_testcase
         else:
             raise ParamsError(
                 f"teststep is neither a request nor a referenced testcase: {step.dict()}"
             )
 
-        self.__step_datas.append(step_data)
+        with profiler.step(step.name), metrics.step(
+            self.__config.name, step.name
+        ), tracing.start_span(f"step: {step.name}"):
+            if step.cache:
+                step_data = self.__run_step_with_cache(step, run_step)
+            else:
+                step_data = run_step(step)
+
         logger.info(f"run step end: {step.name} <<<<<<\n")
-        return step_data.export_vars
+        return step_data
+
+    def __run_step_with_cache(
+        self, step: TStep, run_step: Callable[[TStep], StepRecord]
+    ) -> StepRecord:
+        """ run teststep once for the same referenced variables in cache scope,
+            extracted or exported variables are reused afterwards.
+        """
+        step_content = step.dict(include=STEP_CACHE_KEY_FIELDS)
+        referenced_variables = extract_variables(step_content)
+        if step.testcase:
+            referenced_variables |= get_ref_testcase_variables(
+                self.__get_ref_testcase(step)
+            )
+
+        input_variables = {
+            var_name: step.variables[var_name]
+            for var_name in referenced_variables
+            if var_name in step.variables
+        }
+        cache_key = make_cache_key(
+            step.cache.scope, step_content, input_variables, self.__config.path
+        )
+
+        run_result = {}
+
+        def run_step_once() -> VariablesMapping:
+            run_result["step_data"] = run_step(step)
+            return run_result["step_data"].export_vars
+
+        export_vars, hit = step_cache.get_or_run(
+            cache_key,
+            run_step_once,
+            ttl=step.cache.ttl,
+            shared=step.cache.scope == CacheScopeEnum.SESSION,
+        )
+        if not hit:
+            return run_result["step_data"]
+
+        logger.info(f"step cache hit, scope: {step.cache.scope.value}")
+        step_data = StepRecord(name=step.name)
+        step_data.success = True
+        step_data.export_vars = export_vars
+        self.success = True
+        return step_data
+
+    def __save_step_data(self, step_data: StepRecord) -> NoReturn:
+        self.__step_datas.append(step_data)
+        if self.__step_callback:
+            self.__step_callback(step_data.to_model())
 
-    def __parse_config(self, config: TConfig) -> NoReturn:
-        config.variables.update(self.__session_variables)
+    def __prepare_step_variables(
+        self, step: TStep, extracted_variables: VariablesMapping
+    ) -> NoReturn:
+        # step variables > extracted variables from previous steps > config variables,
+        # only step variables are parsed, lower layers are shared instead of copied
+        step_variables = get_declared_variables(step.variables)
+        base_variables = VariablesScope(extracted_variables, self.__config.variables)
+        with profiler.phase("variables", step.name):
+            parsed_variables = parse_variables_mapping(
+                step_variables, self.__project_meta.functions, base_variables
+            )
+        step.variables = VariablesScope(
+            parsed_variables, *base_variables.maps, declared=step_variables
+        )
+
+    def __run_steps_concurrently(self) -> VariablesMapping:
+        """ run independent teststeps concurrently wave by wave, step datas are saved
+            in the order of teststeps, thus summary is the same as running sequentially.
+        """
+        teststeps = self.__teststeps
+        # index of teststep => extracted variables
+        step_exports: Dict[int, VariablesMapping] = {}
+
+        def get_extracted_variables(step_index: int) -> VariablesMapping:
+            # only variables extracted by previous teststeps are visible, in order
+            extracted_variables = {}
+            for index in sorted(step_exports):
+                if index < step_index:
+                    extracted_variables.update(step_exports[index])
+            return extracted_variables
+
+        def run_step(step_index: int) -> StepRecord:
+            step = teststeps[step_index]
+            self.__prepare_step_variables(step, get_extracted_variables(step_index))
+            return self.__run_step(step)
+
+        max_workers = self.__config.concurrency
+        with ThreadPoolExecutor(max_workers, thread_name_prefix="hrun-step") as executor:
+            for wave in get_step_waves(teststeps):
+                if len(wave) == 1:
+                    step_index = wave[0]
+                    if USE_ALLURE:
+                        with allure.step(f"step: {teststeps[step_index].name}"):
+                            step_data = run_step(step_index)
+                    else:
+                        step_data = run_step(step_index)
+                    step_exports[step_index] = step_data.export_vars
+                    self.__save_step_data(step_data)
+                    continue
+
+                if log.is_enabled("INFO"):
+                    names = [teststeps[index].name for index in wave]
+                    logger.info(f"run teststeps concurrently: {names}")
+
+                # copy context for each teststep, thus logs go to testcase log file
+                futures = [
+                    executor.submit(copy_context().run, run_step, index)
+                    for index in wave
+                ]
+                first_exception = None
+                for step_index, future in zip(wave, futures):
+                    try:
+                        step_data = future.result()
+                    except Exception as ex:
+                        first_exception = first_exception or ex
+                        continue
+
+                    step_exports[step_index] = step_data.export_vars
+                    self.__save_step_data(step_data)
+
+                if first_exception is not None:
+                    self.success = False
+                    raise first_exception
+
+        return get_extracted_variables(len(teststeps))
+
+    def __load_ref_testcase_of_step(self, step: TStep) -> TestCase:
+        ref_testcase = self.__get_ref_testcase(step)
+        if isinstance(ref_testcase, Text):
+            if not os.path.isfile(ref_testcase):
+                raise exceptions.ParamsError(f"Invalid testcase path: {ref_testcase}")
+        elif not (
+            hasattr(ref_testcase, "config") and hasattr(ref_testcase, "teststeps")
+        ):
+            raise exceptions.ParamsError(
+                f"Invalid teststep referenced testcase: {step.dict()}"
+            )
+
+        return load_ref_testcase(ref_testcase)
+
+    def __run_flat_plan(self, testcase: TestCase) -> VariablesMapping:
+        """ run testcase with referenced testcases inlined into one flat plan,
+            step datas of referenced testcases are nested the same as nested runners.
+
+        Returns:
+            dict: variables extracted by teststeps of root testcase
+
+        """
+        root_config = self.__config
+        root_state = _FrameState(root_config, self.__session_variables)
+        root_state.step_datas = self.__step_datas
+        # frame of referenced testcase => runtime state, root frame is not included
+        states: Dict[PlanFrame, _FrameState] = {}
+
+        def save_step_data(state: _FrameState, step_data: StepRecord):
+            if state is root_state:
+                self.__save_step_data(step_data)
+            else:
+                state.step_datas.append(step_data)
+            state.extracted.update(step_data.export_vars)
+
+        try:
+            for node in build_plan(testcase, self.__load_ref_testcase_of_step):
+                step = node.step
+                frame = node.frame
+
+                if node.kind == PlanNode.STEP:
+                    state = states.get(frame, root_state)
+                    self.__config = state.config
+                    self.__prepare_step_variables(step, state.extracted)
+                    if USE_ALLURE:
+                        with allure.step(f"step: {step.name}"):
+                            step_data = self.__run_step(step)
+                    else:
+                        step_data = self.__run_step(step)
+
+                    save_step_data(state, step_data)
+
+                elif node.kind == PlanNode.ENTER:
+                    parent_state = states.get(frame.parent, root_state)
+                    self.__config = parent_state.config
+                    self.__prepare_step_variables(step, parent_state.extracted)
+
+                    state = _FrameState(frame.config, step.variables)
+                    states[frame] = state
+                    if USE_ALLURE:
+                        state.exit_stack.enter_context(
+                            allure.step(f"step: {step.name}")
+                        )
+
+                    logger.info(f"run step begin: {step.name} >>>>>>")
+                    if step.setup_hooks:
+                        self.__call_hooks(
+                            step.setup_hooks, step.variables, "setup testcase"
+                        )
+                    self.__parse_config(frame.config, step.variables)
+
+                else:
+                    state = states.pop(frame)
+                    parent_state = states.get(frame.parent, root_state)
+                    self.__config = parent_state.config
+
+                    state.session_variables.update(state.extracted)
+                    export_vars = {}
+                    for var_name in frame.export:
+                        if var_name not in state.session_variables:
+                            raise ParamsError(
+                                f"failed to export variable {var_name} from session variables {state.session_variables}"
+                            )
+                        export_vars[var_name] = state.session_variables[var_name]
+
+                    if step.teardown_hooks:
+                        self.__call_hooks(
+                            step.teardown_hooks, step.variables, "teardown testcase"
+                        )
+
+                    step_data = StepRecord(name=step.name)
+                    step_data.data = state.step_datas
+                    step_data.export_vars = export_vars
+                    # the same as success of nested runner, i.e. result of its last teststep
+                    step_data.success = (
+                        bool(state.step_datas) and state.step_datas[-1].success
+                    )
+                    self.success = step_data.success
+                    if export_vars:
+                        logger.info(f"export variables: {export_vars}")
+                    logger.info(f"run step end: {step.name} <<<<<<\n")
+
+                    state.exit_stack.close()
+                    save_step_data(parent_state, step_data)
+        finally:
+            self.__config = root_config
+            for state in reversed(list(states.values())):
+                state.exit_stack.close()
+
+        return root_state.extracted
+
+    def __parse_config(
+        self, config: TConfig, session_variables: VariablesMapping = None
+    ) -> NoReturn:
+        if session_variables is None:
+            session_variables = self.__session_variables
+        config.variables.update(session_variables)
         config.variables = parse_variables_mapping(
             config.variables, self.__project_meta.functions
         )
@@ -326,6 +781,14 @@ class HttpRunner(object):
             >>> HttpRunner().with_project_meta(project_meta).run_testcase(testcase_obj)
 
         """
+        metrics.init_from_env()
+        tracing.init_from_env()
+        # referenced testcases are traced as children of referencing teststep
+        with tracing.start_span(f"testcase: {testcase.config.name}") as span:
+            span.set_attribute("hrun.case_id", self.__case_id)
+            return self.__run_testcase(testcase)
+
+    def __run_testcase(self, testcase: TestCase) -> "HttpRunner":
         self.__config = testcase.config
         self.__teststeps = testcase.teststeps
 
@@ -335,33 +798,40 @@ class HttpRunner(object):
         )
         self.__parse_config(self.__config)
         self.__start_at = time.time()
-        self.__step_datas: List[StepData] = []
+        self.__step_datas: List[StepRecord] = []
         self.__session = self.__session or HttpSession()
+        if self.__config.concurrency > 1 and len(self.__teststeps) > 1:
+            # opt-in, independent teststeps are run concurrently on the shared session
+            self.__session_variables.update(self.__run_steps_concurrently())
+            self.__duration = time.time() - self.__start_at
+            return self
+
+        flat_plan = self.__flat_plan
+        if flat_plan is None:
+            flat_plan = is_flat_plan_enabled()
+        if flat_plan and any(step.testcase for step in self.__teststeps):
+            # opt-in, referenced testcases are inlined and run without nested runners
+            self.__session_variables.update(self.__run_flat_plan(testcase))
+            self.__duration = time.time() - self.__start_at
+            return self
+
         # save extracted variables of teststeps
         extracted_variables: VariablesMapping = {}
 
         # run teststeps
         for step in self.__teststeps:
-            # override variables
-            # step variables > extracted variables from previous steps
-            step.variables = merge_variables(step.variables, extracted_variables)
-            # step variables > testcase config variables
-            step.variables = merge_variables(step.variables, self.__config.variables)
-
-            # parse variables
-            step.variables = parse_variables_mapping(
-                step.variables, self.__project_meta.functions
-            )
+            self.__prepare_step_variables(step, extracted_variables)
 
             # run step
             if USE_ALLURE:
                 with allure.step(f"step: {step.name}"):
-                    extract_mapping = self.__run_step(step)
+                    step_data = self.__run_step(step)
             else:
-                extract_mapping = self.__run_step(step)
+                step_data = self.__run_step(step)
 
+            self.__save_step_data(step_data)
             # save extracted variables to session variables
-            extracted_variables.update(extract_mapping)
+            extracted_variables.update(step_data.export_vars)
 
         self.__session_variables.update(extracted_variables)
         self.__duration = time.time() - self.__start_at
@@ -371,7 +841,8 @@ class HttpRunner(object):
         if not os.path.isfile(path):
             raise exceptions.ParamsError(f"Invalid testcase path: {path}")
 
-        testcase_obj = load_testcase_file(path)
+        # loaded once, reloaded if file modified
+        testcase_obj = load_testcase_file_cached(path)
         return self.run_testcase(testcase_obj)
 
     def run(self) -> "HttpRunner":
@@ -386,6 +857,13 @@ class HttpRunner(object):
         return self.run_testcase(testcase_obj)
 
     def get_step_datas(self) -> List[StepData]:
+        """ materialize step records as pydantic models
+        """
+        return [step_data.to_model() for step_data in self.__step_datas]
+
+    def get_step_records(self) -> List[StepRecord]:
+        """ runtime step records, without pydantic models created
+        """
         return self.__step_datas
 
     def get_export_variables(self) -> Dict:
@@ -420,7 +898,7 @@ class HttpRunner(object):
                 export_vars=self.get_export_variables(),
             ),
             log=self.__log_path,
-            step_datas=self.__step_datas,
+            step_datas=self.get_step_datas(),
         )
 
     def test_start(self, param: Dict = None) -> "HttpRunner":
@@ -433,8 +911,35 @@ class HttpRunner(object):
         self.__log_path = self.__log_path or os.path.join(
             self.__project_meta.RootDir, "logs", f"{self.__case_id}.run.log"
         )
-        log_handler = logger.add(self.__log_path, level="DEBUG")
+        log.setup_logger()
+        profile_mode = profiler.get_profile_mode()
+        try:
+            # records are routed to testcase log file by shared sink
+            with log.case_log_context(self.__log_path):
+                if not profile_mode:
+                    return self.__start_testcase(param)
+
+                profile = profiler.Profiler(self.__config.name, profile_mode)
+                try:
+                    with profile:
+                        return self.__start_testcase(param)
+                finally:
+                    self.__dump_profile(profile)
+        finally:
+            logger.info(f"generate testcase log: {self.__log_path}")
+
+    def __dump_profile(self, profile: profiler.Profiler) -> NoReturn:
+        """ dump profile of testcase beside testcase log, named by testcase ID
+        """
+        # testcase name is parsed when testcase started
+        profile.name = self.__config.name.replace(";", ",")
+        profile_prefix = os.path.join(
+            self.__project_meta.RootDir, "logs", self.__case_id
+        )
+        for path in profile.dump(profile_prefix):
+            logger.info(f"generate testcase profile: {path}")
 
+    def __start_testcase(self, param: Dict = None) -> "HttpRunner":
         # parse config name
         config_variables = self.__config.variables
         if param:
@@ -453,10 +958,6 @@ class HttpRunner(object):
             f"Start to run testcase: {self.__config.name}, TestCase ID: {self.__case_id}"
         )
 
-        try:
-            return self.run_testcase(
-                TestCase(config=self.__config, teststeps=self.__teststeps)
-            )
-        finally:
-            logger.remove(log_handler)
-            logger.info(f"generate testcase log: {self.__log_path}")
+        return self.run_testcase(
+            TestCase(config=self.__config, teststeps=self.__teststeps)
+        )
@@ -5,7 +5,8 @@ import subprocess
 import sys
 
 from loguru import logger
-from sentry_sdk import capture_message
+
+from httprunner import telemetry
 
 
 def init_parser_scaffold(subparsers):
@@ -201,5 +202,5 @@ def sleep(n_secs):
 
 
 def main_scaffold(args):
-    capture_message("startproject with scaffold")
+    telemetry.capture_message("startproject with scaffold")
     sys.exit(create_scaffold(args.project_name))
@@ -0,0 +1,177 @@
+# 测试结果汇总(summary)的流式写入与读取, 用于 --save-tests
+"""
+每个 testcase 执行结束后立即把它的 summary 追加写入文件, 不再在内存中累积全部结果,
+stat 统计信息在写入过程中实时计算, 最后写在文件末尾。
+
+生成的文件仍然是一个合法的 JSON 文档, 但每条 testcase 记录独占一行, 因此可以逐行读取:
+
+    {"details": [
+    {"name": "testcase 1", "success": true, ...}
+    ,{"name": "testcase 2", "success": false, ...}
+    ],
+    "success": false, "stat": {...}, "time": {...}, "platform": {...}}
+
+"""
+import json
+import os
+import time
+from typing import Dict, Iterator, Text
+
+from httprunner import exceptions
+from httprunner.models import TestCaseSummary
+from httprunner.utils import ExtendJSONEncoder, get_platform
+
+SUMMARY_HEADER = '{"details": ['
+SUMMARY_FOOTER_SEP = "],"
+
+
+class SummaryStat(object):
+    """ aggregate stat block of task summary on the fly
+    """
+
+    def __init__(self):
+        self.success = True
+        self.testcases = {"total": 0, "success": 0, "fail": 0}
+        self.teststeps = {"total": 0, "failures": 0, "successes": 0}
+
+    def add(self, success: bool, steps_count: int):
+        self.success &= success
+
+        self.testcases["total"] += 1
+        self.teststeps["total"] += steps_count
+        if success:
+            self.testcases["success"] += 1
+            self.teststeps["successes"] += steps_count
+        else:
+            # the last step failed and aborted the testcase
+            self.testcases["fail"] += 1
+            self.teststeps["successes"] += steps_count - 1
+            self.teststeps["failures"] += 1
+
+    def dict(self) -> Dict:
+        return {"testcases": dict(self.testcases), "teststeps": dict(self.teststeps)}
+
+
+class SummaryWriter(object):
+    """ write task summary incrementally, one testcase record per line
+
+    Examples:
+        >>> with SummaryWriter("logs/all.summary.json") as writer:
+        ...     writer.add_testcase(runner.get_summary())
+
+    """
+
+    def __init__(self, summary_path: Text, start_at: float = None):
+        self.summary_path = summary_path
+        self.start_at = start_at or time.time()
+        self.stat = SummaryStat()
+        self.__count = 0
+
+        summary_dir = os.path.dirname(summary_path)
+        if summary_dir:
+            os.makedirs(summary_dir, exist_ok=True)
+
+        self.__file = open(summary_path, "w", encoding="utf-8")
+        self.__file.write(SUMMARY_HEADER)
+        self.__file.flush()
+
+    def __enter__(self) -> "SummaryWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def closed(self) -> bool:
+        return self.__file.closed
+
+    def add_testcase(self, testcase_summary: TestCaseSummary):
+        self.stat.add(testcase_summary.success, len(testcase_summary.step_datas))
+
+        testcase_summary_json = testcase_summary.dict()
+        testcase_summary_json["records"] = testcase_summary_json.pop("step_datas")
+        record = json.dumps(
+            testcase_summary_json, ensure_ascii=False, cls=ExtendJSONEncoder
+        )
+
+        # leading comma keeps every record on its own line and the document valid
+        prefix = "\n," if self.__count else "\n"
+        self.__file.write(prefix + record)
+        self.__file.flush()
+        self.__count += 1
+
+    def close(self) -> Dict:
+        """ write stat/time/platform at the end of summary file
+
+        Returns:
+            dict: summary without details
+
+        """
+        footer = {
+            "success": self.stat.success,
+            "stat": self.stat.dict(),
+            "time": {"start_at": self.start_at, "duration": time.time() - self.start_at},
+            "platform": get_platform(),
+        }
+        if self.closed:
+            return footer
+
+        footer_str = json.dumps(footer, ensure_ascii=False, cls=ExtendJSONEncoder)
+        # {"success": ...} => "success": ...}
+        self.__file.write(f"\n{SUMMARY_FOOTER_SEP}\n{footer_str[1:]}\n")
+        self.__file.close()
+        return footer
+
+
+def iter_summary_details(summary_path: Text) -> Iterator[Dict]:
+    """ iterate testcase records in summary file without loading the whole file.
+        records of an unfinished task (summary file without footer) are also yielded.
+    """
+    with open(summary_path, encoding="utf-8") as f:
+        first_line = f.readline().strip()
+        if first_line != SUMMARY_HEADER:
+            # summary.json dumped in one piece by former versions
+            f.seek(0)
+            yield from json.load(f).get("details", [])
+            return
+
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith(SUMMARY_FOOTER_SEP):
+                break
+
+            yield json.loads(line.lstrip(","))
+
+
+def load_summary_stat(summary_path: Text) -> Dict:
+    """ load summary of task, i.e. success/stat/time/platform, without testcase details
+    """
+    with open(summary_path, encoding="utf-8") as f:
+        first_line = f.readline().strip()
+        if first_line != SUMMARY_HEADER:
+            f.seek(0)
+            summary = json.load(f)
+            summary.pop("details", None)
+            return summary
+
+    # footer is the last line of summary file
+    with open(summary_path, mode="rb") as f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        block_size = 4096
+        while True:
+            start = max(0, end - block_size)
+            f.seek(start)
+            tail = f.read(end - start).decode("utf-8", errors="ignore")
+            sep_index = tail.rfind(f"\n{SUMMARY_FOOTER_SEP}\n")
+            if sep_index >= 0 or start == 0:
+                break
+            block_size *= 2
+
+    if sep_index < 0:
+        raise exceptions.SummaryEmpty(f"task summary not finished: {summary_path}")
+
+    footer_str = tail[sep_index + len(SUMMARY_FOOTER_SEP) + 2:]
+    return json.loads("{" + footer_str)
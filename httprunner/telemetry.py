@@ -0,0 +1,159 @@
+# 遥测上报(sentry): 默认关闭, 设置环境变量 HRUN_TELEMETRY=1 显式开启
+"""
+开启后, sentry_sdk 在首次上报时才在后台线程中导入并初始化, 上报事件放入有界队列由后台线程发送,
+队列满时直接丢弃, 不会阻塞请求线程; 关闭时所有上报接口仅做一次布尔判断。
+
+    $ export HRUN_TELEMETRY=1
+    $ hrun examples/
+
+"""
+import atexit
+import os
+import queue
+import threading
+import time
+import uuid
+from typing import Callable, Text, Tuple
+
+from httprunner import __version__
+
+TELEMETRY_ENV = "HRUN_TELEMETRY"
+SENTRY_DSN = "https://460e31339bcb428c879aafa6a2e78098@sentry.io/5263855"
+
+# event: (kind, payload), kind is "message" or "exception"
+Event = Tuple[Text, object]
+
+
+def is_enabled() -> bool:
+    return os.getenv(TELEMETRY_ENV, "").lower() in ["1", "true", "yes", "on"]
+
+
+def init_sentry_sdk():
+    """ init sentry sdk synchronously, sentry is used to report errors of HttpRunner
+    """
+    import sentry_sdk
+
+    sentry_sdk.init(dsn=SENTRY_DSN, release=f"httprunner@{__version__}")
+    with sentry_sdk.configure_scope() as scope:
+        scope.set_user({"id": uuid.getnode()})
+
+
+def send_to_sentry(event: Event):
+    import sentry_sdk
+
+    kind, payload = event
+    if kind == "exception":
+        sentry_sdk.capture_exception(payload)
+    else:
+        sentry_sdk.capture_message(payload)
+
+
+class TelemetryWorker(object):
+    """ send telemetry events in a daemon thread, events are dropped when queue is full
+
+    Args:
+        sender: function to send one event
+        initializer: function called once in worker thread before sending events
+        maxsize: max events waiting to be sent
+
+    """
+
+    def __init__(
+        self,
+        sender: Callable[[Event], None] = send_to_sentry,
+        initializer: Callable[[], None] = init_sentry_sdk,
+        maxsize: int = 100,
+    ):
+        self.sender = sender
+        self.initializer = initializer
+        self.dropped = 0
+        self.__queue = queue.Queue(maxsize=maxsize)
+        self.__thread = None
+        self.__lock = threading.Lock()
+
+    @property
+    def started(self) -> bool:
+        return self.__thread is not None
+
+    def submit(self, event: Event) -> bool:
+        """ put event to queue without blocking, return False if dropped
+        """
+        if self.__thread is None:
+            self.__start()
+
+        try:
+            self.__queue.put_nowait(event)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def __start(self):
+        with self.__lock:
+            if self.__thread is not None:
+                return
+
+            self.__thread = threading.Thread(
+                target=self.__run, name="hrun-telemetry", daemon=True
+            )
+            self.__thread.start()
+
+    def __run(self):
+        try:
+            self.initializer()
+        except Exception:
+            # telemetry should never break tests, drain queue silently
+            self.sender = lambda event: None
+
+        while True:
+            event = self.__queue.get()
+            try:
+                self.sender(event)
+            except Exception:
+                pass
+            finally:
+                self.__queue.task_done()
+
+    def flush(self, timeout: float = 2.0) -> bool:
+        """ wait until queued events are sent, return False if timeout
+        """
+        deadline = time.time() + timeout
+        while self.__queue.unfinished_tasks:
+            if time.time() >= deadline:
+                return False
+            time.sleep(0.01)
+
+        return True
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def get_worker() -> TelemetryWorker:
+    global _worker
+    if _worker is None:
+        with _worker_lock:
+            if _worker is None:
+                _worker = TelemetryWorker()
+                atexit.register(_worker.flush)
+
+    return _worker
+
+
+def capture_message(message: Text):
+    """ report message if telemetry enabled, never blocks caller
+    """
+    if not is_enabled():
+        return
+
+    get_worker().submit(("message", message))
+
+
+def capture_exception(exception: BaseException):
+    """ report exception if telemetry enabled, never blocks caller
+    """
+    if not is_enabled():
+        return
+
+    get_worker().submit(("exception", exception))
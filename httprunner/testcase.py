@@ -1,17 +1,40 @@
 # 测试用例的信息
 
 import inspect
-from typing import Text, Any, Union, Callable
+from typing import Text, Any, Union, Callable, List
 
 from httprunner.models import (
+    TCircuitBreaker,
     TConfig,
+    TRateLimit,
+    TRetry,
     TStep,
+    TStepCache,
     TRequest,
     MethodEnum,
     TestCase,
 )
 
 
+def make_retry(
+    times: int = 3,
+    status_codes: List[int] = None,
+    exceptions: List[Text] = None,
+    backoff: float = 0.5,
+    max_backoff: float = 10,
+    jitter: bool = True,
+    methods: List[Text] = None,
+) -> TRetry:
+    retry = TRetry(times=times, backoff=backoff, max_backoff=max_backoff, jitter=jitter)
+    if status_codes is not None:
+        retry.status_codes = status_codes
+    if exceptions is not None:
+        retry.exceptions = exceptions
+    if methods is not None:
+        retry.methods = [method.upper() for method in methods]
+    return retry
+
+
 class Config(object):
     def __init__(self, name: Text):
         self.__name = name
@@ -20,6 +43,10 @@ class Config(object):
         self.__verify = False
         self.__export = []
         self.__weight = 1
+        self.__concurrency = 1
+        self.__retry = None
+        self.__circuit_breaker = None
+        self.__rate_limits = {}
 
         caller_frame = inspect.stack()[1]
         self.__path = caller_frame.filename
@@ -56,6 +83,51 @@ class Config(object):
         self.__weight = weight
         return self
 
+    def concurrency(self, concurrency: int) -> "Config":
+        """ run independent teststeps concurrently, teststeps depend on variables
+            extracted or exported by previous teststeps are run after them.
+        """
+        self.__concurrency = concurrency
+        return self
+
+    def retry(
+        self,
+        times: int = 3,
+        status_codes: List[int] = None,
+        exceptions: List[Text] = None,
+        backoff: float = 0.5,
+        max_backoff: float = 10,
+        jitter: bool = True,
+        methods: List[Text] = None,
+    ) -> "Config":
+        """ retry request teststeps on retryable exceptions or status codes with exponential backoff,
+            default to retry on ConnectionError and Timeout of idempotent methods only.
+        """
+        self.__retry = make_retry(
+            times, status_codes, exceptions, backoff, max_backoff, jitter, methods
+        )
+        return self
+
+    def circuit_breaker(
+        self, threshold: int = 5, recovery_timeout: float = 30
+    ) -> "Config":
+        """ fail fast without sending requests once a host fails threshold times in a row,
+            a probe request is allowed after recovery_timeout seconds.
+        """
+        self.__circuit_breaker = TCircuitBreaker(
+            threshold=threshold, recovery_timeout=recovery_timeout
+        )
+        return self
+
+    def rate_limit(
+        self, host_pattern: Text, rate: float, burst: int = None
+    ) -> "Config":
+        """ limit requests per second to hosts matching pattern with token bucket,
+            e.g. "auth.internal", "*.internal", or "*" for all hosts.
+        """
+        self.__rate_limits[host_pattern] = TRateLimit(rate=rate, burst=burst)
+        return self
+
     def perform(self) -> TConfig:
         return TConfig(
             name=self.__name,
@@ -65,6 +137,10 @@ class Config(object):
             export=list(set(self.__export)),
             path=self.__path,
             weight=self.__weight,
+            concurrency=self.__concurrency,
+            retry=self.__retry,
+            circuit_breaker=self.__circuit_breaker,
+            rate_limits=self.__rate_limits,
         )
 
 
@@ -311,6 +387,29 @@ class RunRequest(object):
         self.__step_context.variables.update(variables)
         return self
 
+    def with_cache(self, scope: Text = "session", ttl: float = 0) -> "RunRequest":
+        """ run request once for the same referenced variables in scope, and reuse extracted variables
+        """
+        self.__step_context.cache = TStepCache(scope=scope, ttl=ttl)
+        return self
+
+    def with_retry(
+        self,
+        times: int = 3,
+        status_codes: List[int] = None,
+        exceptions: List[Text] = None,
+        backoff: float = 0.5,
+        max_backoff: float = 10,
+        jitter: bool = True,
+        methods: List[Text] = None,
+    ) -> "RunRequest":
+        """ retry request on retryable exceptions or status codes, overrides config retry
+        """
+        self.__step_context.retry = make_retry(
+            times, status_codes, exceptions, backoff, max_backoff, jitter, methods
+        )
+        return self
+
     def setup_hook(self, hook: Text, assign_var_name: Text = None) -> "RunRequest":
         if assign_var_name:
             self.__step_context.setup_hooks.append({assign_var_name: hook})
@@ -376,6 +475,12 @@ class RunTestCase(object):
         self.__step_context.variables.update(variables)
         return self
 
+    def with_cache(self, scope: Text = "session", ttl: float = 0) -> "RunTestCase":
+        """ run referenced testcase once for the same variables in scope, and reuse exported variables
+        """
+        self.__step_context.cache = TStepCache(scope=scope, ttl=ttl)
+        return self
+
     def setup_hook(self, hook: Text, assign_var_name: Text = None) -> "RunTestCase":
         if assign_var_name:
             self.__step_context.setup_hooks.append({assign_var_name: hook})
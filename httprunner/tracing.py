@@ -0,0 +1,471 @@
+# 分布式追踪: 为 testcase/step/HTTP 请求/钩子/校验生成 span, 注入 W3C traceparent 请求头, 后台线程批量导出
+"""
+启用方式, 导出到 JSON Lines 文件, 或以 OTLP/HTTP JSON 格式发送到本地 collector (如 OpenTelemetry Collector、Jaeger):
+
+    $ hrun --hrun-trace logs/spans.jsonl testcases/
+    $ hrun --hrun-trace http://127.0.0.1:4318 testcases/
+
+span 的层级关系为 testcase => step => HTTP 请求 / 钩子 / 校验, 引用的 testcase 嵌套在引用它的 step 下。
+HTTP 请求的 traceparent 请求头携带请求 span 的 trace id 与 span id, 服务端的 span 可据此关联到客户端。
+
+span 结束后放入队列, 由后台线程按批次(数量或时间间隔)导出, 队列满时丢弃, 不阻塞测试执行;
+未启用时 tracer 为 None, start_span() 仅返回共享的空上下文管理器。
+
+"""
+import atexit
+import json
+import os
+import queue
+import random
+import threading
+import time
+from typing import Any, ContextManager, Dict, List, Optional, Text, Tuple
+
+from loguru import logger
+
+from httprunner.backports import ContextVar, nullcontext
+from httprunner.utils import pop_cli_option
+
+TRACE_ENV = "HRUN_TRACE"
+TRACE_ARG = "--hrun-trace"
+TRACEPARENT_HEADER = "traceparent"
+OTLP_TRACES_PATH = "/v1/traces"
+
+
+def time_ns() -> int:
+    """ unix time in nanoseconds, time.time_ns() is not available in python 3.6
+    """
+    return int(time.time() * 1e9)
+
+
+class SpanKind(object):
+    # values of OTLP span kind
+    INTERNAL = 1
+    CLIENT = 3
+
+
+class StatusCode(object):
+    # values of OTLP status code
+    UNSET = 0
+    OK = 1
+    ERROR = 2
+
+
+class Span(object):
+    __slots__ = (
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "kind",
+        "start_time",
+        "end_time",
+        "attributes",
+        "status_code",
+        "status_message",
+    )
+
+    def __init__(
+        self,
+        name: Text,
+        trace_id: Text,
+        parent_id: Text = "",
+        kind: int = SpanKind.INTERNAL,
+        attributes: Dict = None,
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.kind = kind
+        # unix nanoseconds
+        self.start_time = time_ns()
+        self.end_time = 0
+        self.attributes = dict(attributes or {})
+        self.status_code = StatusCode.UNSET
+        self.status_message = ""
+
+    @property
+    def traceparent(self) -> Text:
+        """ W3C trace context: version-trace_id-parent_id-flags, sampled
+        """
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def update_name(self, name: Text):
+        self.name = name
+
+    def set_attribute(self, key: Text, value: Any):
+        self.attributes[key] = value
+
+    def set_status(self, status_code: int, message: Text = ""):
+        self.status_code = status_code
+        self.status_message = message
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "kind": "client" if self.kind == SpanKind.CLIENT else "internal",
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "duration_ms": round((self.end_time - self.start_time) / 1e6, 3),
+            "attributes": self.attributes,
+            "status": {
+                StatusCode.UNSET: "unset",
+                StatusCode.OK: "ok",
+                StatusCode.ERROR: "error",
+            }[self.status_code],
+            "status_message": self.status_message,
+        }
+
+
+class _NullSpan(object):
+    """ span returned when tracing disabled, all operations are ignored
+    """
+
+    traceparent = ""
+
+    def update_name(self, name: Text):
+        pass
+
+    def set_attribute(self, key: Text, value: Any):
+        pass
+
+    def set_status(self, status_code: int, message: Text = ""):
+        pass
+
+
+_current_span: ContextVar = ContextVar("hrun_current_span", default=None)
+_null_span_context = nullcontext(_NullSpan())
+# put into export queue to stop background thread
+_SHUTDOWN = object()
+
+
+class _SpanContext(object):
+    __slots__ = ("tracer", "span", "token")
+
+    def __init__(self, tracer: "Tracer", span: Span):
+        self.tracer = tracer
+        self.span = span
+
+    def __enter__(self) -> Span:
+        self.token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _current_span.reset(self.token)
+        span = self.span
+        if exc_type is not None:
+            span.set_status(StatusCode.ERROR, f"{exc_type.__name__}: {exc_val}")
+        span.end_time = time_ns()
+        self.tracer.processor.on_end(span)
+
+
+class FileSpanExporter(object):
+    """ export spans to file in JSON lines, one span per line
+    """
+
+    def __init__(self, file_path: Text):
+        self.file_path = file_path
+        file_dir = os.path.dirname(file_path)
+        if file_dir:
+            os.makedirs(file_dir, exist_ok=True)
+
+    def export(self, spans: List[Span]):
+        content = "".join(
+            json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n"
+            for span in spans
+        )
+        # one write for each batch, thus lines of worker processes are not interleaved
+        with open(self.file_path, "a", encoding="utf-8") as f:
+            f.write(content)
+
+
+def _to_otlp_value(value: Any) -> Dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _to_otlp_attributes(attributes: Dict) -> List[Dict]:
+    return [
+        {"key": key, "value": _to_otlp_value(value)}
+        for key, value in attributes.items()
+    ]
+
+
+class OtlpHttpSpanExporter(object):
+    """ export spans to collector with OTLP/HTTP in JSON encoding
+    """
+
+    def __init__(self, endpoint: Text, timeout: float = 10):
+        if not endpoint.rstrip("/").endswith(OTLP_TRACES_PATH):
+            endpoint = endpoint.rstrip("/") + OTLP_TRACES_PATH
+        self.endpoint = endpoint
+        self.timeout = timeout
+
+    def make_payload(self, spans: List[Span]) -> Dict:
+        from httprunner import __version__
+
+        otlp_spans = []
+        for span in spans:
+            otlp_span = {
+                "traceId": span.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": span.kind,
+                "startTimeUnixNano": str(span.start_time),
+                "endTimeUnixNano": str(span.end_time),
+                "attributes": _to_otlp_attributes(span.attributes),
+                "status": {"code": span.status_code, "message": span.status_message},
+            }
+            if span.parent_id:
+                otlp_span["parentSpanId"] = span.parent_id
+            otlp_spans.append(otlp_span)
+
+        resource_attributes = {"service.name": "httprunner", "process.pid": os.getpid()}
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": _to_otlp_attributes(resource_attributes)
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "httprunner", "version": __version__},
+                            "spans": otlp_spans,
+                        }
+                    ],
+                }
+            ]
+        }
+
+    def export(self, spans: List[Span]):
+        # spans are not traced, sent without HttpSession
+        import requests
+
+        resp = requests.post(
+            self.endpoint, json=self.make_payload(spans), timeout=self.timeout
+        )
+        resp.raise_for_status()
+
+
+class BatchSpanProcessor(object):
+    """ queue ended spans and export them in batches from background thread,
+        spans are dropped if queue is full, thus testcases are never blocked by exporter.
+
+    Args:
+        exporter: exporter with export(spans) method
+        max_batch_size: max spans exported in one batch
+        schedule_delay: max seconds a span waits in queue before exported
+        max_queue_size: max spans waiting to be exported
+
+    """
+
+    def __init__(
+        self,
+        exporter,
+        max_batch_size: int = 512,
+        schedule_delay: float = 1.0,
+        max_queue_size: int = 2048,
+    ):
+        self.exporter = exporter
+        self.max_batch_size = max_batch_size
+        self.schedule_delay = schedule_delay
+        self.dropped = 0
+        self.__queue = queue.Queue(maxsize=max_queue_size)
+        self.__thread = threading.Thread(
+            target=self.__run, name="hrun-span-exporter", daemon=True
+        )
+        self.__thread.start()
+
+    def on_end(self, span: Span):
+        try:
+            self.__queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def __export(self, batch: List[Span]):
+        if not batch:
+            return
+        try:
+            self.exporter.export(batch)
+        except Exception as ex:
+            # tracing should not fail testcases
+            logger.warning(f"failed to export {len(batch)} spans: {ex}")
+
+    def __run(self):
+        batch: List[Span] = []
+        deadline = time.monotonic() + self.schedule_delay
+        while True:
+            try:
+                item = self.__queue.get(timeout=max(0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, Span):
+                batch.append(item)
+                if len(batch) < self.max_batch_size:
+                    continue
+            elif item is _SHUTDOWN:
+                self.__export(batch)
+                return
+
+            # batch is full, schedule delay expired, or flush requested
+            self.__export(batch)
+            batch = []
+            deadline = time.monotonic() + self.schedule_delay
+            if isinstance(item, threading.Event):
+                item.set()
+
+    def force_flush(self, timeout: float = 30) -> bool:
+        """ export queued spans, return False if not finished in timeout
+        """
+        if not self.__thread.is_alive():
+            return False
+
+        flushed = threading.Event()
+        self.__queue.put(flushed)
+        return flushed.wait(timeout)
+
+    def shutdown(self, timeout: float = 30):
+        if not self.__thread.is_alive():
+            return
+
+        self.__queue.put(_SHUTDOWN)
+        self.__thread.join(timeout)
+
+
+class Tracer(object):
+    def __init__(self, processor: BatchSpanProcessor):
+        self.processor = processor
+
+    def start_span(
+        self, name: Text, kind: int = SpanKind.INTERNAL, attributes: Dict = None
+    ) -> _SpanContext:
+        parent = _current_span.get()
+        if parent is None:
+            trace_id = f"{random.getrandbits(128):032x}"
+            parent_id = ""
+        else:
+            trace_id = parent.trace_id
+            parent_id = parent.span_id
+
+        return _SpanContext(self, Span(name, trace_id, parent_id, kind, attributes))
+
+
+# None if tracing disabled, checked before starting span
+tracer: Optional[Tracer] = None
+_env_checked = False
+
+
+def start_span(
+    name: Text, kind: int = SpanKind.INTERNAL, attributes: Dict = None
+) -> ContextManager:
+    """ start span as child of current span, ended when context exits
+
+    Examples:
+        >>> with tracing.start_span("step: login") as span:
+        ...     span.set_attribute("hrun.step", "login")
+
+    """
+    if tracer is None:
+        return _null_span_context
+
+    return tracer.start_span(name, kind, attributes)
+
+
+def get_current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def inject(headers: Dict):
+    """ inject W3C traceparent header of current span, existing header is kept
+    """
+    span = _current_span.get()
+    if span is not None:
+        headers.setdefault(TRACEPARENT_HEADER, span.traceparent)
+
+
+def make_exporter(destination: Text):
+    """ OTLP/HTTP exporter for http(s) url, otherwise JSON lines file exporter
+    """
+    if destination.startswith(("http://", "https://")):
+        return OtlpHttpSpanExporter(destination)
+    return FileSpanExporter(destination)
+
+
+def enable(destination: Text = None, exporter=None, **processor_kwargs) -> Tracer:
+    """ enable tracing in current process, spans are exported to destination or by exporter
+    """
+    global tracer
+
+    if tracer is None:
+        exporter = exporter or make_exporter(destination)
+        tracer = Tracer(BatchSpanProcessor(exporter, **processor_kwargs))
+        atexit.register(disable)
+
+    return tracer
+
+
+def disable():
+    """ export queued spans and disable tracing
+    """
+    global tracer
+
+    if tracer is None:
+        return
+
+    processor = tracer.processor
+    tracer = None
+    processor.shutdown()
+    if processor.dropped:
+        logger.warning(f"{processor.dropped} spans dropped since export queue is full")
+
+
+def pop_trace_arg(args: List[Text]) -> Tuple[List[Text], Text]:
+    """ pop trace argument from cli args, which should not be passed to pytest
+
+    Examples:
+        >>> pop_trace_arg(["demo_test.py", "--hrun-trace", "logs/spans.jsonl"])
+        (["demo_test.py"], "logs/spans.jsonl")
+
+    """
+    remaining_args, values = pop_cli_option(
+        args, TRACE_ARG, "file path or collector url"
+    )
+    return remaining_args, values[-1] if values else ""
+
+
+def set_trace_destination(destination: Text):
+    """ pass trace destination to testcases by environment variable,
+        which is inherited by pytest-xdist worker processes.
+    """
+    if not destination:
+        return
+
+    if not destination.startswith(("http://", "https://")):
+        # workers may run in other directories
+        destination = os.path.abspath(destination)
+    os.environ[TRACE_ENV] = destination
+
+
+def init_from_env():
+    """ enable tracing once per process if trace destination specified by cli
+    """
+    global _env_checked
+
+    if _env_checked:
+        return
+    _env_checked = True
+
+    destination = os.getenv(TRACE_ENV)
+    if destination:
+        enable(destination)
+        logger.info(f"export spans to {destination}")
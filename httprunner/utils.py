@@ -9,12 +9,10 @@ import copy
 import json
 import os.path
 import platform
-import uuid
 from multiprocessing import Queue
 import itertools
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Text, Tuple
 
-import sentry_sdk
 from loguru import logger
 
 from httprunner import __version__
@@ -28,13 +26,12 @@ def init_sentry_sdk():
     错误信息才会传递到开发人员那里，然后一顿操作查看程序运行的日志，就熟练使用awk和grep去分析日志，但是往往我们会因为
     日志中缺少上下文关系，导致很难分析真正的错误是什么。
     Sentry由此应运而生成为了解决这个问题的一个很好的工具，设计了诸多特性帮助开发者更快、更方面、更直观的监控错误信息。
+
+    上报默认关闭, 见 httprunner.telemetry, 此函数仅为兼容保留, 调用即同步初始化。
     """
-    sentry_sdk.init(
-        dsn="https://460e31339bcb428c879aafa6a2e78098@sentry.io/5263855",
-        release="httprunner@{}".format(__version__),
-    )
-    with sentry_sdk.configure_scope() as scope:
-        scope.set_user({"id": uuid.getnode()})
+    from httprunner import telemetry
+
+    telemetry.init_sentry_sdk()
 
 
 def set_os_environ(variables_mapping):
@@ -300,6 +297,32 @@ def merge_variables(
     return merged_variables
 
 
+class VariablesScope(collections.ChainMap):
+    """ layered variables scope of teststep, e.g. step => extracted => config
+
+        lookups go through layers in order and writes only go to the first layer,
+        thus lower layers are shared by teststeps without being copied for each teststep.
+
+    Args:
+        maps: variables layers, higher priority first
+        declared: raw variables declared by teststep, parsed again when teststep is run again
+
+    """
+
+    def __init__(self, *maps: VariablesMapping, declared: VariablesMapping = None):
+        super().__init__(*maps)
+        self.declared = declared
+
+
+def get_declared_variables(variables: VariablesMapping) -> VariablesMapping:
+    """ get raw variables declared by teststep, which are replaced by VariablesScope when run
+    """
+    if isinstance(variables, VariablesScope) and variables.declared is not None:
+        return variables.declared
+
+    return variables
+
+
 def is_support_multiprocessing() -> bool:
     """
     判断是否支持多进程，如：Android termux
@@ -376,6 +399,45 @@ def gen_cartesian_product(*args: List[Dict]) -> List[Dict]:
     return product_list
 
 
+def pop_cli_option(
+    args: List[Text], name: Text, metavar: Text = "VALUE", const: Text = None
+) -> Tuple[List[Text], List[Text]]:
+    """ pop hrun option from cli args, which should not be passed to pytest
 
+    Args:
+        args: cli args
+        name: option name, e.g. --hrun-log-level
+        metavar: name of option value in error message
+        const: value of option specified without value, e.g. --profile,
+            option should be followed by value if not specified
+
+    Returns:
+        remaining args, and values of all occurrences of option in order
+
+    Examples:
+        >>> pop_cli_option(["demo_test.py", "--metrics", "9464"], "--metrics")
+        (["demo_test.py"], ["9464"])
+        >>> pop_cli_option(["--profile", "demo_test.py"], "--profile", const="timers")
+        (["demo_test.py"], ["timers"])
+
+    Raises:
+        ValueError: option is not followed by value
+
+    """
+    values = []
+    remaining_args = []
+    args_iter = iter(args)
+    for arg in args_iter:
+        if arg == name:
+            value = const if const is not None else next(args_iter, "")
+        elif arg.startswith(f"{name}="):
+            value = arg[len(name) + 1 :]
+        else:
+            remaining_args.append(arg)
+            continue
 
+        if not value:
+            raise ValueError(f"{name} should be followed by {metavar}")
+        values.append(value)
 
+    return remaining_args, values
@@ -0,0 +1,278 @@
+import json
+import threading
+import time
+import unittest
+from concurrent.futures import Future
+from unittest import mock
+
+from starlette.testclient import TestClient
+
+from httprunner import models
+from httprunner.app.jobs import (
+    DebugJob,
+    DebugJobManager,
+    DebugJobQueueFull,
+    DebugtalkCache,
+    JobStatus,
+    load_debugtalk_py,
+)
+from httprunner.app.main import app
+from httprunner.app.routers import debug
+from httprunner.models import ProjectMeta
+
+client = TestClient(app)
+
+
+def make_debug_json_data(steps_count=2):
+    return {
+        "project_meta": {
+            "debugtalk_py": "\ndef hello(name):\n    return f'hello, {name}'\n",
+            "variables": {},
+            "env": {},
+        },
+        "testcase": {
+            "config": {"name": "debug job demo", "verify": False},
+            "teststeps": [
+                {
+                    "name": f"step {index}",
+                    "request": {
+                        # connection refused, no network is needed
+                        "method": "GET",
+                        "url": "http://127.0.0.1:1/${hello(world)}",
+                        "timeout": 3,
+                    },
+                }
+                for index in range(steps_count)
+            ],
+        },
+    }
+
+
+def wait_job_done(job_id, timeout=30):
+    start_at = time.time()
+    while time.time() - start_at < timeout:
+        result = client.get(f"/hrun/debug/jobs/{job_id}").json()["result"]
+        if result["status"] not in ["pending", "running"]:
+            return result
+        time.sleep(0.1)
+
+    raise TimeoutError(job_id)
+
+
+class TestDebugJobs(unittest.TestCase):
+    def test_load_debugtalk_py(self):
+        project_meta = load_debugtalk_py(
+            ProjectMeta(debugtalk_py="import os\n\ndef add(a, b):\n    return a + b\n")
+        )
+        self.assertEqual(list(project_meta.functions.keys()), ["add"])
+        self.assertEqual(project_meta.functions["add"](1, 2), 3)
+
+    def test_submit_and_poll_job(self):
+        resp = client.post("/hrun/debug/jobs", json=make_debug_json_data())
+        self.assertEqual(resp.json()["code"], 0)
+        job_id = resp.json()["result"]["job_id"]
+
+        result = wait_job_done(job_id)
+        self.assertEqual(result["status"], "success")
+        self.assertEqual(result["steps_finished"], 2)
+        self.assertEqual(len(result["step_datas"]), 2)
+        self.assertTrue(result["summary"]["success"])
+
+        stats = client.get("/hrun/debug/jobs").json()["result"]
+        self.assertIn("queue_depth", stats)
+        self.assertIn("running", stats)
+
+    def test_stream_job_events(self):
+        resp = client.post("/hrun/debug/jobs", json=make_debug_json_data(3))
+        job_id = resp.json()["result"]["job_id"]
+
+        resp = client.get(f"/hrun/debug/jobs/{job_id}/events")
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.headers["content-type"].startswith("text/event-stream"))
+        self.assertEqual(resp.text.count("event: step\n"), 3)
+        self.assertEqual(resp.text.count("event: done\n"), 1)
+
+    def test_job_not_found(self):
+        resp = client.get("/hrun/debug/jobs/not-exist")
+        self.assertEqual(resp.json()["code"], 1)
+
+        resp = client.delete("/hrun/debug/jobs/not-exist")
+        self.assertEqual(resp.json()["code"], 1)
+
+    def test_cancel_pending_job(self):
+        data = make_debug_json_data()
+        manager = DebugJobManager(max_workers=1)
+        project_meta = ProjectMeta.parse_obj(data["project_meta"])
+        testcase = models.TestCase.parse_obj(data["testcase"])
+
+        jobs = [manager.submit(project_meta, testcase) for _ in range(3)]
+        self.assertTrue(manager.cancel(jobs[-1].job_id))
+
+        for job in jobs[:-1]:
+            job.future.result(timeout=30)
+            self.assertEqual(job.status, JobStatus.SUCCESS)
+
+        self.assertEqual(jobs[-1].status, JobStatus.CANCELLED)
+        self.assertFalse(manager.cancel(jobs[-1].job_id))
+
+    def test_debug_cancelled_testcase(self):
+        data = make_debug_json_data()
+        job = DebugJob(
+            ProjectMeta.parse_obj(data["project_meta"]),
+            models.TestCase.parse_obj(data["testcase"]),
+        )
+        # cancelled by DELETE /hrun/debug/jobs/{job_id} before started
+        job.future = Future()
+        job.future.cancel()
+        with mock.patch.object(debug.job_manager, "submit", return_value=job):
+            resp = client.post("/hrun/debug/testcase", json=data)
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json(), {"code": 1, "message": "cancelled", "result": {}})
+
+    def test_debug_multiple_testcases(self):
+        data = make_debug_json_data()
+        tests_mapping = {
+            "project_meta": data["project_meta"],
+            "testcases": [data["testcase"]] * 5,
+        }
+        resp = client.post("/hrun/debug/testcases?parallelism=3", json=tests_mapping)
+        self.assertEqual(resp.json()["code"], 0)
+
+        result = resp.json()["result"]
+        self.assertTrue(result["success"])
+        self.assertEqual(result["stat"], {"total": 5, "success": 5, "fail": 0})
+        self.assertEqual(len(result["testcases"]), 5)
+        self.assertGreater(result["time"]["duration"], 0)
+        self.assertIn("python_version", result["platform"])
+
+    def test_batch_in_bounded_pool(self):
+        data = make_debug_json_data(1)
+        manager = DebugJobManager(max_workers=2)
+        project_meta = ProjectMeta.parse_obj(data["project_meta"])
+        testcases = [models.TestCase.parse_obj(data["testcase"])] * 5
+
+        thread_names = set()
+        summary = manager.submit_batch(
+            project_meta,
+            testcases,
+            parallelism=4,
+            testcase_callback=lambda _: thread_names.add(
+                threading.current_thread().name
+            ),
+        ).result(timeout=30)
+        self.assertEqual(summary.stat.total, 5)
+        self.assertTrue(summary.success)
+        self.assertLessEqual(len(thread_names), 2)
+        self.assertTrue(all(name.startswith("hrun-debug") for name in thread_names))
+
+    def test_batch_counted_as_pending(self):
+        data = make_debug_json_data(1)
+        manager = DebugJobManager(max_workers=1, max_pending=3)
+        project_meta = ProjectMeta.parse_obj(data["project_meta"])
+        testcase = models.TestCase.parse_obj(data["testcase"])
+
+        with self.assertRaises(DebugJobQueueFull):
+            manager.submit_batch(project_meta, [testcase] * 4)
+
+        started = threading.Event()
+        release = threading.Event()
+
+        def wait_release(_):
+            started.set()
+            release.wait(30)
+
+        future = manager.submit_batch(
+            project_meta, [testcase] * 3, parallelism=1, testcase_callback=wait_release
+        )
+        self.assertTrue(started.wait(30))
+        stats = manager.stats()
+        self.assertEqual(stats["queue_depth"], 2)
+        self.assertEqual(stats["running"], 1)
+        with self.assertRaises(DebugJobQueueFull):
+            manager.submit(project_meta, testcase)
+
+        release.set()
+        self.assertEqual(future.result(timeout=30).stat.total, 3)
+        self.assertEqual(manager.stats()["queue_depth"], 0)
+
+    def test_stream_multiple_testcases_error(self):
+        data = make_debug_json_data()
+        tests_mapping = {
+            "project_meta": data["project_meta"],
+            "testcases": [data["testcase"]],
+        }
+        future = Future()
+        future.set_exception(RuntimeError("executor broken"))
+        with mock.patch.object(debug.job_manager, "submit_batch", return_value=future):
+            resp = client.post("/hrun/debug/testcases?stream=true", json=tests_mapping)
+
+        lines = [json.loads(line) for line in resp.text.splitlines()]
+        self.assertEqual(
+            lines,
+            [
+                {
+                    "type": "error",
+                    "success": False,
+                    "error": "RuntimeError: executor broken",
+                }
+            ],
+        )
+
+    def test_stream_multiple_testcases(self):
+        data = make_debug_json_data()
+        tests_mapping = {
+            "project_meta": data["project_meta"],
+            "testcases": [data["testcase"]] * 3,
+        }
+        resp = client.post("/hrun/debug/testcases?stream=true", json=tests_mapping)
+        self.assertTrue(resp.headers["content-type"].startswith("application/x-ndjson"))
+
+        lines = [json.loads(line) for line in resp.text.splitlines()]
+        self.assertEqual([line["type"] for line in lines], ["testcase"] * 3 + ["summary"])
+        self.assertEqual(lines[-1]["result"]["stat"]["total"], 3)
+        self.assertNotIn("testcases", lines[-1]["result"])
+
+
+class TestDebugtalkCache(unittest.TestCase):
+    def test_cache_hit_and_miss(self):
+        cache = DebugtalkCache()
+        source = "counter = []\ncounter.append(1)\n\ndef count():\n    return len(counter)\n"
+        functions = cache.get_functions(source)
+        self.assertIs(cache.get_functions(source), functions)
+        # module level statements are only executed once
+        self.assertEqual(functions["count"](), 1)
+
+        stats = cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hit_rate"], 0.5)
+        self.assertEqual(stats["compile_count"], 1)
+
+    def test_cache_eviction(self):
+        cache = DebugtalkCache(max_entries=2)
+        sources = [f"def func_{i}():\n    return {i}\n" for i in range(3)]
+        for source in sources:
+            cache.get_functions(source)
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+        # the least recently used one is evicted
+        cache.get_functions(sources[0])
+        self.assertEqual(cache.stats()["misses"], 4)
+
+        cache = DebugtalkCache(max_bytes=len(sources[0]) * 2)
+        for source in sources:
+            cache.get_functions(source)
+        self.assertEqual(len(cache), 2)
+
+    def test_debug_metrics(self):
+        data = make_debug_json_data(1)
+        for _ in range(2):
+            client.post("/hrun/debug/testcase", json=data)
+
+        result = client.get("/hrun/debug/metrics").json()["result"]
+        self.assertIn("queue_depth", result["jobs"])
+        self.assertGreaterEqual(result["debugtalk_cache"]["hits"], 1)
+        self.assertGreater(result["debugtalk_cache"]["compile_time_total"], 0)
@@ -0,0 +1,50 @@
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from httprunner.backports import LocalContextVar, copy_local_context
+
+
+class TestLocalContextVar(unittest.TestCase):
+    def test_set_and_reset(self):
+        var = LocalContextVar("demo", default="")
+        self.assertEqual(var.get(), "")
+
+        token = var.set("a")
+        inner_token = var.set("b")
+        self.assertEqual(var.get(), "b")
+        var.reset(inner_token)
+        self.assertEqual(var.get(), "a")
+        var.reset(token)
+        self.assertEqual(var.get(), "")
+
+        with self.assertRaises(LookupError):
+            LocalContextVar("no_default").get()
+        self.assertEqual(LocalContextVar("no_default").get(1), 1)
+
+    def test_isolated_between_threads(self):
+        var = LocalContextVar("demo", default="")
+        var.set("main")
+        values = []
+        thread = threading.Thread(target=lambda: values.append(var.get()))
+        thread.start()
+        thread.join()
+        self.assertEqual(values, [""])
+
+    def test_copy_context_to_thread_pool(self):
+        var = LocalContextVar("demo", default="")
+        token = var.set("main")
+
+        def get_and_set():
+            value = var.get()
+            var.set("worker")
+            return value
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            context = copy_local_context()
+            self.assertEqual(executor.submit(context.run, get_and_set).result(), "main")
+            # values set in copied context do not leak to worker thread
+            self.assertEqual(executor.submit(var.get).result(), "")
+
+        self.assertEqual(var.get(), "main")
+        var.reset(token)
@@ -0,0 +1,84 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from benchmarks.suite import (
+    RESULTS_FORMAT_VERSION,
+    compare_results,
+    load_results,
+    main,
+)
+
+
+def make_results(medians, format_version=RESULTS_FORMAT_VERSION):
+    return {
+        "format_version": format_version,
+        "benchmarks": {
+            name: {"median": median, "unit": "ops"} for name, median in medians.items()
+        },
+    }
+
+
+class TestBenchmarkResults(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def dump_results(self, file_name, results):
+        path = os.path.join(self.tmp_dir, file_name)
+        with open(path, "w") as f:
+            json.dump(results, f)
+        return path
+
+    def test_compare_results_threshold(self):
+        baseline = make_results({"a": 100, "b": 100, "c": 100})["benchmarks"]
+        current = make_results({"a": 85, "b": 95, "c": 115})["benchmarks"]
+        rows = {row["name"]: row for row in compare_results(baseline, current, 0.1)}
+
+        self.assertEqual(rows["a"]["status"], "regression")
+        self.assertAlmostEqual(rows["a"]["change"], -0.15)
+        self.assertEqual(rows["b"]["status"], "ok")
+        self.assertEqual(rows["c"]["status"], "improvement")
+        self.assertEqual((rows["a"]["baseline"], rows["a"]["current"]), (100, 85))
+
+    def test_compare_added_and_removed(self):
+        baseline = make_results({"a": 100, "removed": 100})["benchmarks"]
+        current = make_results({"a": 100, "added": 100})["benchmarks"]
+        self.assertEqual(
+            compare_results(baseline, current, 0.1),
+            [
+                {"name": "a", "status": "ok", "baseline": 100, "current": 100, "change": 0},
+                {"name": "added", "status": "added"},
+                {"name": "removed", "status": "removed"},
+            ],
+        )
+
+    def test_load_results_format_version(self):
+        path = self.dump_results("current.json", make_results({"a": 100}))
+        self.assertEqual(load_results(path), {"a": {"median": 100, "unit": "ops"}})
+
+        for format_version in [None, RESULTS_FORMAT_VERSION + 1]:
+            path = self.dump_results(
+                "mismatch.json", make_results({"a": 100}, format_version)
+            )
+            with self.assertRaises(ValueError):
+                load_results(path)
+
+    def test_compare_exit_code(self):
+        baseline_path = self.dump_results("baseline.json", make_results({"a": 100}))
+        ok_path = self.dump_results("ok.json", make_results({"a": 95}))
+        slow_path = self.dump_results("slow.json", make_results({"a": 50}))
+        mismatch_path = self.dump_results(
+            "mismatch.json", make_results({"a": 100}, RESULTS_FORMAT_VERSION + 1)
+        )
+
+        self.assertEqual(main(["compare", baseline_path, ok_path]), 0)
+        self.assertEqual(main(["compare", baseline_path, slow_path]), 1)
+        self.assertEqual(
+            main(["compare", baseline_path, slow_path, "--threshold", "0.6"]), 0
+        )
+        self.assertEqual(main(["compare", baseline_path, mismatch_path]), 2)
@@ -0,0 +1,119 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from httprunner.cache import StepCache, make_cache_key
+
+
+class TestStepCache(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.calls = []
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def run_step(self):
+        self.calls.append(1)
+        return {"token": f"token-{len(self.calls)}"}
+
+    def test_make_cache_key(self):
+        step_content = {"testcase": "login.yml"}
+        key = make_cache_key("session", step_content, {"user": "a"}, "a_test.py")
+        self.assertEqual(
+            key, make_cache_key("session", step_content, {"user": "a"}, "b_test.py")
+        )
+        self.assertNotEqual(
+            key, make_cache_key("session", step_content, {"user": "b"}, "a_test.py")
+        )
+        # module scope is keyed by testcase file
+        self.assertNotEqual(
+            make_cache_key("module", step_content, {}, "a_test.py"),
+            make_cache_key("module", step_content, {}, "b_test.py"),
+        )
+
+    def test_get_or_run(self):
+        step_cache = StepCache()
+        self.assertEqual(
+            step_cache.get_or_run("key", self.run_step), ({"token": "token-1"}, False)
+        )
+        self.assertEqual(
+            step_cache.get_or_run("key", self.run_step), ({"token": "token-1"}, True)
+        )
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual((step_cache.hits, step_cache.misses), (1, 1))
+
+        # cached variables are not affected by caller
+        variables, _ = step_cache.get_or_run("key", self.run_step)
+        variables["token"] = "changed"
+        self.assertEqual(step_cache.get_or_run("key", self.run_step)[0]["token"], "token-1")
+
+    def test_get_or_run_ttl(self):
+        step_cache = StepCache()
+        step_cache.get_or_run("key", self.run_step, ttl=0.05)
+        time.sleep(0.1)
+        variables, hit = step_cache.get_or_run("key", self.run_step, ttl=0.05)
+        self.assertFalse(hit)
+        self.assertEqual(variables, {"token": "token-2"})
+
+    def test_get_or_run_failed(self):
+        step_cache = StepCache()
+
+        def run_step_failed():
+            raise RuntimeError("login failed")
+
+        with self.assertRaises(RuntimeError):
+            step_cache.get_or_run("key", run_step_failed)
+        self.assertEqual(step_cache.get_or_run("key", self.run_step)[1], False)
+
+    def test_get_or_run_concurrently(self):
+        step_cache = StepCache()
+
+        def run_step_slowly():
+            time.sleep(0.1)
+            return self.run_step()
+
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(
+                    step_cache.get_or_run("key", run_step_slowly)
+                )
+            )
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(sorted(hit for _, hit in results), [False] + [True] * 7)
+        # key locks are dropped once no thread holds or waits for them
+        self.assertEqual(step_cache._StepCache__key_locks, {})
+
+    def test_key_locks_not_kept(self):
+        step_cache = StepCache()
+        for index in range(100):
+            step_cache.get_or_run(f"key-{index}", self.run_step)
+
+        self.assertEqual(step_cache._StepCache__key_locks, {})
+        self.assertEqual(step_cache.misses, 100)
+
+    def test_get_or_run_shared(self):
+        # two caches with the same directory, e.g. in two pytest-xdist workers
+        cache_1 = StepCache(self.cache_dir)
+        cache_2 = StepCache(self.cache_dir)
+        self.assertFalse(cache_1.get_or_run("key", self.run_step, shared=True)[1])
+        self.assertEqual(
+            cache_2.get_or_run("key", self.run_step, shared=True),
+            ({"token": "token-1"}, True),
+        )
+        self.assertTrue(os.path.isfile(os.path.join(self.cache_dir, "key.json")))
+
+        # not shared
+        self.assertFalse(cache_2.get_or_run("key2", self.run_step)[1])
+        self.assertFalse(os.path.isfile(os.path.join(self.cache_dir, "key2.json")))
@@ -1,10 +1,15 @@
 import io
 import os
+import shutil
+import subprocess
 import sys
+import tempfile
 import unittest
+from unittest import mock
 
 import pytest
 
+from httprunner import cli
 from httprunner.cli import main
 
 
@@ -50,3 +55,49 @@ class TestCli(unittest.TestCase):
             self.assertEqual(exit_code, 0)
         finally:
             os.chdir(cwd)
+
+    def test_show_version_without_heavy_imports(self):
+        script = (
+            "import sys\n"
+            "sys.argv = ['hrun', '-V']\n"
+            "from httprunner import cli\n"
+            "try:\n"
+            "    cli.main_hrun_alias()\n"
+            "except SystemExit:\n"
+            "    pass\n"
+            "heavy = ['pytest', 'requests', 'pydantic', 'sentry_sdk', 'httprunner.runner']\n"
+            "print([name for name in heavy if name in sys.modules])\n"
+        )
+        output = subprocess.check_output([sys.executable, "-c", script])
+        self.assertEqual(output.decode().strip().splitlines()[-1], "[]")
+
+    def test_lazy_attributes(self):
+        import httprunner
+        from httprunner.runner import HttpRunner
+
+        self.assertIs(httprunner.HttpRunner, HttpRunner)
+        self.assertIn("RunTestCase", dir(httprunner))
+        with self.assertRaises(AttributeError):
+            httprunner.NotExists
+
+    def test_hrun_mock_alias(self):
+        cwd = os.getcwd()
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            os.chdir(tmp_dir)
+            with mock.patch.object(cli, "main"), mock.patch.object(
+                sys, "argv", ["hrun", "mock", "testcases/"]
+            ):
+                cli.main_hrun_alias()
+                self.assertEqual(sys.argv, ["hrun", "mock", "testcases/"])
+
+            # testcases folder named mock is run as before
+            os.mkdir("mock")
+            with mock.patch.object(cli, "main"), mock.patch.object(
+                sys, "argv", ["hrun", "mock"]
+            ):
+                cli.main_hrun_alias()
+                self.assertEqual(sys.argv, ["hrun", "run", "mock"])
+        finally:
+            os.chdir(cwd)
+            shutil.rmtree(tmp_dir)
@@ -0,0 +1,75 @@
+import unittest
+
+from httprunner.ext.har2case.cluster import cluster_teststeps, make_url_template
+
+
+def make_teststep(url, params=None, method="GET", status_code=200):
+    teststep = {
+        "name": url,
+        "request": {"method": method, "url": url},
+        "validate": [{"eq": ["status_code", status_code]}],
+    }
+    if params:
+        teststep["request"]["params"] = params
+    return teststep
+
+
+class TestCluster(unittest.TestCase):
+    def test_make_url_template(self):
+        self.assertEqual(
+            make_url_template("https://httprunner.top/users/123/orders/5?a=1"),
+            ("https://httprunner.top/users/$id_1/orders/$id_2?a=1", ["123", "5"]),
+        )
+        self.assertEqual(
+            make_url_template(
+                "http://a.com/orders/6f1b2c3d-1111-2222-3333-444455556666/v2"
+            ),
+            ("http://a.com/orders/$id_1/v2", ["6f1b2c3d-1111-2222-3333-444455556666"]),
+        )
+        self.assertEqual(
+            make_url_template("http://a.com/v2/a1"), ("http://a.com/v2/a1", [])
+        )
+
+    def test_cluster_teststeps(self):
+        teststeps = [
+            make_teststep("http://a.com/users/1", {"page": "1", "size": "10"}),
+            make_teststep("http://a.com/login", method="POST"),
+            make_teststep("http://a.com/users/2", {"page": "2", "size": "10"}),
+            # duplicate request is dropped
+            make_teststep("http://a.com/users/2", {"page": "2", "size": "10"}),
+            make_teststep(
+                "http://a.com/users/3", {"page": "3", "size": "10"}, status_code=404
+            ),
+            make_teststep("http://a.com/ping"),
+            make_teststep("http://a.com/items/7"),
+        ]
+        single_teststeps, clusters = cluster_teststeps(teststeps)
+
+        self.assertEqual(
+            [step["name"] for step in single_teststeps],
+            ["http://a.com/login", "http://a.com/ping", "http://a.com/items/7"],
+        )
+        self.assertEqual(len(clusters), 1)
+
+        parameters, teststep = clusters[0]
+        self.assertEqual(
+            parameters, {"id_1-page": [["1", "1"], ["2", "2"], ["3", "3"]]}
+        )
+        self.assertEqual(teststep["name"], "/users/$id_1")
+        self.assertEqual(
+            teststep["request"],
+            {
+                "method": "GET",
+                "url": "http://a.com/users/$id_1",
+                "params": {"page": "$page", "size": "10"},
+            },
+        )
+        # validator differs among teststeps is dropped
+        self.assertEqual(teststep["validate"], [])
+
+    def test_cluster_single_variable(self):
+        teststeps = [make_teststep(f"http://a.com/items/{i}") for i in range(3)]
+        single_teststeps, clusters = cluster_teststeps(teststeps)
+        self.assertEqual(single_teststeps, [])
+        self.assertEqual(clusters[0][0], {"id_1": ["0", "1", "2"]})
+        self.assertEqual(clusters[0][1]["validate"], [{"eq": ["status_code", 200]}])
@@ -1,5 +1,8 @@
+import argparse
+import json
 import os
 
+from httprunner.ext.har2case import init_har2case_parser, main_har2case
 from httprunner.ext.har2case.core import HarParser
 from httprunner.ext.har2case.utils import load_har_log_entries
 from tests.ext.har2case.har_utils_test import TestHar2CaseUtils
@@ -164,3 +167,117 @@ class TestHar(TestHar2CaseUtils):
         self.assertIn("config", testcase)
         self.assertIn("teststeps", testcase)
         self.assertEqual(len(testcase["teststeps"]), 2)
+
+    def test_gen_testcase_split_by_host(self):
+        har_path = TestHar2CaseUtils.create_har_file(
+            file_name="split",
+            content={
+                "log": {
+                    "entries": [
+                        make_har_entry("http://a.com/get", "2020-03-11T09:00:00.000Z"),
+                        make_har_entry("http://b.com/get", "2020-03-11T09:00:30.000Z"),
+                        make_har_entry("http://a.com/post", "2020-03-11T09:01:10.000Z"),
+                        make_har_entry("http://c.com/get", "2020-03-11T09:01:20.000Z"),
+                    ]
+                }
+            },
+        )
+
+        har_parser = HarParser(har_path, exclude_str="c.com", split_by="host")
+        output_files = har_parser.gen_testcase("JSON")
+        self.assertEqual(
+            [os.path.basename(path) for path in output_files],
+            ["split_a_com.json", "split_b_com.json"],
+        )
+        with open(output_files[0]) as f:
+            testcase = json.load(f)
+        self.assertEqual(
+            [step["name"] for step in testcase["teststeps"]], ["/get", "/post"]
+        )
+
+        har_parser = HarParser(har_path, split_by="time", time_window=60)
+        output_files += har_parser.gen_testcase("YAML")
+        self.assertEqual(
+            [os.path.basename(path) for path in output_files[2:]],
+            ["split_window0.yml", "split_window1.yml"],
+        )
+
+        for path in output_files + [har_path]:
+            os.remove(path)
+
+    def test_prepare_teststeps_in_parallel(self):
+        entries = [
+            make_har_entry(f"http://a.com/get/{i}", "2020-03-11T09:00:00.000Z")
+            for i in range(25)
+        ]
+        har_path = TestHar2CaseUtils.create_har_file(
+            file_name="parallel", content={"log": {"entries": entries}}
+        )
+
+        teststeps = HarParser(har_path)._prepare_teststeps()
+        har_parser = HarParser(har_path, jobs=2, chunk_size=3)
+        # ensure process pool is used even on single cpu machine
+        har_parser.jobs = 2
+        self.assertEqual(har_parser._prepare_teststeps(), teststeps)
+        self.assertEqual(har_parser.entries_count, 25)
+        self.assertEqual(teststeps[-1]["name"], "/get/24")
+        os.remove(har_path)
+
+    def test_main_har2case_many_files(self):
+        har_paths = [
+            TestHar2CaseUtils.create_har_file(
+                file_name=f"many_{i}",
+                content={
+                    "log": {
+                        "entries": [make_har_entry("http://a.com/get", "")]
+                    }
+                },
+            )
+            for i in range(2)
+        ]
+        parser = init_har2case_parser(argparse.ArgumentParser().add_subparsers())
+        args = parser.parse_args([*har_paths, "-2j", "-j", "2"])
+        self.assertEqual(main_har2case(args), 0)
+
+        for har_path in har_paths:
+            json_path = har_path[: -len(".har")] + ".json"
+            self.assertTrue(os.path.isfile(json_path))
+            os.remove(json_path)
+            os.remove(har_path)
+
+    def test_gen_testcase_cluster(self):
+        har_path = TestHar2CaseUtils.create_har_file(
+            file_name="cluster",
+            content={
+                "log": {
+                    "entries": [
+                        make_har_entry(f"http://a.com/items/{i % 3}", "")
+                        for i in range(6)
+                    ]
+                    + [make_har_entry("http://a.com/ping", "")]
+                }
+            },
+        )
+
+        output_files = HarParser(har_path, cluster=True).gen_testcase("JSON")
+        self.assertEqual(
+            [os.path.basename(path) for path in output_files],
+            ["cluster.json", "cluster_cluster1.json"],
+        )
+        with open(output_files[1]) as f:
+            testcase = json.load(f)
+        self.assertEqual(testcase["config"]["parameters"], {"id_1": ["0", "1", "2"]})
+        self.assertEqual(
+            testcase["teststeps"][0]["request"]["url"], "http://a.com/items/$id_1"
+        )
+
+        for path in output_files + [har_path]:
+            os.remove(path)
+
+
+def make_har_entry(url, started_date_time):
+    return {
+        "startedDateTime": started_date_time,
+        "request": {"method": "GET", "url": url, "headers": []},
+        "response": {"status": 200, "headers": [], "content": {}},
+    }
@@ -23,6 +23,59 @@ class TestHar2CaseUtils(unittest.TestCase):
         self.assertIn("request", log_entries[0])
         self.assertIn("response", log_entries[0])
 
+    def test_iter_har_log_entries(self):
+        har_path = os.path.join(os.path.dirname(__file__), "data", "demo-quickstart.har")
+        with open(har_path) as f:
+            expected_entries = json.load(f)["log"]["entries"]
+
+        # entry may be truncated at any position of the read buffer
+        for chunk_size in [1, 7, 1024]:
+            log_entries = list(utils.iter_har_log_entries(har_path, chunk_size))
+            self.assertEqual(log_entries, expected_entries)
+
+    def test_iter_har_log_entries_in_any_key_order(self):
+        har_path = TestHar2CaseUtils.create_har_file(
+            file_name="key_order",
+            content={
+                "version": 1.2,
+                "log": {"pages": [{"id": "[{"}], "entries": [{"a": 1}, {"b": [2]}]},
+                "tail": {"ignored": True},
+            },
+        )
+        self.assertEqual(
+            list(utils.iter_har_log_entries(har_path, 3)), [{"a": 1}, {"b": [2]}]
+        )
+        os.remove(har_path)
+
+    def test_testcase_writers(self):
+        testcase = {
+            "config": {"name": "demo", "variables": {}, "verify": False},
+            "teststeps": [
+                {"name": "/get", "request": {"method": "GET", "url": "/get"}},
+                {"name": "/post", "request": {"method": "POST", "url": "/post"}},
+            ],
+        }
+        data_dir = os.path.join(os.path.dirname(__file__), "data")
+        for dump_func, writer_class, ext in [
+            (utils.dump_json, utils.JsonTestcaseWriter, "json"),
+            (utils.dump_yaml, utils.YamlTestcaseWriter, "yml"),
+        ]:
+            for teststeps in [testcase["teststeps"], []]:
+                expected_path = os.path.join(data_dir, f"expected.{ext}")
+                dump_func({**testcase, "teststeps": teststeps}, expected_path)
+
+                writer_path = os.path.join(data_dir, f"writer.{ext}")
+                writer = writer_class(writer_path, testcase["config"])
+                for teststep in teststeps:
+                    writer.add_teststep(teststep)
+                writer.close()
+
+                with open(expected_path) as f1, open(writer_path) as f2:
+                    self.assertEqual(f1.read(), f2.read())
+
+                os.remove(expected_path)
+                os.remove(writer_path)
+
     def test_load_har_log_key_error(self):
         empty_json_file_path = TestHar2CaseUtils.create_har_file(
             file_name="empty_json", content={}
@@ -54,3 +107,19 @@ class TestHar2CaseUtils(unittest.TestCase):
         self.assertIsInstance(converted_dict, dict)
         self.assertEqual(converted_dict["a"], "1")
         self.assertEqual(converted_dict["b"], "2")
+
+    def test_parse_iso_timestamp(self):
+        self.assertEqual(
+            utils.parse_iso_timestamp("2020-03-11T09:35:19.853+08:00"), 1583890519.853
+        )
+        self.assertEqual(
+            utils.parse_iso_timestamp("2020-03-11T01:35:19.853Z"), 1583890519.853
+        )
+        self.assertEqual(utils.parse_iso_timestamp("2020-03-11T01:35:19"), 1583890519)
+        self.assertEqual(
+            utils.parse_iso_timestamp("2020-03-10T20:35:19-0500"), 1583890519
+        )
+        with self.assertRaises(ValueError):
+            utils.parse_iso_timestamp("2020/03/11 01:35:19")
+        with self.assertRaises(TypeError):
+            utils.parse_iso_timestamp(None)
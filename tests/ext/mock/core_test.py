@@ -0,0 +1,187 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import requests
+
+from httprunner import HttpRunner, loader
+from httprunner.ext.mock.core import (
+    ErrorInjector,
+    Latency,
+    MockRoutes,
+    get_path_template,
+    load_routes,
+    make_mock_response,
+    make_response_from_teststep,
+    parse_error_arg,
+    start_mock_server,
+)
+from httprunner.loader import load_testcase
+from httprunner.summary import SummaryWriter
+
+TESTCASE = {
+    "config": {"name": "mock demo", "base_url": "http://127.0.0.1"},
+    "teststeps": [
+        {
+            "name": "login",
+            "request": {"method": "POST", "url": "/api/login", "json": {"u": "a"}},
+            "extract": {"token": "body.data.token"},
+            "validate": [
+                {"eq": ["status_code", 200]},
+                {"eq": ["body.code", 0]},
+                {"check": "body.data.name", "comparator": "equals", "expect": "a"},
+            ],
+        },
+        {
+            "name": "get order",
+            "request": {
+                "method": "GET",
+                "url": "/api/orders/$order_id?detail=1",
+                "headers": {"Authorization": "$token"},
+            },
+            "variables": {"order_id": 5},
+            "validate": [
+                {"eq": ["status_code", 201]},
+                {"eq": ['headers."X-Order"', "yes"]},
+                {"eq": ["body.order.token", "$token"]},
+            ],
+        },
+    ],
+}
+
+
+class TestMockRoutes(unittest.TestCase):
+    def test_get_path_template(self):
+        self.assertEqual(
+            get_path_template("https://httprunner.top/api/users?page=1"), "/api/users"
+        )
+        self.assertEqual(
+            get_path_template("${base_url}/api/users/$user_id"),
+            "/api/users/$user_id",
+        )
+        self.assertEqual(get_path_template("api/users"), "/api/users")
+
+    def test_match_routes(self):
+        routes = MockRoutes()
+        routes.add("GET", "/api/users/$user_id/orders", make_mock_response(body="1"))
+        routes.add("GET", "/api/users/me/orders", make_mock_response(body="me"))
+        routes.add("GET", "/api/users/me/orders", make_mock_response(body="me2"))
+
+        self.assertEqual(len(routes), 2)
+        self.assertEqual(
+            routes.match("GET", "/api/users/3/orders").path,
+            "/api/users/$user_id/orders",
+        )
+        self.assertIsNone(routes.match("GET", "/api/users/3/items"))
+        self.assertIsNone(routes.match("POST", "/api/users/3/orders"))
+
+        # recorded responses are returned in turn
+        route = routes.match("GET", "/api/users/me/orders")
+        self.assertEqual(
+            [route.next_response().body for _ in range(3)], [b"me", b"me2", b"me"]
+        )
+
+    def test_make_response_from_teststep(self):
+        response = make_response_from_teststep(TESTCASE["teststeps"][0])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            json.loads(response.body),
+            {"code": 0, "data": {"name": "a", "token": "mock-token"}},
+        )
+        self.assertEqual(
+            response.headers["Content-Type"], "application/json; charset=utf-8"
+        )
+
+        # expected values referencing unknown variables are skipped
+        response = make_response_from_teststep(TESTCASE["teststeps"][1])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.headers["X-Order"], "yes")
+        self.assertEqual(response.body, b"")
+
+        # extracted variables are resolved with mock values
+        response = make_response_from_teststep(
+            TESTCASE["teststeps"][1], {"token": "mock-token"}
+        )
+        self.assertEqual(json.loads(response.body), {"order": {"token": "mock-token"}})
+
+    def test_latency(self):
+        self.assertEqual(Latency.parse("50").sample(), 0.05)
+        self.assertEqual(Latency.parse("fixed:20").sample(), 0.02)
+        for _ in range(10):
+            self.assertTrue(0.01 <= Latency.parse("uniform:10,20").sample() <= 0.02)
+            self.assertGreaterEqual(Latency.parse("normal:1,5").sample(), 0)
+
+        for spec in ["uniform:10", "gamma:1", "fixed:-1", "normal:a,b"]:
+            with self.assertRaises(ValueError):
+                Latency.parse(spec)
+
+    def test_error_injector(self):
+        self.assertEqual(parse_error_arg("503:0.05"), (503, 0.05))
+        self.assertEqual(parse_error_arg("reset:1"), ("reset", 1))
+        for arg in ["503", "503:2", "abc:0.1"]:
+            with self.assertRaises(ValueError):
+                parse_error_arg(arg)
+
+        self.assertIsNone(ErrorInjector().pick())
+        self.assertEqual(ErrorInjector([(503, 1)]).pick(), 503)
+        with self.assertRaises(ValueError):
+            ErrorInjector([(503, 0.6), ("reset", 0.6)])
+
+
+class TestMockServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.testcase_path = os.path.join(self.tmp_dir, "demo.json")
+        with open(self.testcase_path, "w") as f:
+            json.dump(TESTCASE, f)
+
+        self.routes = load_routes([self.tmp_dir])
+        self.server = start_mock_server(self.routes)
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def tearDown(self):
+        loader.project_meta = None
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_run_testcase_against_mock(self):
+        testcase = load_testcase(TESTCASE)
+        testcase.config.base_url = self.base_url
+        runner = HttpRunner().with_variables({})
+        runner.run_testcase(testcase)
+        self.assertTrue(runner.get_summary().success)
+
+        resp = requests.get(f"{self.base_url}/api/not_found")
+        self.assertEqual(resp.status_code, 404)
+
+        # replay recorded session
+        summary_path = os.path.join(self.tmp_dir, "all.summary.json")
+        with SummaryWriter(summary_path) as writer:
+            writer.add_testcase(runner.get_summary())
+
+        routes = load_routes([summary_path])
+        route = routes.match("GET", "/api/orders/5")
+        self.assertEqual(route.path, "/api/orders/5")
+        self.assertEqual(route.next_response().status_code, 201)
+
+    def test_load_har(self):
+        har_path = os.path.join(
+            os.path.dirname(__file__), "..", "har2case", "data", "demo.har"
+        )
+        routes = load_routes([har_path])
+        route = routes.match("POST", "/api/v1/Account/Login")
+        response = route.next_response()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.body)["Code"], 200)
+
+    def test_error_injection(self):
+        self.server.errors = ErrorInjector([(503, 1)])
+        resp = requests.get(f"{self.base_url}/api/orders/1")
+        self.assertEqual(resp.status_code, 503)
+
+        self.server.errors = ErrorInjector([("reset", 1)])
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            requests.get(f"{self.base_url}/api/orders/1")
@@ -13,6 +13,51 @@ class TestLoader(unittest.TestCase):
         )
         self.assertEqual(len(testcase_obj.teststeps), 4)
 
+    def test_load_testcase_file_cached(self):
+        import json
+        import shutil
+        import tempfile
+
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        path = os.path.join(tmp_dir, "login.json")
+        content = {
+            "config": {"name": "login", "variables": {"user": "a"}},
+            "teststeps": [
+                {"name": "login", "request": {"method": "GET", "url": "/login"}}
+            ],
+        }
+        with open(path, "w") as f:
+            json.dump(content, f)
+
+        testcase_1 = loader.load_testcase_file_cached(path)
+        testcase_2 = loader.load_testcase_file_cached(path)
+        self.assertEqual(testcase_1.config.path, path)
+        self.assertEqual(testcase_1.dict(), testcase_2.dict())
+
+        # variables are copied for each run, request is shared
+        self.assertIsNot(testcase_1.config.variables, testcase_2.config.variables)
+        self.assertIsNot(testcase_1.teststeps[0], testcase_2.teststeps[0])
+        self.assertIsNot(
+            testcase_1.teststeps[0].variables, testcase_2.teststeps[0].variables
+        )
+        self.assertIs(testcase_1.teststeps[0].request, testcase_2.teststeps[0].request)
+        testcase_1.config.variables["user"] = "b"
+        testcase_1.teststeps[0].variables["token"] = "abc"
+        testcase_3 = loader.load_testcase_file_cached(path)
+        self.assertEqual(testcase_3.config.variables, {"user": "a"})
+        self.assertEqual(testcase_3.teststeps[0].variables, {})
+
+        # reloaded if file modified
+        content["config"]["name"] = "login modified"
+        with open(path, "w") as f:
+            json.dump(content, f)
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000))
+        self.assertEqual(
+            loader.load_testcase_file_cached(path).config.name, "login modified"
+        )
+
     def test_load_json_file_file_format_error(self):
         json_tmp_file = "tmp.json"
         # create empty file
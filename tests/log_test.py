@@ -0,0 +1,146 @@
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+
+from loguru import logger
+
+from httprunner import log
+
+
+class TestLog(unittest.TestCase):
+    def tearDown(self):
+        os.environ.pop(log.LOG_LEVEL_ENV, None)
+        logger.remove()
+        logger.add(sys.stderr)
+        log._configured_level = ""
+        log._case_sink_id = None
+
+    def test_is_enabled(self):
+        logger.remove()
+        logger.add(lambda message: None, level="WARNING")
+        self.assertFalse(log.is_enabled("DEBUG"))
+        self.assertFalse(log.is_enabled("INFO"))
+        self.assertTrue(log.is_enabled("WARNING"))
+        self.assertTrue(log.is_enabled("ERROR"))
+
+        # enabled if any sink accepts the level
+        logger.add(lambda message: None, level="DEBUG")
+        self.assertTrue(log.is_enabled("DEBUG"))
+
+        logger.remove()
+        self.assertFalse(log.is_enabled("CRITICAL"))
+
+    def test_get_log_level(self):
+        self.assertEqual(log.get_log_level(), "")
+        self.assertEqual(log.get_testcase_log_level(), "DEBUG")
+
+        os.environ[log.LOG_LEVEL_ENV] = "quiet"
+        self.assertEqual(log.get_log_level(), "ERROR")
+        self.assertEqual(log.get_testcase_log_level(), "ERROR")
+
+    def test_setup_logger(self):
+        log.setup_logger("warning")
+        self.assertEqual(os.environ[log.LOG_LEVEL_ENV], "WARNING")
+        self.assertFalse(log.is_enabled("INFO"))
+        self.assertTrue(log.is_enabled("WARNING"))
+
+    def test_pop_log_level_arg(self):
+        self.assertEqual(
+            log.pop_log_level_arg(["a_test.py", "--hrun-log-level", "warning", "-s"]),
+            (["a_test.py", "-s"], "WARNING"),
+        )
+        self.assertEqual(
+            log.pop_log_level_arg(["--hrun-log-level=QUIET", "a_test.py"]),
+            (["a_test.py"], "QUIET"),
+        )
+        self.assertEqual(log.pop_log_level_arg(["a_test.py"]), (["a_test.py"], ""))
+        with self.assertRaises(ValueError):
+            log.pop_log_level_arg(["--hrun-log-level", "verbose"])
+
+    def test_skip_formatting_request_details(self):
+        import requests
+
+        from httprunner.client import get_req_resp_record
+
+        resp = requests.Response()
+        resp.status_code = 200
+        resp._content = b'{"a": 1}'
+        resp.headers["Content-Type"] = "application/json"
+        resp.request = requests.Request("POST", "http://a.com/", json={"b": 2}).prepare()
+
+        messages = []
+        logger.remove()
+        logger.add(messages.append, level="INFO")
+        get_req_resp_record(resp)
+        self.assertEqual(messages, [])
+
+        logger.add(messages.append, level="DEBUG")
+        get_req_resp_record(resp)
+        self.assertEqual(len(messages), 2)
+        self.assertIn("request details", messages[0])
+
+    def test_case_log_context(self):
+        logger.remove()
+        log_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, log_dir)
+        log_path_1 = os.path.join(log_dir, "logs", "case1.run.log")
+        log_path_2 = os.path.join(log_dir, "logs", "case2.run.log")
+
+        # testcase log sink only counts in testcase context
+        log.ensure_case_log_sink()
+        self.assertFalse(log.is_enabled("DEBUG"))
+
+        def run_case(log_path, name):
+            with log.case_log_context(log_path):
+                self.assertTrue(log.is_enabled("DEBUG"))
+                for index in range(100):
+                    logger.debug(f"{name} record {index}")
+
+        threads = [
+            threading.Thread(target=run_case, args=(log_path_1, "case1")),
+            threading.Thread(target=run_case, args=(log_path_2, "case2")),
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        logger.debug("not in testcase")
+
+        self.assertTrue(log.flush_case_logs())
+        with open(log_path_1) as f:
+            content_1 = f.read()
+        with open(log_path_2) as f:
+            content_2 = f.read()
+        self.assertEqual(content_1.count("case1 record"), 100)
+        self.assertNotIn("case2", content_1)
+        self.assertEqual(content_2.count("case2 record"), 100)
+        self.assertNotIn("not in testcase", content_1 + content_2)
+
+        # sink is added once, and re-added after removed
+        handler_id = log._case_sink_id
+        log.ensure_case_log_sink()
+        self.assertEqual(log._case_sink_id, handler_id)
+        logger.remove()
+        log.ensure_case_log_sink()
+        self.assertNotEqual(log._case_sink_id, handler_id)
+
+    def test_case_log_level(self):
+        logger.remove()
+        log_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, log_dir)
+        log_path = os.path.join(log_dir, "case.run.log")
+
+        os.environ[log.LOG_LEVEL_ENV] = "WARNING"
+        with log.case_log_context(log_path):
+            self.assertFalse(log.is_enabled("INFO"))
+            logger.info("info record")
+            logger.warning("warning record")
+
+        self.assertTrue(log.flush_case_logs())
+        with open(log_path) as f:
+            content = f.read()
+        self.assertNotIn("info record", content)
+        self.assertIn("warning record", content)
@@ -189,6 +189,24 @@ from request_methods.request_with_functions_test import (
             """Config("request methods testcase: validate with functions").variables(**{'foo1': 'bar1', 'foo2': 22}).base_url("https://postman_echo.com").verify(False)""",
         )
 
+        config["concurrency"] = 4
+        self.assertTrue(make_config_chain_style(config).endswith(".concurrency(4)"))
+
+        config["retry"] = {"times": 3, "status_codes": [503]}
+        config["circuit_breaker"] = {"threshold": 5}
+        self.assertTrue(
+            make_config_chain_style(config).endswith(
+                """.retry(**{'times': 3, 'status_codes': [503]}).circuit_breaker(**{'threshold': 5})"""
+            )
+        )
+
+        config["rate_limits"] = {"auth.internal": 200, "*": {"rate": 1000, "burst": 100}}
+        self.assertTrue(
+            make_config_chain_style(config).endswith(
+                """.rate_limit("auth.internal", 200).rate_limit("*", **{'rate': 1000, 'burst': 100})"""
+            )
+        )
+
     def test_make_teststep_chain_style(self):
         step = {
             "name": "get with params",
@@ -215,6 +233,27 @@ from request_methods.request_with_functions_test import (
             """Step(RunRequest("get with params").with_variables(**{'foo1': 'bar1', 'foo2': 123, 'sum_v': '${sum_two(1, 2)}'}).get("/get").with_params(**{'foo1': '$foo1', 'foo2': '$foo2', 'sum_v': '$sum_v'}).with_headers(**{'User-Agent': 'HttpRunner/${get_httprunner_version()}'}).extract().with_jmespath('body.args.foo1', 'session_foo1').with_jmespath('body.args.foo2', 'session_foo2').validate().assert_equal("status_code", 200).assert_equal("body.args.sum_v", "3"))""",
         )
 
+        step = {
+            "name": "login",
+            "testcase": "CLS_LB(TestCaseLogin)CLS_RB",
+            "cache": {"scope": "session", "ttl": 600},
+            "export": ["token"],
+        }
+        self.assertEqual(
+            make_teststep_chain_style(step),
+            """Step(RunTestCase("login").with_cache(**{'scope': 'session', 'ttl': 600}).call(CLS_LB(TestCaseLogin)CLS_RB).export(*['token']))""",
+        )
+
+        step = {
+            "name": "get",
+            "retry": {"times": 2, "status_codes": [502, 503]},
+            "request": {"method": "GET", "url": "/get"},
+        }
+        self.assertEqual(
+            make_teststep_chain_style(step),
+            """Step(RunRequest("get").with_retry(**{'times': 2, 'status_codes': [502, 503]}).get("/get"))""",
+        )
+
     def test_make_requests_with_json_chain_style(self):
         step = {
             "name": "get with params",
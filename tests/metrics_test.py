@@ -0,0 +1,133 @@
+import os
+import unittest
+
+import requests
+
+from httprunner import HttpRunner, loader, metrics
+from httprunner.exceptions import ValidationFailure
+from httprunner.ext.mock.core import MockRoutes, make_mock_response, start_mock_server
+from httprunner.loader import load_testcase
+from httprunner.metrics import (
+    METRICS_ENV,
+    Histogram,
+    get_status_class,
+    parse_address,
+    pop_metrics_arg,
+)
+
+
+class TestMetrics(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        routes = MockRoutes()
+        routes.add("GET", "/ok", make_mock_response(body={"code": 0}))
+        routes.add("GET", "/fail", make_mock_response(503, body={"code": 1}))
+        cls.mock_server = start_mock_server(routes)
+        cls.base_url = f"http://127.0.0.1:{cls.mock_server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.mock_server.shutdown()
+        cls.mock_server.server_close()
+
+    def tearDown(self):
+        loader.project_meta = None
+        metrics.disable()
+        os.environ.pop(METRICS_ENV, None)
+
+    def make_testcase(self):
+        return load_testcase(
+            {
+                "config": {"name": "metrics demo", "base_url": self.base_url},
+                "teststeps": [
+                    {
+                        "name": "ok",
+                        "request": {"method": "GET", "url": "/ok"},
+                        "validate": [{"eq": ["body.code", 0]}],
+                    },
+                    {
+                        "name": "fail",
+                        "request": {"method": "GET", "url": "/fail"},
+                        "validate": [{"eq": ["status_code", 200]}],
+                    },
+                ],
+            }
+        )
+
+    def test_parse_args(self):
+        self.assertEqual(parse_address("9464"), ("127.0.0.1", 9464))
+        self.assertEqual(parse_address("0.0.0.0:9464"), ("0.0.0.0", 9464))
+        for address in ["abc", "127.0.0.1:", "70000"]:
+            with self.assertRaises(ValueError):
+                parse_address(address)
+
+        self.assertEqual(
+            pop_metrics_arg(["a_test.py", "--metrics", "9464"]), (["a_test.py"], "9464")
+        )
+        self.assertEqual(
+            pop_metrics_arg(["--metrics=:9464", "a_test.py"]), (["a_test.py"], ":9464")
+        )
+        self.assertEqual(pop_metrics_arg(["a_test.py"]), (["a_test.py"], ""))
+        for args in [["a_test.py", "--metrics"], ["--metrics=", "a_test.py"]]:
+            with self.assertRaises(ValueError):
+                pop_metrics_arg(args)
+
+    def test_histogram(self):
+        histogram = Histogram("latency", "", ("step",), buckets=(0.1, 1))
+        for value in [0.05, 0.1, 0.5, 3]:
+            histogram.observe(("a",), value)
+
+        self.assertEqual(
+            histogram.render(True)[2:],
+            [
+                'latency_bucket{step="a",le="0.1"} 2',
+                'latency_bucket{step="a",le="1"} 3',
+                'latency_bucket{step="a",le="+Inf"} 4',
+                'latency_count{step="a"} 4',
+                'latency_sum{step="a"} 3.65',
+            ],
+        )
+        self.assertEqual(get_status_class(503), "5xx")
+        self.assertEqual(get_status_class(0), "error")
+
+    def test_disabled(self):
+        self.assertIsNone(metrics.registry)
+        with self.assertRaises(ValidationFailure):
+            HttpRunner().with_variables({}).run_testcase(self.make_testcase())
+        self.assertIsNone(metrics.registry)
+
+    def test_serve_metrics(self):
+        metrics.enable("127.0.0.1:0")
+        with self.assertRaises(ValidationFailure):
+            HttpRunner().with_variables({}).run_testcase(self.make_testcase())
+
+        url = f"http://127.0.0.1:{metrics.server.server_port}/metrics"
+        resp = requests.get(url, headers={"Accept": "application/openmetrics-text"})
+        self.assertEqual(
+            resp.headers["Content-Type"], metrics.OPENMETRICS_CONTENT_TYPE
+        )
+        lines = resp.text.splitlines()
+        self.assertIn("# TYPE hrun_requests counter", lines)
+        self.assertIn(
+            'hrun_requests_total{testcase="metrics demo",step="ok",method="GET",'
+            'status_class="2xx"} 1',
+            lines,
+        )
+        self.assertIn(
+            'hrun_request_duration_seconds_count{testcase="metrics demo",step="fail",'
+            'method="GET",status_class="5xx"} 1',
+            lines,
+        )
+        self.assertIn(
+            'hrun_validations_total{testcase="metrics demo",step="fail",'
+            'result="fail"} 1',
+            lines,
+        )
+        self.assertEqual(lines[-1], "# EOF")
+
+        # prometheus text format
+        resp = requests.get(url)
+        self.assertIn("# TYPE hrun_requests_total counter", resp.text)
+        self.assertNotIn("# EOF", resp.text)
+
+        self.assertEqual(requests.get(url + "_not_found").status_code, 404)
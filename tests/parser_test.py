@@ -20,6 +20,35 @@ class TestParserBasic(unittest.TestCase):
         with self.assertRaises(VariableNotFound):
             parser.parse_variables_mapping(variables)
 
+    def test_parse_variables_mapping_with_base_mapping(self):
+        base_mapping = {"base_url": "https://httpbin.org", "varB": "base", "token": "abc"}
+        variables = {
+            "base_url": "$base_url",
+            "varA": "$varB",
+            "varB": "$varC",
+            "varC": "123",
+            "url": "${base_url}/get?token=$token",
+        }
+        parsed_variables = parser.parse_variables_mapping(
+            variables, base_mapping=base_mapping
+        )
+        # variables referencing itself are left to base mapping
+        self.assertNotIn("base_url", parsed_variables)
+        # variables in variables_mapping take precedence over base mapping
+        self.assertEqual(parsed_variables["varA"], "123")
+        self.assertEqual(parsed_variables["url"], "https://httpbin.org/get?token=abc")
+        # base mapping is not parsed again or modified
+        self.assertNotIn("token", parsed_variables)
+        self.assertEqual(base_mapping["varB"], "base")
+
+        with self.assertRaises(VariableNotFound):
+            parser.parse_variables_mapping({"varA": "$varD"}, base_mapping=base_mapping)
+
+    def test_parse_variables_mapping_circular_reference(self):
+        variables = {"varA": "$varB", "varB": "$varA"}
+        with self.assertRaises(VariableNotFound):
+            parser.parse_variables_mapping(variables)
+
     def test_parse_string_value(self):
         self.assertEqual(parser.parse_string_value("123"), 123)
         self.assertEqual(parser.parse_string_value("12.3"), 12.3)
@@ -545,3 +574,69 @@ class TestParserBasic(unittest.TestCase):
             },
             parsed_params,
         )
+
+
+class TestDataTemplate(unittest.TestCase):
+    def setUp(self):
+        self.variables = {"uid": 1000, "token": "abc", "var": [1, 2]}
+        self.functions = {"add_one": lambda x: x + 1}
+
+    def test_parse_equivalent_to_parse_data(self):
+        raw_data = {
+            "url": "/api/users/$uid",
+            "headers": {"User-Agent": " hrun ", "Token": "${token}"},
+            "$token": "key",
+            "params": ("a", "b", "${add_one($uid)}"),
+            "json": {"list": [1, "$var", {"price": "$$10"}], "none": None},
+            "timeout": 120,
+            "verify": False,
+        }
+        template = parser.DataTemplate(raw_data)
+        self.assertFalse(template.is_static)
+        self.assertEqual(
+            template.parse(self.variables, self.functions),
+            parser.parse_data(raw_data, self.variables, self.functions),
+        )
+
+    def test_parse_static_data(self):
+        template = parser.DataTemplate({"headers": {"a": " b\t"}, "list": (1, "c")})
+        self.assertTrue(template.is_static)
+        parsed_data = template.parse()
+        self.assertEqual(parsed_data, {"headers": {"a": "b"}, "list": [1, "c"]})
+
+        # parsed result can be modified without affecting template
+        parsed_data["headers"]["HRUN-Request-ID"] = "123"
+        parsed_data["list"].append(2)
+        self.assertEqual(template.parse(), {"headers": {"a": "b"}, "list": [1, "c"]})
+
+    def test_static_parts_of_dynamic_data_are_copied(self):
+        template = parser.DataTemplate({"url": "/$uid", "headers": {"a": "b"}})
+        parsed_data = template.parse(self.variables)
+        parsed_data["headers"]["c"] = "d"
+        self.assertEqual(template.parse(self.variables)["headers"], {"a": "b"})
+
+    def test_parse_variable_not_found(self):
+        template = parser.DataTemplate({"url": "/$unknown"})
+        with self.assertRaises(VariableNotFound):
+            template.parse(self.variables)
+
+    def test_parse_request(self):
+        from httprunner.models import TRequest
+
+        request = TRequest(
+            method="POST",
+            url="/api/users/$uid",
+            headers={"Token": "$token"},
+            json={"a": 1},
+        )
+        parsed_request = parser.parse_request(request, self.variables)
+        request_dict = request.dict()
+        request_dict.pop("upload")
+        self.assertEqual(parsed_request, parser.parse_data(request_dict, self.variables))
+
+        # request template is analyzed once and cached
+        template = parser.get_request_template(request)
+        self.assertIs(parser.get_request_template(request), template)
+        self.assertIsNot(
+            parser.get_request_template(request.copy(deep=True)), template
+        )
@@ -0,0 +1,73 @@
+import unittest
+
+from httprunner import exceptions
+from httprunner.models import TConfig, TestCase, TRequest, TStep, TStepCache
+from httprunner.planner import PlanNode, build_plan
+
+
+def make_testcase(name: str, teststeps) -> TestCase:
+    return TestCase(config=TConfig(name=name, export=["token"]), teststeps=teststeps)
+
+
+class TestPlanner(unittest.TestCase):
+    def setUp(self):
+        self.testcases = {
+            "token.yml": make_testcase(
+                "token",
+                [TStep(name="token", request=TRequest(method="GET", url="/token"))],
+            ),
+            "login.yml": make_testcase(
+                "login",
+                [
+                    TStep(name="get token", testcase="token.yml"),
+                    TStep(name="login", request=TRequest(method="GET", url="/login")),
+                ],
+            ),
+        }
+
+    def load_ref_testcase(self, step: TStep) -> TestCase:
+        return self.testcases[step.testcase]
+
+    def test_build_plan(self):
+        testcase = make_testcase(
+            "root",
+            [
+                TStep(name="login", testcase="login.yml", export=["user"]),
+                TStep(name="get", request=TRequest(method="GET", url="/get")),
+            ],
+        )
+        plan = build_plan(testcase, self.load_ref_testcase)
+        self.assertEqual(
+            [(node.kind, node.step.name, node.frame.depth) for node in plan],
+            [
+                (PlanNode.ENTER, "login", 1),
+                (PlanNode.ENTER, "get token", 2),
+                (PlanNode.STEP, "token", 2),
+                (PlanNode.EXIT, "get token", 2),
+                (PlanNode.STEP, "login", 1),
+                (PlanNode.EXIT, "login", 1),
+                (PlanNode.STEP, "get", 0),
+            ],
+        )
+
+        # export names are resolved at plan time, step export overrides testcase export
+        self.assertEqual(plan[0].frame.export, ["user"])
+        self.assertEqual(plan[1].frame.export, ["token"])
+        self.assertIs(plan[1].frame.parent, plan[0].frame)
+        self.assertIs(plan[6].frame, plan[0].frame.parent)
+
+    def test_build_plan_with_cached_step(self):
+        testcase = make_testcase(
+            "root",
+            [TStep(name="login", testcase="login.yml", cache=TStepCache())],
+        )
+        plan = build_plan(testcase, self.load_ref_testcase)
+        self.assertEqual([node.kind for node in plan], [PlanNode.STEP])
+
+    def test_build_plan_circular_reference(self):
+        self.testcases["token.yml"].teststeps.append(
+            TStep(name="login again", testcase="login.yml")
+        )
+        testcase = make_testcase("root", [TStep(name="login", testcase="login.yml")])
+        with self.assertRaises(exceptions.ParamsError):
+            build_plan(testcase, self.load_ref_testcase)
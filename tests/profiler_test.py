@@ -0,0 +1,146 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from httprunner import HttpRunner, loader, profiler
+from httprunner.ext.mock.core import MockRoutes, make_mock_response, start_mock_server
+from httprunner.loader import load_testcase
+from httprunner.profiler import Profiler, pop_profile_arg
+
+
+def make_testcase(base_url):
+    return load_testcase(
+        {
+            "config": {
+                "name": "profile demo",
+                "base_url": base_url,
+                "variables": {"user": "alice"},
+            },
+            "teststeps": [
+                {
+                    "name": "login",
+                    "variables": {"password": "123456"},
+                    "request": {
+                        "method": "POST",
+                        "url": "/login",
+                        "json": {"u": "$user", "p": "$password"},
+                    },
+                    "extract": {"token": "body.token"},
+                    "validate": [{"eq": ["status_code", 200]}],
+                },
+                {
+                    "name": "get user",
+                    "request": {"method": "GET", "url": "/users/$user"},
+                    "validate": [{"eq": ["body.token", "$token"]}],
+                },
+            ],
+        }
+    )
+
+
+class TestProfiler(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        routes = MockRoutes()
+        routes.add("POST", "/login", make_mock_response(body={"token": "abc"}))
+        routes.add("GET", "/users/$user", make_mock_response(body={"token": "abc"}))
+        cls.server = start_mock_server(routes)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        loader.project_meta = None
+        shutil.rmtree(self.tmp_dir)
+
+    def run_testcase(self, mode: str) -> Profiler:
+        with Profiler("profile demo", mode) as profile:
+            HttpRunner().with_variables({}).run_testcase(make_testcase(self.base_url))
+        return profile
+
+    def test_pop_profile_arg(self):
+        self.assertEqual(
+            pop_profile_arg(["a_test.py", "--profile", "-s"]),
+            (["a_test.py", "-s"], "timers"),
+        )
+        self.assertEqual(
+            pop_profile_arg(["--profile=Sampling", "a_test.py"]),
+            (["a_test.py"], "sampling"),
+        )
+        self.assertEqual(pop_profile_arg(["a_test.py"]), (["a_test.py"], ""))
+        with self.assertRaises(ValueError):
+            pop_profile_arg(["--profile=gprof"])
+
+    def test_disabled(self):
+        self.assertIsNone(profiler.get_current_profiler())
+        self.assertIs(profiler.phase("parse"), profiler.step("login"))
+
+    def test_profile_timers(self):
+        profile = self.run_testcase("timers")
+        self.assertIsNone(profiler.get_current_profiler())
+
+        paths = profile.get_ordered_paths()
+        self.assertEqual(
+            paths[:8],
+            [
+                ("login",),
+                ("login", "variables"),
+                ("login", "parse"),
+                ("login", "send"),
+                ("login", "send", "record"),
+                ("login", "extract"),
+                ("login", "validate"),
+                ("get user",),
+            ],
+        )
+        count, total, max_seconds = profile.frames[("login", "send")]
+        self.assertEqual(count, 1)
+        self.assertGreater(total, profile.frames[("login", "send", "record")][1])
+
+        folded = profile.get_folded_lines()
+        self.assertTrue(
+            any(line.startswith("profile demo;login;send;record ") for line in folded)
+        )
+        for line in folded:
+            self.assertGreater(int(line.rsplit(" ", 1)[1]), 0)
+
+        paths = profile.dump(os.path.join(self.tmp_dir, "case_id"))
+        self.assertEqual(
+            [os.path.basename(path) for path in paths],
+            ["case_id.profile.txt", "case_id.folded"],
+        )
+        with open(paths[0]) as f:
+            table = f.read()
+        self.assertIn("profile of testcase: profile demo, mode: timers", table)
+        self.assertIn("    record", table)
+
+    def test_profile_cprofile(self):
+        profile = self.run_testcase("cprofile")
+        paths = profile.dump(os.path.join(self.tmp_dir, "case_id"))
+        self.assertTrue(paths[-1].endswith("case_id.prof"))
+        with open(paths[0]) as f:
+            self.assertIn("cumulative", f.read())
+
+    def test_profile_sampling(self):
+        with Profiler("profile demo", "sampling", interval=0.001) as profile:
+            for _ in range(20):
+                HttpRunner().with_variables({}).run_testcase(
+                    make_testcase(self.base_url)
+                )
+
+        sampled = profile.get_sampled_folded_lines()
+        self.assertTrue(sampled)
+        # stacks start from the frame entering profiler
+        for line in sampled:
+            self.assertTrue(line.startswith("profile demo;test_profile_sampling "))
+        paths = profile.dump(os.path.join(self.tmp_dir, "case_id"))
+        self.assertTrue(paths[-1].endswith("case_id.samples.folded"))
+        with open(paths[0]) as f:
+            self.assertIn("sampled", f.read())
@@ -0,0 +1,160 @@
+import os
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler
+
+from httprunner import exceptions, ratelimit
+from httprunner.backports import ThreadingHTTPServer
+from httprunner.client import HttpSession
+from httprunner.loader import load_testcase
+from httprunner.models import TRateLimit
+from httprunner.ratelimit import (
+    RATE_LIMITS_ENV,
+    RateLimiter,
+    TokenBucket,
+    get_rate_limits,
+    parse_rate_limit_arg,
+    pop_rate_limit_args,
+    set_cli_rate_limits,
+)
+
+
+class OkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestRateLimit(unittest.TestCase):
+    def tearDown(self):
+        os.environ.pop(RATE_LIMITS_ENV, None)
+        ratelimit.rate_limiter.clear()
+
+    def test_parse_rate_limit_arg(self):
+        self.assertEqual(
+            parse_rate_limit_arg("auth.internal=200"),
+            ("auth.internal", TRateLimit(rate=200)),
+        )
+        self.assertEqual(
+            parse_rate_limit_arg("*=1000:100"), ("*", TRateLimit(rate=1000, burst=100))
+        )
+        for arg in ["auth.internal", "=200", "auth.internal=abc", "*=0", "*=10:0"]:
+            with self.assertRaises(ValueError):
+                parse_rate_limit_arg(arg)
+
+    def test_invalid_config_rate_limits(self):
+        for rate_limits in [
+            {"*": 0},
+            {"*": -1},
+            {"*": {"rate": 0}},
+            {"*": {"rate": 10, "burst": 0}},
+        ]:
+            with self.assertRaises(exceptions.TestCaseFormatError):
+                load_testcase(
+                    {
+                        "config": {"name": "demo", "rate_limits": rate_limits},
+                        "teststeps": [],
+                    }
+                )
+
+    def test_pop_rate_limit_args(self):
+        self.assertEqual(
+            pop_rate_limit_args(
+                ["a_test.py", "--rate-limit", "auth.internal=200", "--rate-limit=*=10"]
+            ),
+            (
+                ["a_test.py"],
+                {"auth.internal": TRateLimit(rate=200), "*": TRateLimit(rate=10)},
+            ),
+        )
+        self.assertEqual(pop_rate_limit_args(["a_test.py"]), (["a_test.py"], {}))
+
+    def test_get_rate_limits(self):
+        config_rate_limits = {"auth.internal": 100, "*": {"rate": 1000, "burst": 10}}
+        self.assertEqual(
+            get_rate_limits(config_rate_limits),
+            {
+                "auth.internal": TRateLimit(rate=100),
+                "*": TRateLimit(rate=1000, burst=10),
+            },
+        )
+
+        # cli rate limits take precedence
+        set_cli_rate_limits({"auth.internal": TRateLimit(rate=200)})
+        self.assertEqual(
+            get_rate_limits(config_rate_limits)["auth.internal"], TRateLimit(rate=200)
+        )
+        self.assertEqual(get_rate_limits(), {"auth.internal": TRateLimit(rate=200)})
+
+    def test_token_bucket(self):
+        bucket = TokenBucket(rate=10, burst=2)
+        self.assertEqual(bucket.reserve(), 0)
+        self.assertEqual(bucket.reserve(), 0)
+        # tokens are reserved in advance, waiters are served in order
+        self.assertAlmostEqual(bucket.reserve(), 0.1, delta=0.01)
+        self.assertAlmostEqual(bucket.reserve(), 0.2, delta=0.01)
+
+    def test_rate_limiter_match_hosts(self):
+        limiter = RateLimiter()
+        rate_limits = {"auth.internal": TRateLimit(rate=20, burst=1)}
+
+        start_at = time.time()
+        for _ in range(3):
+            limiter.acquire("http://auth.internal:8080/login", rate_limits)
+        self.assertGreaterEqual(time.time() - start_at, 0.09)
+
+        # other hosts are not throttled
+        self.assertEqual(limiter.acquire("http://other.internal/", rate_limits), 0)
+
+        # shared by threads
+        waits = []
+        threads = [
+            threading.Thread(
+                target=lambda: waits.append(
+                    limiter.acquire("http://auth.internal/", rate_limits)
+                )
+            )
+            for _ in range(3)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertGreater(max(waits), 0.1)
+
+
+class TestSessionRateLimit(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), OkHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}/get"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def tearDown(self):
+        ratelimit.rate_limiter.clear()
+
+    def test_throttle_ms(self):
+        session = HttpSession()
+        rate_limits = {"127.0.0.1": TRateLimit(rate=10, burst=1)}
+
+        session.request("GET", self.url, rate_limits=rate_limits)
+        self.assertEqual(session.data.stat.throttle_ms, 0)
+
+        session.request("GET", self.url, rate_limits=rate_limits)
+        stat = session.data.stat
+        self.assertGreater(stat.throttle_ms, 50)
+        # throttled time is excluded from response time
+        self.assertLess(stat.response_time_ms, stat.throttle_ms)
+        self.assertEqual(stat.retry_elapsed_ms, 0)
@@ -0,0 +1,81 @@
+import unittest
+
+from httprunner.models import SessionData, StepData, TestCaseSummary, TestCaseTime
+from httprunner.records import (
+    ReqRespRecord,
+    RequestRecord,
+    ResponseRecord,
+    SessionRecord,
+    StepRecord,
+)
+
+
+class TestRecords(unittest.TestCase):
+    def make_session_record(self) -> SessionRecord:
+        session_record = SessionRecord()
+        session_record.success = True
+        session_record.stat.response_time_ms = 12.5
+        session_record.address.server_port = 443
+        session_record.req_resps.append(
+            ReqRespRecord(
+                request=RequestRecord(
+                    method="POST", url="https://httprunner.top/api", body={"a": 1}
+                ),
+                response=ResponseRecord(
+                    status_code=200,
+                    headers={"Content-Type": "application/json"},
+                    cookies={},
+                    encoding="utf-8",
+                    content_type="application/json",
+                    body={"code": 0},
+                ),
+            )
+        )
+        return session_record
+
+    def test_slots(self):
+        session_record = SessionRecord()
+        self.assertFalse(hasattr(session_record, "__dict__"))
+        with self.assertRaises(AttributeError):
+            session_record.unknown = 1
+
+        # default values are not shared between records
+        self.assertIsNot(session_record.req_resps, SessionRecord().req_resps)
+        self.assertIsNot(session_record.stat, SessionRecord().stat)
+
+    def test_to_model(self):
+        session_data = self.make_session_record().to_model()
+        self.assertIsInstance(session_data, SessionData)
+        self.assertEqual(session_data.stat.response_time_ms, 12.5)
+        self.assertEqual(session_data.address.server_port, 443)
+        self.assertEqual(session_data.address.client_ip, "N/A")
+        self.assertEqual(session_data.req_resps[0].request.body, {"a": 1})
+        self.assertEqual(session_data.req_resps[0].response.body, {"code": 0})
+        self.assertEqual(
+            session_data.dict(), self.make_session_record().dict(),
+        )
+
+    def test_nested_step_records(self):
+        request_step = StepRecord(name="request")
+        request_step.success = True
+        request_step.data = self.make_session_record()
+        testcase_step = StepRecord(name="testcase")
+        testcase_step.data = [request_step]
+
+        step_data = testcase_step.to_model()
+        self.assertIsInstance(step_data, StepData)
+        self.assertIsInstance(step_data.data[0], StepData)
+        self.assertIsInstance(step_data.data[0].data, SessionData)
+
+        summary = TestCaseSummary(
+            name="demo",
+            success=True,
+            case_id="id",
+            time=TestCaseTime(),
+            step_datas=[step_data],
+        )
+        summary_dict = summary.dict()
+        self.assertEqual(
+            summary_dict["step_datas"][0]["data"][0]["data"]["stat"]["response_time_ms"],
+            12.5,
+        )
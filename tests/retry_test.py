@@ -0,0 +1,199 @@
+import socket
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler
+
+from requests.exceptions import ConnectTimeout, ReadTimeout
+
+from httprunner.backports import ThreadingHTTPServer
+from httprunner.client import HttpSession, make_error_response
+from httprunner.models import TCircuitBreaker, TRetry
+from httprunner.retry import (
+    CircuitBreaker,
+    CircuitBreakerOpenError,
+    circuit_breakers,
+    get_backoff_seconds,
+    get_circuit_breaker,
+    is_retryable,
+)
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # number of requests responded with 503 before 200
+    failures = 0
+    requests = 0
+
+    def do_GET(self):
+        FlakyHandler.requests += 1
+        status_code = 503 if FlakyHandler.requests <= FlakyHandler.failures else 200
+        body = b"{}"
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def get_unused_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class TestRetry(unittest.TestCase):
+    def test_is_retryable(self):
+        retry = TRetry(status_codes=[503])
+        url = "http://127.0.0.1/get"
+        # subclass of retryable exceptions
+        self.assertTrue(
+            is_retryable(make_error_response("GET", url, ReadTimeout()), retry)
+        )
+        self.assertTrue(
+            is_retryable(make_error_response("GET", url, ConnectTimeout()), retry)
+        )
+        self.assertFalse(
+            is_retryable(
+                make_error_response("GET", url, CircuitBreakerOpenError()), retry
+            )
+        )
+
+        retry.exceptions = ["ConnectionError"]
+        self.assertFalse(
+            is_retryable(make_error_response("GET", url, ReadTimeout()), retry)
+        )
+
+    def test_is_retryable_by_method(self):
+        retry = TRetry(status_codes=[503])
+        url = "http://127.0.0.1/post"
+        # non-idempotent methods are not retried by default
+        self.assertFalse(
+            is_retryable(make_error_response("POST", url, ReadTimeout()), retry)
+        )
+        self.assertTrue(
+            is_retryable(make_error_response("PUT", url, ReadTimeout()), retry)
+        )
+
+        retry.methods = ["POST"]
+        self.assertTrue(
+            is_retryable(make_error_response("POST", url, ReadTimeout()), retry)
+        )
+        self.assertFalse(
+            is_retryable(make_error_response("GET", url, ReadTimeout()), retry)
+        )
+
+    def test_get_backoff_seconds(self):
+        retry = TRetry(backoff=0.5, max_backoff=3, jitter=False)
+        self.assertEqual(
+            [get_backoff_seconds(retry, index) for index in range(4)], [0.5, 1, 2, 3]
+        )
+
+        retry.jitter = True
+        for _ in range(10):
+            self.assertLessEqual(get_backoff_seconds(retry, 2), 2)
+
+    def test_circuit_breaker(self):
+        breaker = CircuitBreaker(threshold=2, recovery_timeout=0.1)
+        breaker.record(False)
+        self.assertTrue(breaker.allow_request())
+        breaker.record(False)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow_request())
+
+        # only one probe request is allowed after recovery timeout
+        time.sleep(0.1)
+        self.assertTrue(breaker.allow_request())
+        self.assertFalse(breaker.allow_request())
+        breaker.record(False)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+        time.sleep(0.1)
+        self.assertTrue(breaker.allow_request())
+        breaker.record(True)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(breaker.failures, 0)
+
+    def test_circuit_breaker_first_config_wins(self):
+        circuit_breakers.clear()
+        url = "http://breaker.example.com/get"
+        breaker = get_circuit_breaker(url, TCircuitBreaker(threshold=2))
+        other = get_circuit_breaker(
+            url, TCircuitBreaker(threshold=10, recovery_timeout=1)
+        )
+        self.assertIs(other, breaker)
+        self.assertEqual((breaker.threshold, breaker.recovery_timeout), (2, 30))
+        circuit_breakers.clear()
+
+
+class TestSessionRetry(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        FlakyHandler.requests = 0
+        FlakyHandler.failures = 2
+        circuit_breakers.clear()
+        self.session = HttpSession()
+
+    def test_retry_on_status_code(self):
+        retry = TRetry(times=3, status_codes=[503], backoff=0.05, jitter=False)
+        resp = self.session.request("GET", f"{self.base_url}/get", retry=retry)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(FlakyHandler.requests, 3)
+
+        stat = self.session.data.stat
+        self.assertEqual(stat.retry_times, 2)
+        # backoff 0.05s and 0.1s
+        self.assertGreaterEqual(stat.retry_elapsed_ms, 150)
+        self.assertLess(stat.response_time_ms, stat.retry_elapsed_ms)
+        self.assertEqual(stat.to_model().retry_times, 2)
+
+    def test_retry_exhausted(self):
+        retry = TRetry(times=1, status_codes=[503], backoff=0, jitter=False)
+        resp = self.session.request("GET", f"{self.base_url}/get", retry=retry)
+        self.assertEqual(resp.status_code, 503)
+        self.assertEqual(FlakyHandler.requests, 2)
+        self.assertEqual(self.session.data.stat.retry_times, 1)
+
+    def test_no_retry(self):
+        resp = self.session.request("GET", f"{self.base_url}/get")
+        self.assertEqual(resp.status_code, 503)
+        self.assertEqual(FlakyHandler.requests, 1)
+        self.assertEqual(self.session.data.stat.retry_times, 0)
+        self.assertEqual(self.session.data.stat.retry_elapsed_ms, 0)
+
+    def test_circuit_breaker_fail_fast(self):
+        url = f"http://127.0.0.1:{get_unused_port()}/get"
+        circuit_breaker = TCircuitBreaker(threshold=2, recovery_timeout=60)
+        retry = TRetry(times=5, backoff=0, jitter=False)
+
+        # connection refused is retried until circuit breaker opens
+        resp = self.session.request(
+            "GET", url, retry=retry, circuit_breaker=circuit_breaker
+        )
+        self.assertEqual(resp.status_code, 0)
+        self.assertIsInstance(resp.error, CircuitBreakerOpenError)
+        self.assertEqual(self.session.data.stat.retry_times, 2)
+
+        # later requests to the host fail without being sent
+        resp = self.session.request("GET", url, circuit_breaker=circuit_breaker)
+        self.assertIsInstance(resp.error, CircuitBreakerOpenError)
+        self.assertEqual(self.session.data.req_resps[0].request.url, url)
+
+        # other hosts are not affected
+        resp = self.session.request(
+            "GET", f"{self.base_url}/get", circuit_breaker=circuit_breaker
+        )
+        self.assertEqual(resp.status_code, 503)
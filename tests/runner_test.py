@@ -1,9 +1,30 @@
+import json
 import os
+import socket
+import threading
+import time
 import unittest
+from typing import Text
+from http.server import BaseHTTPRequestHandler
 
-from httprunner import loader
+import requests
+
+from httprunner import exceptions, loader, models
+from httprunner.backports import ThreadingHTTPServer
 from httprunner.cli import main_run
-from httprunner.runner import HttpRunner
+from httprunner.exceptions import ValidationFailure
+from httprunner.cache import step_cache
+from httprunner.models import (
+    TCircuitBreaker,
+    TConfig,
+    TRequest,
+    TRetry,
+    TStep,
+    TStepCache,
+)
+from httprunner.ratelimit import RATE_LIMITS_ENV
+from httprunner.retry import circuit_breakers
+from httprunner.runner import HttpRunner, get_step_waves
 
 
 class TestHttpRunner(unittest.TestCase):
@@ -38,3 +59,461 @@ class TestHttpRunner(unittest.TestCase):
         self.assertTrue(os.path.exists("tests/data/debugtalk.py"))
         self.assertTrue(os.path.exists("tests/data/a_b_c/T1_test.py"))
         self.assertTrue(os.path.exists("tests/data/a_b_c/T2_3_test.py"))
+
+
+class SlowJsonHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    paths = []
+    delay = 0.2
+
+    def do_GET(self):
+        self.paths.append(self.path)
+        time.sleep(self.delay)
+        body = json.dumps({"path": self.path, "token": "abc"}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LocalServerTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), SlowJsonHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+
+class TestConcurrentSteps(LocalServerTestCase):
+    def make_testcase(self, concurrency: int) -> models.TestCase:
+        teststeps = [
+            TStep(
+                name="login",
+                request=TRequest(method="GET", url="/login"),
+                extract={"token": "body.token"},
+            )
+        ]
+        teststeps += [
+            TStep(
+                name=f"get item {index}",
+                request=TRequest(
+                    method="GET", url=f"/items/{index}", headers={"Token": "$token"}
+                ),
+                extract={"path": "body.path"},
+                validators=[{"eq": ["body.path", f"/items/{index}"]}],
+            )
+            for index in range(4)
+        ]
+        teststeps.append(
+            TStep(
+                name="logout",
+                request=TRequest(method="GET", url="/logout"),
+                validators=[{"eq": ["body.path", "/logout"]}],
+                variables={"last_path": "$path"},
+            )
+        )
+        return models.TestCase(
+            config=TConfig(
+                name="concurrent steps", base_url=self.base_url, concurrency=concurrency
+            ),
+            teststeps=teststeps,
+        )
+
+    def test_get_step_waves(self):
+        testcase = self.make_testcase(4)
+        self.assertEqual(get_step_waves(testcase.teststeps), [[0], [1, 2, 3, 4], [5]])
+
+        # referenced testcase is run after all previous teststeps and before later ones
+        teststeps = testcase.teststeps[:3]
+        teststeps.insert(2, TStep(name="ref", testcase="ref.yml"))
+        self.assertEqual(get_step_waves(teststeps), [[0], [1], [2], [3]])
+
+    def test_run_steps_concurrently(self):
+        step_names = []
+        testcase = self.make_testcase(4)
+        start_at = time.time()
+        runner = (
+            HttpRunner()
+            .with_variables({})
+            .with_step_callback(lambda step_data: step_names.append(step_data.name))
+            .run_testcase(testcase)
+        )
+        duration = time.time() - start_at
+
+        summary = runner.get_summary()
+        self.assertTrue(summary.success)
+        # 6 teststeps are run in 3 waves
+        self.assertLess(duration, 1.0)
+
+        expected_names = ["login"] + [f"get item {i}" for i in range(4)] + ["logout"]
+        self.assertEqual([step.name for step in summary.step_datas], expected_names)
+        self.assertEqual(step_names, expected_names)
+        for index in range(4):
+            session_data = summary.step_datas[index + 1].data
+            self.assertEqual(
+                session_data.req_resps[0].request.url,
+                f"{self.base_url}/items/{index}",
+            )
+            self.assertEqual(session_data.req_resps[0].request.headers["Token"], "abc")
+
+        # variables extracted by later teststeps override previous ones
+        self.assertEqual(testcase.teststeps[5].variables["last_path"], "/items/3")
+
+    def test_run_steps_concurrently_failed(self):
+        testcase = self.make_testcase(4)
+        testcase.teststeps[2].validators = [{"eq": ["body.path", "/unexpected"]}]
+
+        runner = HttpRunner().with_variables({})
+        with self.assertRaises(ValidationFailure):
+            runner.run_testcase(testcase)
+
+        self.assertFalse(runner.success)
+        step_names = [step.name for step in runner.get_step_datas()]
+        self.assertEqual(step_names, ["login", "get item 0", "get item 2", "get item 3"])
+
+
+class TestStepCache(LocalServerTestCase):
+    def setUp(self):
+        step_cache.clear()
+        SlowJsonHandler.paths.clear()
+
+    def make_testcase(self, user: Text, scope: Text = "worker") -> models.TestCase:
+        return models.TestCase(
+            config=TConfig(
+                name="cached login",
+                base_url=self.base_url,
+                variables={"user": user, "other": str(time.time())},
+                path=f"{scope}_test.py",
+            ),
+            teststeps=[
+                TStep(
+                    name="login",
+                    request=TRequest(method="GET", url="/login/$user"),
+                    extract={"token": "body.token"},
+                    cache=TStepCache(scope=scope),
+                ),
+                TStep(
+                    name="get item",
+                    request=TRequest(
+                        method="GET", url="/items", headers={"Token": "$token"}
+                    ),
+                ),
+            ],
+        )
+
+    def test_run_step_with_cache(self):
+        for user in ["user1", "user1", "user2", "user1"]:
+            runner = HttpRunner().with_variables({})
+            runner.run_testcase(self.make_testcase(user))
+            summary = runner.get_summary()
+            self.assertTrue(summary.success)
+            self.assertEqual(summary.step_datas[0].export_vars, {"token": "abc"})
+            self.assertEqual(
+                summary.step_datas[1].data.req_resps[0].request.headers["Token"], "abc"
+            )
+
+        # login is run once for each user, unreferenced variables are not in cache key
+        self.assertEqual(SlowJsonHandler.paths.count("/login/user1"), 1)
+        self.assertEqual(SlowJsonHandler.paths.count("/login/user2"), 1)
+        self.assertEqual(SlowJsonHandler.paths.count("/items"), 4)
+        self.assertEqual((step_cache.hits, step_cache.misses), (2, 2))
+
+    def test_run_step_with_module_cache(self):
+        HttpRunner().with_variables({}).run_testcase(self.make_testcase("u", "module"))
+        HttpRunner().with_variables({}).run_testcase(self.make_testcase("u", "module"))
+        testcase = self.make_testcase("u", "module")
+        testcase.config.path = "another_test.py"
+        HttpRunner().with_variables({}).run_testcase(testcase)
+        self.assertEqual(SlowJsonHandler.paths.count("/login/u"), 2)
+
+
+class TestRefTestCaseClass(LocalServerTestCase):
+    def test_ref_testcase_class_loaded_once(self):
+        from unittest import mock
+
+        from httprunner import Config, RunRequest, RunTestCase, Step
+        from httprunner.runner import load_ref_testcase
+
+        base_url = self.base_url
+
+        class TestCaseLogin(HttpRunner):
+            config = Config("login").base_url(base_url).export("token")
+            teststeps = [
+                Step(
+                    RunRequest("login")
+                    .get("/login")
+                    .extract()
+                    .with_jmespath("body.token", "token")
+                )
+            ]
+
+        teststep = TStep(name="login", testcase=TestCaseLogin, export=["token"])
+        testcase = models.TestCase(
+            config=TConfig(name="ref login", base_url=base_url), teststeps=[teststep]
+        )
+        with mock.patch.object(
+            TestCaseLogin,
+            "__init_tests__",
+            autospec=True,
+            side_effect=HttpRunner.__init_tests__,
+        ) as init_tests:
+            for _ in range(3):
+                runner = HttpRunner().with_variables({})
+                runner.run_testcase(testcase)
+                self.assertEqual(runner.get_export_variables(), {})
+                self.assertEqual(
+                    runner.get_step_datas()[0].export_vars, {"token": "abc"}
+                )
+
+        self.assertEqual(init_tests.call_count, 1)
+        self.assertIsNot(
+            load_ref_testcase(TestCaseLogin), load_ref_testcase(TestCaseLogin)
+        )
+
+
+class TestFlatPlan(LocalServerTestCase):
+    def setUp(self):
+        SlowJsonHandler.delay = 0
+
+    def tearDown(self):
+        SlowJsonHandler.delay = 0.2
+
+    def make_testcase(self) -> models.TestCase:
+        from httprunner import Config, RunRequest, RunTestCase, Step
+
+        base_url = self.base_url
+
+        class TestCaseToken(HttpRunner):
+            config = Config("token").base_url(base_url).export("token")
+            teststeps = [
+                Step(
+                    RunRequest("token")
+                    .get("/token/$user")
+                    .extract()
+                    .with_jmespath("body.token", "token")
+                    .with_jmespath("body.path", "token_path")
+                )
+            ]
+
+        class TestCaseLogin(HttpRunner):
+            config = Config("login").base_url(base_url).variables(user="nobody")
+            teststeps = [
+                Step(
+                    RunTestCase("get token")
+                    .with_variables(user="$user")
+                    .call(TestCaseToken)
+                    .export("token")
+                ),
+                Step(
+                    RunRequest("login")
+                    .get("/login/$user")
+                    .with_headers(Token="$token")
+                    .extract()
+                    .with_jmespath("body.path", "login_path")
+                ),
+            ]
+
+        return models.TestCase(
+            config=TConfig(
+                name="nested", base_url=base_url, variables={"user": "alice"}
+            ),
+            teststeps=[
+                TStep(
+                    name="login",
+                    testcase=TestCaseLogin,
+                    variables={"user": "$user"},
+                    export=["login_path", "token"],
+                ),
+                TStep(
+                    name="get item",
+                    request=TRequest(
+                        method="GET", url="/items/$login_path", headers={"Token": "$token"}
+                    ),
+                ),
+            ],
+        )
+
+    def run_and_summarize(self, flat_plan: bool):
+        step_names = []
+        runner = (
+            HttpRunner()
+            .with_variables({})
+            .with_flat_plan(flat_plan)
+            .with_step_callback(lambda step_data: step_names.append(step_data.name))
+            .run_testcase(self.make_testcase())
+        )
+        summary = runner.get_summary().dict()
+        for step_data in summary["step_datas"]:
+            step_data.pop("data")
+        login_step = runner.get_step_datas()[0]
+        nested = [
+            (step.name, step.export_vars, step.success) for step in login_step.data
+        ]
+        token_step = login_step.data[0].data[0]
+        return (
+            summary["success"],
+            summary["step_datas"],
+            nested,
+            token_step.data.req_resps[0].request.url,
+            step_names,
+        )
+
+    def test_flat_plan_same_as_nested_runners(self):
+        SlowJsonHandler.paths.clear()
+        nested_result = self.run_and_summarize(False)
+        nested_paths = list(SlowJsonHandler.paths)
+
+        SlowJsonHandler.paths.clear()
+        flat_result = self.run_and_summarize(True)
+
+        self.assertEqual(flat_result, nested_result)
+        self.assertEqual(SlowJsonHandler.paths, nested_paths)
+        self.assertEqual(
+            nested_paths, ["/token/alice", "/login/alice", "/items//login/alice"]
+        )
+        self.assertEqual(
+            flat_result[1][0]["export_vars"],
+            {"login_path": "/login/alice", "token": "abc"},
+        )
+        self.assertEqual(flat_result[4], ["login", "get item"])
+
+    def test_flat_plan_export_not_found(self):
+        testcase = self.make_testcase()
+        testcase.teststeps[0].export = ["unknown"]
+        with self.assertRaises(exceptions.ParamsError):
+            HttpRunner().with_variables({}).with_flat_plan().run_testcase(testcase)
+
+
+class TestStepVariablesScope(LocalServerTestCase):
+    def setUp(self):
+        SlowJsonHandler.delay = 0
+
+    def tearDown(self):
+        SlowJsonHandler.delay = 0.2
+
+    def test_step_variables_scope(self):
+        config_variables = {"user": "alice", "token": "config", "fixture": {"a": 1}}
+        testcase = models.TestCase(
+            config=TConfig(
+                name="variables scope",
+                base_url=self.base_url,
+                variables=config_variables,
+            ),
+            teststeps=[
+                TStep(
+                    name="login",
+                    request=TRequest(method="GET", url="/login/$user"),
+                    extract={"token": "body.token"},
+                ),
+                TStep(
+                    name="get item",
+                    variables={"user": "$user", "item_path": "/items/$token"},
+                    request=TRequest(method="GET", url="$item_path"),
+                    validators=[{"eq": ["body.path", "/items/abc"]}],
+                ),
+            ],
+        )
+        declared_variables = testcase.teststeps[1].variables
+
+        for _ in range(2):
+            SlowJsonHandler.paths.clear()
+            runner = HttpRunner().with_variables({}).run_testcase(testcase)
+            self.assertTrue(runner.get_summary().success)
+            self.assertEqual(SlowJsonHandler.paths, ["/login/alice", "/items/abc"])
+
+            step_variables = testcase.teststeps[1].variables
+            # extracted variables take precedence over config variables
+            self.assertEqual(step_variables["token"], "abc")
+            # config variables are shared instead of copied into step variables
+            self.assertIs(step_variables.maps[-1], testcase.config.variables)
+            self.assertNotIn("fixture", step_variables.maps[0])
+            self.assertEqual(step_variables.declared, declared_variables)
+
+
+class TestPlainSession(LocalServerTestCase):
+    def test_run_with_requests_session(self):
+        # retry and circuit breaker are supported by httprunner.client.HttpSession only
+        testcase = models.TestCase(
+            config=TConfig(
+                name="plain session",
+                base_url=self.base_url,
+                retry=TRetry(times=2, backoff=0),
+                circuit_breaker=TCircuitBreaker(threshold=10),
+            ),
+            teststeps=[
+                TStep(
+                    name="get",
+                    request=TRequest(method="GET", url="/get"),
+                    validators=[{"eq": ["body.path", "/get"]}],
+                )
+            ],
+        )
+        summary = (
+            HttpRunner()
+            .with_session(requests.Session())
+            .with_variables({})
+            .run_testcase(testcase)
+            .get_summary()
+        )
+        self.assertTrue(summary.success)
+
+    def test_run_with_requests_session_and_cli_rate_limits(self):
+        # rate limits from cli apply to testcases without config rate limits
+        os.environ[RATE_LIMITS_ENV] = json.dumps({"*": {"rate": 100, "burst": 10}})
+        try:
+            testcase = models.TestCase(
+                config=TConfig(name="plain session", base_url=self.base_url),
+                teststeps=[
+                    TStep(name="get", request=TRequest(method="GET", url="/get"))
+                ],
+            )
+            summary = (
+                HttpRunner()
+                .with_session(requests.Session())
+                .with_variables({})
+                .run_testcase(testcase)
+                .get_summary()
+            )
+            self.assertTrue(summary.success)
+        finally:
+            os.environ.pop(RATE_LIMITS_ENV, None)
+
+
+class TestStepRetry(unittest.TestCase):
+    def test_step_retry_overrides_config_retry(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            base_url = f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+        circuit_breakers.clear()
+        testcase = models.TestCase(
+            config=TConfig(
+                name="retry",
+                base_url=base_url,
+                retry=TRetry(times=1, backoff=0),
+                circuit_breaker=TCircuitBreaker(threshold=10),
+            ),
+            teststeps=[
+                TStep(name="config retry", request=TRequest(method="GET", url="/a")),
+                TStep(
+                    name="step retry",
+                    request=TRequest(method="GET", url="/b"),
+                    retry=TRetry(times=2, backoff=0),
+                ),
+            ],
+        )
+        summary = HttpRunner().with_variables({}).run_testcase(testcase).get_summary()
+        self.assertEqual(
+            [step.data.stat.retry_times for step in summary.step_datas], [1, 2]
+        )
+        # 2 + 3 connection errors are counted by circuit breaker of host
+        self.assertEqual(circuit_breakers[base_url[7:]].failures, 5)
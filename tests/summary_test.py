@@ -0,0 +1,84 @@
+import json
+import os
+import tempfile
+import unittest
+
+from httprunner import exceptions
+from httprunner.models import StepData, TestCaseSummary, TestCaseTime
+from httprunner.summary import (
+    SummaryWriter,
+    iter_summary_details,
+    load_summary_stat,
+)
+
+
+def make_testcase_summary(name, success, steps_count):
+    return TestCaseSummary(
+        name=name,
+        success=success,
+        case_id=name,
+        time=TestCaseTime(),
+        step_datas=[StepData(name=f"step {i}") for i in range(steps_count)],
+    )
+
+
+class TestSummary(unittest.TestCase):
+    def setUp(self):
+        self.summary_dir = tempfile.mkdtemp()
+        self.summary_path = os.path.join(self.summary_dir, "all.summary.json")
+
+    def test_write_and_read_summary(self):
+        with SummaryWriter(self.summary_path) as writer:
+            writer.add_testcase(make_testcase_summary("tc1", True, 2))
+            writer.add_testcase(make_testcase_summary("tc2", False, 3))
+
+        # summary file is still a valid JSON document
+        with open(self.summary_path, encoding="utf-8") as f:
+            summary = json.load(f)
+
+        self.assertFalse(summary["success"])
+        self.assertEqual(
+            summary["stat"],
+            {
+                "testcases": {"total": 2, "success": 1, "fail": 1},
+                "teststeps": {"total": 5, "failures": 1, "successes": 4},
+            },
+        )
+        self.assertEqual(len(summary["details"]), 2)
+        self.assertIn("records", summary["details"][0])
+        self.assertNotIn("step_datas", summary["details"][0])
+
+        details = list(iter_summary_details(self.summary_path))
+        self.assertEqual([d["name"] for d in details], ["tc1", "tc2"])
+        self.assertEqual(len(details[1]["records"]), 3)
+
+        stat = load_summary_stat(self.summary_path)
+        self.assertEqual(stat["stat"], summary["stat"])
+        self.assertIn("platform", stat)
+        self.assertNotIn("details", stat)
+
+    def test_read_unfinished_summary(self):
+        writer = SummaryWriter(self.summary_path)
+        writer.add_testcase(make_testcase_summary("tc1", True, 1))
+
+        details = list(iter_summary_details(self.summary_path))
+        self.assertEqual(len(details), 1)
+
+        with self.assertRaises(exceptions.SummaryEmpty):
+            load_summary_stat(self.summary_path)
+
+        writer.close()
+        self.assertTrue(load_summary_stat(self.summary_path)["success"])
+
+    def test_read_summary_dumped_in_one_piece(self):
+        summary = {
+            "success": True,
+            "stat": {},
+            "details": [{"name": "tc1"}, {"name": "tc2"}],
+        }
+        with open(self.summary_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=4)
+
+        details = list(iter_summary_details(self.summary_path))
+        self.assertEqual(len(details), 2)
+        self.assertEqual(load_summary_stat(self.summary_path), {"success": True, "stat": {}})
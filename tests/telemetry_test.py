@@ -0,0 +1,73 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+import unittest
+
+from httprunner import telemetry
+
+
+class TestTelemetry(unittest.TestCase):
+    def tearDown(self):
+        os.environ.pop(telemetry.TELEMETRY_ENV, None)
+
+    def test_disabled_by_default(self):
+        self.assertFalse(telemetry.is_enabled())
+        os.environ[telemetry.TELEMETRY_ENV] = "1"
+        self.assertTrue(telemetry.is_enabled())
+
+    def test_disabled_without_any_cost(self):
+        script = (
+            "import sys\n"
+            "from httprunner import telemetry\n"
+            "telemetry.capture_message('hello')\n"
+            "telemetry.capture_exception(Exception('hello'))\n"
+            "print(telemetry._worker is None, 'sentry_sdk' in sys.modules)\n"
+        )
+        env = {k: v for k, v in os.environ.items() if k != telemetry.TELEMETRY_ENV}
+        output = subprocess.check_output([sys.executable, "-c", script], env=env)
+        self.assertEqual(output.decode().strip(), "True False")
+
+    def test_worker_send_in_background(self):
+        events = []
+        thread_names = []
+
+        def sender(event):
+            thread_names.append(threading.current_thread().name)
+            events.append(event)
+
+        worker = telemetry.TelemetryWorker(sender=sender, initializer=lambda: None)
+        self.assertFalse(worker.started)
+        worker.submit(("message", "hello"))
+        worker.submit(("exception", ValueError("hi")))
+        self.assertTrue(worker.flush())
+
+        self.assertEqual(events[0], ("message", "hello"))
+        self.assertEqual(events[1][0], "exception")
+        self.assertEqual(thread_names, ["hrun-telemetry", "hrun-telemetry"])
+
+    def test_worker_never_blocks(self):
+        blocker = threading.Event()
+        worker = telemetry.TelemetryWorker(
+            sender=lambda event: blocker.wait(5), initializer=lambda: None, maxsize=2
+        )
+
+        start_at = time.time()
+        results = [worker.submit(("message", str(i))) for i in range(10)]
+        self.assertLess(time.time() - start_at, 1)
+        self.assertGreaterEqual(worker.dropped, 7)
+        self.assertFalse(all(results))
+
+        blocker.set()
+        self.assertTrue(worker.flush())
+
+    def test_initializer_error_is_ignored(self):
+        def initializer():
+            raise RuntimeError("network unreachable")
+
+        events = []
+        worker = telemetry.TelemetryWorker(sender=events.append, initializer=initializer)
+        worker.submit(("message", "hello"))
+        self.assertTrue(worker.flush())
+        self.assertEqual(events, [])
@@ -0,0 +1,197 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler
+
+from httprunner import HttpRunner, loader, tracing
+from httprunner.backports import ThreadingHTTPServer
+from httprunner.ext.mock.core import MockRoutes, make_mock_response, start_mock_server
+from httprunner.loader import load_testcase
+from httprunner.tracing import (
+    TRACE_ENV,
+    BatchSpanProcessor,
+    OtlpHttpSpanExporter,
+    Span,
+    pop_trace_arg,
+    set_trace_destination,
+)
+
+
+class MemorySpanExporter(object):
+    def __init__(self):
+        self.spans = []
+
+    def export(self, spans):
+        self.spans.extend(spans)
+
+
+class CollectorHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.payloads.append((self.path, json.loads(body)))
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestTracing(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        routes = MockRoutes()
+        routes.add("GET", "/ok", make_mock_response(body={"code": 0}))
+        cls.mock_server = start_mock_server(routes)
+        cls.base_url = f"http://127.0.0.1:{cls.mock_server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.mock_server.shutdown()
+        cls.mock_server.server_close()
+
+    def tearDown(self):
+        loader.project_meta = None
+        tracing.disable()
+        os.environ.pop(TRACE_ENV, None)
+
+    def test_parse_args(self):
+        self.assertEqual(
+            pop_trace_arg(["a_test.py", "--hrun-trace", "spans.jsonl"]),
+            (["a_test.py"], "spans.jsonl"),
+        )
+        self.assertEqual(
+            pop_trace_arg(["--hrun-trace=http://127.0.0.1:4318", "a_test.py"]),
+            (["a_test.py"], "http://127.0.0.1:4318"),
+        )
+        self.assertEqual(pop_trace_arg(["a_test.py"]), (["a_test.py"], ""))
+        # pytest --trace is passed through
+        self.assertEqual(
+            pop_trace_arg(["--trace", "a_test.py"]), (["--trace", "a_test.py"], "")
+        )
+        with self.assertRaises(ValueError):
+            pop_trace_arg(["a_test.py", "--hrun-trace"])
+
+        set_trace_destination("spans.jsonl")
+        self.assertEqual(os.environ[TRACE_ENV], os.path.abspath("spans.jsonl"))
+
+    def test_disabled(self):
+        self.assertIsNone(tracing.tracer)
+        with tracing.start_span("demo") as span:
+            span.set_attribute("key", "value")
+        headers = {}
+        tracing.inject(headers)
+        self.assertEqual(headers, {})
+
+    def test_trace_testcase(self):
+        exporter = MemorySpanExporter()
+        tracing.enable(exporter=exporter)
+        testcase = load_testcase(
+            {
+                "config": {"name": "trace demo", "base_url": self.base_url},
+                "teststeps": [
+                    {
+                        "name": "ok",
+                        "request": {"method": "GET", "url": "/ok"},
+                        "validate": [{"eq": ["body.code", 0]}],
+                    }
+                ],
+            }
+        )
+        runner = HttpRunner().with_variables({})
+        runner.run_testcase(testcase)
+        self.assertTrue(tracing.tracer.processor.force_flush())
+
+        spans = {span.name: span for span in exporter.spans}
+        self.assertEqual(
+            set(spans), {"testcase: trace demo", "step: ok", "GET /ok", "validate"}
+        )
+        testcase_span = spans["testcase: trace demo"]
+        step_span = spans["step: ok"]
+        request_span = spans["GET /ok"]
+        self.assertEqual(testcase_span.parent_id, "")
+        self.assertEqual(step_span.parent_id, testcase_span.span_id)
+        self.assertEqual(request_span.parent_id, step_span.span_id)
+        self.assertEqual(spans["validate"].parent_id, step_span.span_id)
+        self.assertEqual(
+            {span.trace_id for span in exporter.spans}, {testcase_span.trace_id}
+        )
+        self.assertEqual(request_span.kind, tracing.SpanKind.CLIENT)
+        self.assertEqual(request_span.attributes["http.status_code"], 200)
+        self.assertLessEqual(testcase_span.start_time, request_span.start_time)
+        self.assertLessEqual(request_span.end_time, testcase_span.end_time)
+
+        # request carries traceparent of request span
+        request_headers = runner.get_step_records()[0].data.req_resps[0].request.headers
+        self.assertEqual(
+            request_headers["traceparent"],
+            f"00-{request_span.trace_id}-{request_span.span_id}-01",
+        )
+        self.assertEqual(
+            request_headers["HRUN-Request-ID"],
+            request_span.attributes["hrun.request_id"],
+        )
+
+    def test_batch_processor(self):
+        exporter = MemorySpanExporter()
+        processor = BatchSpanProcessor(exporter, max_batch_size=2, schedule_delay=60)
+        for index in range(5):
+            span = Span(f"span {index}", "0" * 32)
+            processor.on_end(span)
+        processor.shutdown()
+        self.assertEqual(
+            [span.name for span in exporter.spans], [f"span {i}" for i in range(5)]
+        )
+
+    def test_file_exporter(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            file_path = os.path.join(tmp_dir, "logs", "spans.jsonl")
+            tracing.enable(file_path)
+            with tracing.start_span("parent"):
+                with tracing.start_span("child") as span:
+                    span.set_attribute("key", 1)
+            tracing.disable()
+
+            with open(file_path) as f:
+                lines = [json.loads(line) for line in f]
+            self.assertEqual([line["name"] for line in lines], ["child", "parent"])
+            self.assertEqual(lines[0]["parent_id"], lines[1]["span_id"])
+            self.assertEqual(lines[0]["attributes"], {"key": 1})
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_otlp_exporter(self):
+        collector = ThreadingHTTPServer(("127.0.0.1", 0), CollectorHandler)
+        collector.payloads = []
+        threading.Thread(target=collector.serve_forever, daemon=True).start()
+        try:
+            tracing.enable(f"http://127.0.0.1:{collector.server_port}")
+            with tracing.start_span("demo") as span:
+                span.set_attribute("http.status_code", 503)
+                span.set_status(tracing.StatusCode.ERROR)
+            tracing.disable()
+        finally:
+            collector.shutdown()
+            collector.server_close()
+
+        self.assertEqual(len(collector.payloads), 1)
+        path, payload = collector.payloads[0]
+        self.assertEqual(path, "/v1/traces")
+        otlp_span = payload["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+        self.assertEqual(otlp_span["name"], "demo")
+        self.assertEqual(len(otlp_span["traceId"]), 32)
+        self.assertEqual(
+            otlp_span["attributes"],
+            [{"key": "http.status_code", "value": {"intValue": "503"}}],
+        )
+        self.assertEqual(otlp_span["status"]["code"], tracing.StatusCode.ERROR)
+        self.assertNotIn("parentSpanId", otlp_span)
+        self.assertEqual(
+            OtlpHttpSpanExporter("http://127.0.0.1:4318/v1/traces").endpoint,
+            "http://127.0.0.1:4318/v1/traces",
+        )
+
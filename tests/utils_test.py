@@ -6,7 +6,10 @@ import unittest
 from httprunner import loader, utils
 from httprunner.utils import (
     ExtendJSONEncoder,
+    VariablesScope,
+    get_declared_variables,
     merge_variables,
+    pop_cli_option,
 )
 
 
@@ -127,6 +130,29 @@ class TestUtils(unittest.TestCase):
             {"base_url": "https://httpbin.org", "foo1": "bar1"},
         )
 
+    def test_variables_scope(self):
+        config_variables = {"base_url": "https://httpbin.org", "foo1": "bar111"}
+        extracted_variables = {"token": "abc"}
+        declared_variables = {"foo1": "$foo1"}
+        scope = VariablesScope(
+            {"foo1": "bar1"},
+            extracted_variables,
+            config_variables,
+            declared=declared_variables,
+        )
+        self.assertEqual(scope["foo1"], "bar1")
+        self.assertEqual(scope["token"], "abc")
+        self.assertEqual(scope["base_url"], "https://httpbin.org")
+
+        # writes only go to step layer
+        scope["token"] = "xyz"
+        self.assertEqual(scope["token"], "xyz")
+        self.assertEqual(extracted_variables, {"token": "abc"})
+        self.assertEqual(config_variables["foo1"], "bar111")
+
+        self.assertIs(get_declared_variables(scope), declared_variables)
+        self.assertIs(get_declared_variables(config_variables), config_variables)
+
     def test_cartesian_product_one(self):
         parameters_content_list = [[{"a": 1}, {"a": 2}]]
         product_list = utils.gen_cartesian_product(*parameters_content_list)
@@ -152,3 +178,25 @@ class TestUtils(unittest.TestCase):
         parameters_content_list = []
         product_list = utils.gen_cartesian_product(*parameters_content_list)
         self.assertEqual(product_list, [])
+
+    def test_pop_cli_option(self):
+        self.assertEqual(
+            pop_cli_option(["a_test.py", "--metrics", "9464", "-s"], "--metrics"),
+            (["a_test.py", "-s"], ["9464"]),
+        )
+        self.assertEqual(
+            pop_cli_option(["--rate-limit=a=1", "--rate-limit", "b=2"], "--rate-limit"),
+            ([], ["a=1", "b=2"]),
+        )
+        self.assertEqual(
+            pop_cli_option(["--profile", "a_test.py"], "--profile", const="timers"),
+            (["a_test.py"], ["timers"]),
+        )
+        # options with the same prefix are not popped
+        self.assertEqual(
+            pop_cli_option(["--trace", "a_test.py"], "--hrun-trace"),
+            (["--trace", "a_test.py"], []),
+        )
+        for args in [["a_test.py", "--metrics"], ["--metrics=", "a_test.py"]]:
+            with self.assertRaises(ValueError):
+                pop_cli_option(args, "--metrics", "[HOST:]PORT")